@@ -0,0 +1,29 @@
+# node throughput of the branch-and-bound driver with and without batched child evaluation
+# run from the repository root: python benchmarks/bench_bnb.py
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from MC import exp
+from bnb import branch_and_bound
+
+def camel(x, y):
+    return 4*x**2 - 2.1*x**4 + x**6/3 + x*y - 4*y**2 + 4*y**4
+
+def wave(x1, x2, x3, x4):
+    return exp(x1*x2) + exp(-x3*x4) + (x1 - 1)**2 + (x2 + 0.5)**2 + x3**4 - x4**2 + x1*x3*x4
+
+PROBLEMS = [('six-hump camel', camel, [[-3, 3], [-2, 2]]),
+            ('wave (n = 4)', wave, [[-2, 2]]*4)]
+
+def main():
+    print('%16s %6s %10s %10s %14s %14s' % ('problem', 'batch', 'nodes', 'time [s]', 'nodes/s', 'upper'))
+    for name, fun, box in PROBLEMS:
+        for batch in (1, 8, 64, 256):
+            result = branch_and_bound(fun, box, atol=1e-4, rtol=1e-4, max_nodes=200000, batch=batch)
+            print('%16s %6d %10d %10.3f %14.0f %14.6f' % (name, batch, result.nodes, result.time,
+                                                         result.nodes_per_second, result.upper))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# cost of a cached lookup against the evaluation of MCSGPy relaxations
+# run from the repository root: python benchmarks/bench_cache.py [N]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCSGPy, exp, sqrt
+from cache import RelaxationCache
+
+def fun(x1, x2):
+    return x1**(3)/sqrt(x1)*x2 + exp(x2)
+
+def variables(point):
+    x1 = MCSGPy(np.array([1., 5.]), np.array([point[0], point[0]]), np.matrix([[1., 1.], [0., 0.]]))
+    x2 = MCSGPy(np.array([-2., -1.]), np.array([point[1], point[1]]), np.matrix([[0., 0.], [1., 1.]]))
+    return x1, x2
+
+def main(N=2000):
+    rng = np.random.default_rng(0)
+    #a loop that revisits a small set of points, as parents and duplicate children in branch-and-bound
+    points = np.column_stack([rng.uniform(1, 5, 50), rng.uniform(-2, -1, 50)])
+    calls = [variables(points[k]) for k in rng.integers(0, len(points), N)]
+
+    start = time.perf_counter()
+    for args in calls:
+        fun(*args)
+    plain = (time.perf_counter() - start)/N
+
+    cache = RelaxationCache(maxsize=256)
+    start = time.perf_counter()
+    for args in calls:
+        cache(fun, *args)
+    memoized = (time.perf_counter() - start)/N
+
+    print('%d calls on %d distinct points [us/call]' % (N, len(points)))
+    print('%-12s %10.2f' % ('uncached', 1e6*plain))
+    print('%-12s %10.2f' % ('cached', 1e6*memoized))
+    print(cache)
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
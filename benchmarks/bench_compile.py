@@ -0,0 +1,71 @@
+# operator-overloaded evaluation versus compiled straight-line functions (scalar and vectorized)
+# run from the repository root: python benchmarks/bench_compile.py
+
+import os
+import sys
+import time
+import timeit
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCSGPy, exp, sqrt
+from batch import variables
+from tape import trace
+from compiler import compile_tape, clear_cache
+
+EXPRESSIONS = {
+    'x1*x2': lambda x1, x2: x1*x2,
+    'x2**2 + x2*x1': lambda x1, x2: x2**2 + x2*x1,
+    'x1**3/sqrt(x1)*x2': lambda x1, x2: x1**(3)/sqrt(x1)*x2,
+    'exp(x1)*sqrt(x2+3)': lambda x1, x2: exp(x1)*sqrt(x2+3),
+}
+
+def main(number=2000, N=100000):
+    x1 = MCSGPy(np.array([1, 5]), np.array([3, 3]), np.matrix([[1, 1], [0, 0]]))
+    x2 = MCSGPy(np.array([-2, -1]), np.array([-1.5, -1.5]), np.matrix([[0, 0], [1, 1]]))
+    IA = [[1.0, 5.0], [-2.0, -1.0]]
+    MC = [[3.0, 3.0], [-1.5, -1.5]]
+    LB, UB, CV, CC = [1.0, -2.0], [5.0, -1.0], [3.0, -1.5], [3.0, -1.5]
+
+    print('scalar, with subgradients [us per evaluation]')
+    print('%-22s %10s %10s %10s %10s' % ('expression', 'MCSGPy', 'tape', 'compiled', 'raw'))
+    for name, fun in EXPRESSIONS.items():
+        tape = trace(fun, 2)
+        seeds = tape.seeds()
+        compiled = compile_tape(tape, subgradient=True)
+        times = [
+            timeit.timeit(lambda: fun(x1, x2), number=number),
+            timeit.timeit(lambda: tape.evaluate(IA, MC, seeds), number=number),
+            timeit.timeit(lambda: compiled(IA, MC), number=number),
+            timeit.timeit(lambda: compiled.function(LB, UB, CV, CC), number=number),
+        ]
+        print('%-22s %10.2f %10.2f %10.2f %10.2f' % ((name,) + tuple(t/number*1e6 for t in times)))
+
+    print()
+    print('vectorized over N = %d boxes, with subgradients [ms per batch]' % N)
+    print('%-22s %10s %10s' % ('expression', 'MCBatchPy', 'compiled'))
+    rng = np.random.default_rng(0)
+    lower = np.array([[1.0], [-2.0]])*np.ones((2, N))
+    upper = lower + rng.uniform(0.5, 4, (2, N))
+    point = lower + rng.uniform(0, 1, (2, N))*(upper - lower)
+    for name, fun in EXPRESSIONS.items():
+        compiled = compile_tape(trace(fun, 2), subgradient=True, vectorized=True)
+        IA_batch = np.stack([lower, upper], axis=1)
+        MC_batch = np.stack([point, point], axis=1)
+        t_batch = timeit.timeit(lambda: fun(*variables(lower, upper, point)), number=5)/5*1e3
+        t_compiled = timeit.timeit(lambda: compiled(IA_batch, MC_batch), number=5)/5*1e3
+        print('%-22s %10.2f %10.2f' % (name, t_batch, t_compiled))
+
+    print()
+    clear_cache()
+    fun = EXPRESSIONS['x1**3/sqrt(x1)*x2']
+    start = time.perf_counter()
+    compile_tape(trace(fun, 2), subgradient=True)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    compile_tape(trace(fun, 2), subgradient=True)
+    cached = time.perf_counter() - start
+    print('trace + compile: first %.3f ms, cached %.3f ms' % (first*1e3, cached*1e3))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# convergence-order analysis: convergence_order against an MCPy loop over widths and sample points
+# run from the repository root: python benchmarks/bench_convergence.py [samples]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCPy, exp, log, sqrt
+from convergence import convergence_order, fit_order
+
+CASES = (
+    ('exp(x**3)', lambda x: exp(x**3), [1.0]),
+    ('log(x**3)*sqrt(x)', lambda x: log(x**3)*sqrt(x), [1.0]),
+    ('3 variables', lambda x, y, z: x*y*z + exp(x)*y**2 - sqrt(z + 3)*x, [0.3, -0.2, 0.5]),
+)
+
+def loop(fun, center, samples, width=1.0, ratio=0.5, count=12):
+    '''
+    pointwise order the way convergence.ipynb gets it: MCPy objects per width and sample point
+    '''
+
+    center = np.array(center, dtype=float)
+    n = len(center)
+    unit = np.vstack([np.full(n, 0.5), np.random.default_rng(0).random((samples - 1, n))])
+    widths = width*ratio**np.arange(count)
+    pointwise = []
+    for w in widths:
+        largest = 0.0
+        for u in unit:
+            z = center - w/2 + u*w
+            relaxation = fun(*[MCPy(np.array([c - w/2, c + w/2]), np.array([p, p])) for c, p in zip(center, z)])
+            f = fun(*[MCPy(np.array([p, p]), np.array([p, p])) for p in z]).IA[0]
+            largest = max(largest, f - relaxation.MC[0], relaxation.MC[1] - f)
+        pointwise.append(largest)
+    return fit_order(widths[-count//2:], pointwise[-count//2:])[0]
+
+def main(samples=256):
+    print('%-20s %12s %14s %14s %10s %8s' % ('function', 'loop [s]', 'batched [s]', 'parallel [s]', 'speedup', 'order'))
+    for name, fun, center in CASES:
+        start = time.perf_counter()
+        #the degenerate boxes [p, p] give 0/0 secants in MCPy, which only affect the unused relaxations
+        with np.errstate(divide='ignore', invalid='ignore'):
+            order_loop = loop(fun, center, samples)
+        t_loop = time.perf_counter() - start
+        result = convergence_order(fun, center, samples=samples, processes=1)
+        parallel = convergence_order(fun, center, samples=samples)
+        assert abs(result.order - order_loop) < 1e-9 and abs(parallel.order - result.order) < 1e-12
+        print('%-20s %12.3f %14.3f %14.3f %9.0fx %8.3f' % (name, t_loop, result.time, parallel.time,
+                                                           t_loop/result.time, result.order))
+    print()
+    print(result.table())
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
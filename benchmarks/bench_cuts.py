@@ -0,0 +1,43 @@
+# batched affine cuts at K points of one box against K MCSGPy evaluations
+# run from the repository root: python benchmarks/bench_cuts.py [K]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCSGPy, exp, sqrt, log
+from cuts import affine_cuts
+
+def fun(x1, x2, x3):
+    return exp(x1)*sqrt(x2 + 3) - x1*x2*x3 + (x1 - x3)**3 + log(x3 + 2)**2
+
+def main(K=1000):
+    box = [[-1., 0.5], [0., 1.], [0.5, 1.5]]
+    n = len(box)
+    rng = np.random.default_rng(0)
+    points = rng.uniform([b[0] for b in box], [b[1] for b in box], (K, n))
+    affine_cuts(fun, box, points[:1])
+
+    start = time.perf_counter()
+    cuts = affine_cuts(fun, box, points)
+    batched = time.perf_counter() - start
+
+    start = time.perf_counter()
+    slopes = np.empty((K, n))
+    intercepts = np.empty(K)
+    for c, x in enumerate(points):
+        result = fun(*[MCSGPy(np.array(box[k]), np.array([x[k], x[k]]), np.matrix(np.column_stack([np.eye(n)[:,k]]*2)))
+                       for k in range(n)])
+        slopes[c] = np.asarray(result.SG)[:,0]
+        intercepts[c] = result.MC[0] - slopes[c] @ x
+    objects = time.perf_counter() - start
+
+    print('%d cv/cc cuts of one box [ms]' % K)
+    print('%-20s %10.2f' % ('MCSGPy per point', 1e3*objects))
+    print('%-20s %10.2f' % ('affine_cuts', 1e3*batched))
+    print('max difference of the cv cuts: %.2e' % max(np.abs(slopes - cuts.cv_slopes).max(), np.abs(intercepts - cuts.cv_intercepts).max()))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,40 @@
+# scalar eq_mul over a loop of products against the vectorized eq_mul_batch kernel
+# run from the repository root: python benchmarks/bench_eq_mul.py [N]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from utility import eq_mul, eq_mul_batch
+
+def operands(rng, N, n):
+    lower = rng.uniform(-2, 2, N)
+    upper = lower + rng.uniform(0, 2, N)
+    cv = lower + (upper - lower)*rng.random(N)
+    cc = cv + (upper - cv)*rng.random(N)
+    return np.array([lower, upper]), np.array([cv, cc]), rng.normal(size=(n, 2, N))
+
+def main(N=10000):
+    rng = np.random.default_rng(0)
+    print('N = %d products' % N)
+    print('%6s %16s %16s %10s' % ('n', 'scalar [us/op]', 'batch [us/op]', 'speedup'))
+    for n in (1, 10, 100):
+        IA1, MC1, SG1 = operands(rng, N, n)
+        IA2, MC2, SG2 = operands(rng, N, n)
+        M = min(N, 2000)
+        columns = [(IA1[:,k], IA2[:,k], MC1[:,k], MC2[:,k], np.asmatrix(SG1[:,:,k]), np.asmatrix(SG2[:,:,k]))
+                   for k in range(M)]
+        start = time.perf_counter()
+        for args in columns:
+            eq_mul(*args)
+        scalar = (time.perf_counter() - start)/M
+        start = time.perf_counter()
+        for _ in range(5):
+            eq_mul_batch(IA1, IA2, MC1, MC2, SG1, SG2)
+        batch = (time.perf_counter() - start)/5/N
+        print('%6d %16.3f %16.4f %10.0f' % (n, 1e6*scalar, 1e6*batch, scalar/batch))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
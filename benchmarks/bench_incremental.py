@@ -0,0 +1,46 @@
+# point-phase evaluation on a prepared box against full tape replays, many points on one box
+# run from the repository root: python benchmarks/bench_incremental.py [N]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import exp, log, sqrt
+from tape import trace
+from incremental import prepare
+
+def fun(x1, x2, x3):
+    return sqrt(x1*x1 + x2*x2 + 1)*exp(-x3) - x1*x2*x3 + log(x3 + 4)**2 + (x1 - x2)**3 + (x3 + 5)**(-2)
+
+def timeit(f, points):
+    start = time.perf_counter()
+    for MC in points:
+        f(MC)
+    return (time.perf_counter() - start)/len(points)
+
+def main(N=5000):
+    tape = trace(fun, 3)
+    box = [[-1., 1.], [0.5, 2.], [0., 1.]]
+    rng = np.random.default_rng(0)
+    x = rng.uniform([b[0] for b in box], [b[1] for b in box], (N, 3))
+    points = [[[u, u] for u in row] for row in x]
+
+    start = time.perf_counter()
+    prepared = prepare(tape, box)
+    setup = time.perf_counter() - start
+
+    print('%d points on one box, %d nodes [us/point]' % (N, len(tape)))
+    print('%-28s %10.2f' % ('box phase (once)', 1e6*setup))
+    print('%-28s %10s %10s' % ('', 'replay', 'prepared'))
+    for name, full, point in (
+            ('values (MCPy)', lambda MC: tape.evaluate(box, MC), prepared.evaluate),
+            ('subgradients, forward', lambda MC: tape.evaluate(box, MC, tape.seeds()), lambda MC: prepared.evaluate(MC, tape.seeds())),
+            ('subgradients, reverse', lambda MC: tape.reverse(box, MC), prepared.reverse)):
+        t_full = timeit(full, points)
+        t_point = timeit(point, points)
+        print('%-28s %10.2f %10.2f  %5.2fx' % (name, 1e6*t_full, 1e6*t_point, t_full/t_point))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,47 @@
+# cost of interval-only screening against the full relaxations
+# run from the repository root: python benchmarks/bench_interval.py [N]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCPy, MCSGPy, exp, sqrt
+from interval import IAPy, evaluate
+from tape import trace
+from compiler import compile_tape
+
+def fun(x1, x2):
+    return x1**(3)/sqrt(x1 + 3)*x2 + exp(x2)
+
+def timeit(f, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start)/repeat
+
+def main(N=100000):
+    IA = [np.array([-1., 1.]), np.array([0.5, 2.])]
+    MC = [np.array([0., 0.]), np.array([1., 1.])]
+    SG = [np.matrix([[1., 1.], [0., 0.]]), np.matrix([[0., 0.], [1., 1.]])]
+    print('scalar evaluation [us]')
+    for name, args in (('IAPy', [IAPy(b) for b in IA]),
+                       ('MCPy', [MCPy(b, m) for b, m in zip(IA, MC)]),
+                       ('MCSGPy', [MCSGPy(b, m, s) for b, m, s in zip(IA, MC, SG)])):
+        print('%10s %10.2f' % (name, 1e6*timeit(lambda: fun(*args), 2000)))
+
+    tape = trace(fun, 2)
+    rng = np.random.default_rng(0)
+    lower = rng.uniform(-2, 0, (2, N))
+    upper = lower + rng.uniform(0.1, 2, (2, N))
+    boxes = np.stack([lower, upper], axis=1)
+    points = np.stack([(lower + upper)/2]*2, axis=1)
+    print('%d boxes [ns/box]' % N)
+    print('%10s %10.1f' % ('interval', 1e9*timeit(lambda: evaluate(tape, boxes), 5)/N))
+    for subgradient in (False, True):
+        compiled = compile_tape(tape, subgradient=subgradient, vectorized=True)
+        print('%10s %10.1f' % ('MCSG' if subgradient else 'MC', 1e9*timeit(lambda: compiled(boxes, points), 5)/N))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,37 @@
+# MCPy versus the __slots__/float MCLitePy on the expressions of examples.ipynb
+# run from the repository root: python benchmarks/bench_lite.py
+
+import os
+import sys
+import timeit
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCPy, exp, sqrt
+from lite import MCLitePy
+
+EXPRESSIONS = {
+    'x1*x2': lambda x1, x2: x1*x2,
+    'exp(x1)*sqrt(x2+3)': lambda x1, x2: exp(x1)*sqrt(x2+3),
+    'x2**2 + x2*x1': lambda x1, x2: x2**2 + x2*x1,
+    'x1**3/sqrt(x1)*x2': lambda x1, x2: x1**(3)/sqrt(x1)*x2,
+    'matrix product': lambda x1, x2: np.matrix([[x1, x2], [x1, x2]])*np.matrix([[x1, x2], [x1, x2]]),
+    'sqrt(x1+2.4)*exp(x1)': lambda x1, x2: sqrt(x1 + 2.4)*exp(x1),
+    '-x2*exp(-x2)': lambda x1, x2: -x2*exp(-x2),
+    'x1*x2**2': lambda x1, x2: x1*x2**(2),
+}
+
+def main(number=5000):
+    x1 = MCPy(np.array([1, 5]), np.array([3, 3]))
+    x2 = MCPy(np.array([-2, -1]), np.array([-1.5, -1.5]))
+    y1 = MCLitePy([1, 5], [3, 3])
+    y2 = MCLitePy([-2, -1], [-1.5, -1.5])
+
+    print('%-22s %12s %12s %8s' % ('expression', 'MCPy [us]', 'lite [us]', 'speedup'))
+    for name, fun in EXPRESSIONS.items():
+        t_mcpy = timeit.timeit(lambda: fun(x1, x2), number=number)/number*1e6
+        t_lite = timeit.timeit(lambda: fun(y1, y2), number=number)/number*1e6
+        print('%-22s %12.2f %12.2f %8.1f' % (name, t_mcpy, t_lite, t_mcpy/t_lite))
+
+if __name__ == '__main__':
+    main()
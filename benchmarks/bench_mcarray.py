@@ -0,0 +1,46 @@
+# matrix products of relaxations: MCArray against np.matrix of MCSGPy objects
+# run from the repository root: python benchmarks/bench_mcarray.py [m]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from mcarray import array, variables
+
+def best(fun, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fun()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main(m=20):
+    rng = np.random.default_rng(0)
+    n = 2*m
+    x = variables(rng.uniform(-2, 0, n), rng.uniform(0.5, 2, n))
+    objects = x.to_objects()
+    #two m-by-m matrices whose entries are drawn from the n variables
+    Ao = np.matrix(objects[rng.integers(n, size=(m, m))])
+    Bo = np.matrix(objects[rng.integers(n, size=(m, m))])
+    A, B = array(Ao), array(Bo)
+    C = rng.uniform(-1, 1, (m, m))
+
+    print('m = %d, n = %d variables [ms]' % (m, n))
+    print('%-12s %12s %12s %10s' % ('product', 'np.matrix', 'MCArray', 'speedup'))
+    for name, objects_fun, array_fun in (
+            ('A @ B', lambda: Ao*Bo, lambda: A @ B),
+            ('A @ A.T', lambda: Ao*Ao.T, lambda: A @ A.T),
+            ('C @ A', lambda: np.matrix(C)*Ao, lambda: C @ A),
+            ('A @ x', lambda: Ao*np.matrix(objects[:m]).T, lambda: A @ x[:m])):
+        t_objects, result_objects = best(objects_fun, 1)
+        t_array, result_array = best(array_fun)
+        cv = np.array([[entry.MC[0] for entry in row] for row in np.asarray(result_objects)])
+        error = np.abs(cv.reshape(result_array.shape) - result_array.MC[0]).max()
+        print('%-12s %12.2f %12.2f %9.1fx   max |cv difference| %.1e' % (
+            name, 1e3*t_objects, 1e3*t_array, t_objects/t_array, error))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
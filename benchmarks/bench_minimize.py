@@ -0,0 +1,48 @@
+# iterations, time and bound of the relaxation minimizer per method and step-size rule
+# run from the repository root: python benchmarks/bench_minimize.py [max_iter]
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import exp, sqrt
+from tape import trace
+from minimize import minimize_relaxation
+
+def camel(x1, x2):
+    return 4*x1**2 - 2.1*x1**4 + x1**6/3 + x1*x2 - 4*x2**2 + 4*x2**4
+
+def wave(x1, x2, x3):
+    return exp(x1)*sqrt(x2 + 3) - x1*x2*x3 + (x1 - x3)**3
+
+def main(max_iter=200):
+    problems = [
+        ('camel', trace(camel, 2), [[0., 0.5], [0.2, 0.6]]),
+        ('camel', trace(camel, 2), [[-2., -1.], [0.5, 1.]]),
+        ('wave', trace(wave, 3), [[-1., 0.], [0., 1.], [0.5, 1.5]]),
+    ]
+    settings = [('subgradient', 'polyak'), ('subgradient', 'diminishing'), ('subgradient', 'constant'), ('kelley', None)]
+    #import scipy before timing the kelley mode
+    minimize_relaxation(camel, [[0., 1.], [0., 1.]], method='kelley', max_iter=2)
+
+    print('%-6s %-24s %-12s %-12s %6s %10s %14s' % ('', 'box', 'method', 'step', 'iter', 'time [ms]', 'lower'))
+    for name, tape, box in problems:
+        for method, step in settings:
+            result = minimize_relaxation(tape, box, method=method, step=step or 'polyak', max_iter=max_iter)
+            print('%-6s %-24s %-12s %-12s %6d %10.2f %14.6f  %s' % (
+                name, np.array2string(np.array(box)[:,0]), method, step or '', result.iterations,
+                1e3*result.time, result.lower, result.status))
+
+    #early termination against an incumbent, and a warm start of a child box from its parent
+    tape, box = problems[1][1], problems[1][2]
+    result = minimize_relaxation(tape, box, incumbent=-8, max_iter=max_iter)
+    print('incumbent -8: %s after %d iterations, lower %.6f' % (result.status, result.iterations, result.lower))
+    parent = minimize_relaxation(tape, box, method='kelley', max_iter=max_iter)
+    child = [[-2., -1.5], [0.5, 1.]]
+    for label, warm in (('cold', None), ('warm', parent)):
+        result = minimize_relaxation(tape, child, method='kelley', warm_start=warm, max_iter=max_iter)
+        print('child box, %s start: %s after %d iterations, lower %.6f' % (label, result.status, result.iterations, result.lower))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
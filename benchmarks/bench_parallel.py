@@ -0,0 +1,38 @@
+# scaling of the shared-memory process pool evaluation with the number of processes
+# run from the repository root: python benchmarks/bench_parallel.py [N]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import exp, sqrt
+from tape import trace
+from parallel import BoxEvaluator
+
+def main(N=1000000):
+    tape = trace(lambda x1, x2: x1**(3)/sqrt(x1 + 3)*x2 + exp(x2), 2)
+    rng = np.random.default_rng(0)
+    lower = rng.uniform(-2, 0, (2, N))
+    upper = lower + rng.uniform(0.1, 2, (2, N))
+    point = lower + rng.uniform(0, 1, (2, N))*(upper - lower)
+    IA = np.stack([lower, upper], axis=1)
+    MC = np.stack([point, point], axis=1)
+
+    print('N = %d boxes, %d cpus' % (N, os.cpu_count()))
+    print('%10s %12s %10s' % ('processes', 'time [s]', 'speedup'))
+    processes = 1
+    serial = None
+    while processes <= (os.cpu_count() or 1):
+        with BoxEvaluator(tape, subgradient=True, processes=processes, min_batch=1) as evaluator:
+            evaluator(IA[:, :, :1000], MC[:, :, :1000])
+            start = time.perf_counter()
+            evaluator(IA, MC)
+            elapsed = time.perf_counter() - start
+        serial = serial or elapsed
+        print('%10d %12.3f %10.2f' % (processes, elapsed, serial/elapsed))
+        processes *= 2
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
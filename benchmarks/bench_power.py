@@ -0,0 +1,50 @@
+# direct odd/negative integer power rules against the product chains they replace:
+# x**p versus x*x**(p-1) for odd p, and versus (x**(-1))**(-p) for negative p
+# run from the repository root: python benchmarks/bench_power.py
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCPy, MCSGPy
+
+CASES = [(3, [-1., 2.]), (3, [-2., 1.]), (5, [-1., 1.]), (7, [-0.5, 2.]), (5, [0.5, 2.]), (3, [-2., -0.5]),
+         (-2, [0.5, 2.]), (-3, [0.2, 3.]), (-4, [1., 4.])]
+
+def direct(x, p):
+    return x**p
+
+def chain(x, p):
+    if p > 0:
+        return x*x**(p-1)
+    return (x**(-1))**(-p)
+
+def timeit(f, repeat=2000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start)/repeat
+
+def gap(rule, p, box, points):
+    '''
+    mean distance cc - cv of the relaxations of x**p at the points
+    '''
+
+    return np.mean([np.diff(rule(MCPy(np.array(box), np.array([x, x])), p).MC)[0] for x in points])
+
+def main():
+    print('%4s %14s %12s %12s %12s %12s %10s %10s' % ('p', 'domain', 'MCPy [us]', 'chain [us]', 'MCSGPy [us]',
+                                                      'chain [us]', 'gap', 'chain gap'))
+    for p, box in CASES:
+        x = MCPy(np.array(box), np.array([np.mean(box)]*2))
+        xs = MCSGPy(np.array(box), np.array([np.mean(box)]*2), np.matrix([[1., 1.]]))
+        points = np.linspace(box[0], box[1], 201)
+        print('%4d %14s %12.2f %12.2f %12.2f %12.2f %10.4g %10.4g' % (
+            p, box, 1e6*timeit(lambda: direct(x, p)), 1e6*timeit(lambda: chain(x, p)),
+            1e6*timeit(lambda: direct(xs, p)), 1e6*timeit(lambda: chain(xs, p)),
+            gap(direct, p, box, points), gap(chain, p, box, points)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# rule profile of a notebook expression, and its cost outside/inside profiling.profile()
+# run from the repository root: python benchmarks/bench_profiling.py [N]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCSGPy, exp, log, sqrt
+import profiling
+
+def fun(x1, x2):
+    return x1**(3)/sqrt(x1)*x2 - 2*exp(x2) + log(x1)*x2**2
+
+def timeit(f, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        f()
+    return (time.perf_counter() - start)/repeat
+
+def main(N=2000):
+    x1 = MCSGPy(np.array([1., 5.]), np.array([3., 3.]), np.matrix([[1., 1.], [0., 0.]]))
+    x2 = MCSGPy(np.array([-2., -1.]), np.array([-1.5, -1.5]), np.matrix([[0., 0.], [1., 1.]]))
+
+    before = timeit(lambda: fun(x1, x2), N)
+    with profiling.profile() as stats:
+        profiled = timeit(lambda: fun(x1, x2), N)
+    after = timeit(lambda: fun(x1, x2), N)
+    with profiling.profile(memory=True) as memory:
+        traced = timeit(lambda: fun(x1, x2), N//10)
+
+    print('evaluation [us]')
+    print('%-24s %10.2f' % ('before profiling', 1e6*before))
+    print('%-24s %10.2f' % ('profile()', 1e6*profiled))
+    print('%-24s %10.2f' % ('profile(memory=True)', 1e6*traced))
+    print('%-24s %10.2f' % ('after profiling', 1e6*after))
+    print()
+    print(stats.report())
+    print()
+    print(memory.report())
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,51 @@
+# load time of a recorded expression from the binary tape format against tracing it again and unpickling it;
+# speedup is the optimized tracing time over the load time
+# run from the repository root: python benchmarks/bench_serialize.py [repeat]
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from MC import exp, sqrt
+from tape import trace
+from serialize import save, load
+
+def chain(*x):
+    f = x[0]
+    for k in range(1, len(x)):
+        f = f*exp(x[k]*0.1) + sqrt(x[k]**2 + 1)
+    return f
+
+def best(fun, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(repeat=5):
+    print('%6s %8s %10s %12s %10s %13s %11s %10s %10s' % ('n', 'nodes', 'file [kB]', 'pickle [kB]', 'trace [ms]',
+                                                            'optimize [ms]', 'pickle [ms]', 'load [ms]', 'speedup'))
+    with tempfile.TemporaryDirectory() as directory:
+        for n in (10, 100, 1000, 10000):
+            fun = lambda *x: chain(*x)
+            tape = trace(fun, n, optimize=True)
+            path = os.path.join(directory, 'chain%d.tape' % n)
+            size = save(tape, path)
+            pickled = pickle.dumps(tape)
+            assert load(path).digest() == tape.digest()
+
+            t_trace = best(lambda: trace(fun, n), repeat)
+            t_optimize = best(lambda: trace(fun, n, optimize=True), repeat)
+            t_pickle = best(lambda: pickle.loads(pickled), repeat)
+            t_load = best(lambda: load(path), repeat)
+            print('%6d %8d %10.1f %12.1f %10.3f %13.3f %11.3f %10.3f %9.1fx' % (
+                n, len(tape), size/1e3, len(pickled)/1e3, 1e3*t_trace, 1e3*t_optimize, 1e3*t_pickle, 1e3*t_load,
+                t_optimize/t_load))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,67 @@
+# micro-batching relaxation server: throughput and latency against one-at-a-time evaluation
+# run from the repository root: python benchmarks/bench_server.py [requests]
+
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCSGPy, exp, sqrt, log
+from compiler import compile_tape
+from tape import trace
+from server import RelaxationServer, connect
+
+def fun(x1, x2, x3):
+    return exp(x1)*sqrt(x2 + 3) - x1*x2*x3 + (x1 - x3)**3 + log(x3 + 2)**2
+
+def boxes(N):
+    rng = np.random.default_rng(0)
+    LB = rng.uniform(-1, 0, (N, 3))
+    UB = LB + rng.uniform(0.1, 1, (N, 3))
+    point = rng.uniform(LB, UB)
+    return [(np.stack([LB[k], UB[k]], axis=1), np.stack([point[k], point[k]], axis=1)) for k in range(N)]
+
+async def serve(requests, window, clients):
+    server = RelaxationServer(window=window)
+    server.register('f', fun, 3)
+    if clients == 0:
+        start = time.perf_counter()
+        await asyncio.gather(*[server.evaluate('f', IA, MC, True) for IA, MC in requests])
+    else:
+        address = await server.start()
+        connections = [await connect(address) for _ in range(clients)]
+        start = time.perf_counter()
+        await asyncio.gather(*[connections[k % clients].evaluate('f', IA, MC, True) for k, (IA, MC) in enumerate(requests)])
+        for connection in connections:
+            await connection.close()
+    elapsed = time.perf_counter() - start
+    await server.close()
+    return elapsed, server.metrics()
+
+def main(N=5000):
+    requests = boxes(N)
+    print('%d requests of one box with subgradients' % N)
+    print('%-28s %12s %14s %10s %12s %12s' % ('mode', 'time [s]', 'requests/sec', 'batch', 'p50 [ms]', 'p99 [ms]'))
+
+    start = time.perf_counter()
+    for IA, MC in requests[:N//10]:
+        fun(*[MCSGPy(IA[k], MC[k], np.asmatrix(np.column_stack([np.eye(3)[:,k]]*2))) for k in range(3)])
+    elapsed = 10*(time.perf_counter() - start)
+    print('%-28s %12.3f %14.0f %10s %12s %12s' % ('MCSGPy one at a time', elapsed, N/elapsed, 1, '-', '-'))
+
+    compiled = compile_tape(trace(fun, 3), True)
+    start = time.perf_counter()
+    for IA, MC in requests:
+        compiled(IA, MC)
+    elapsed = time.perf_counter() - start
+    print('%-28s %12.3f %14.0f %10s %12s %12s' % ('compiled one at a time', elapsed, N/elapsed, 1, '-', '-'))
+
+    for name, window, clients in (('server in-process', 0.002, 0), ('server, 4 TCP clients', 0.002, 4)):
+        elapsed, metrics = asyncio.run(serve(requests, window, clients))
+        print('%-28s %12.3f %14.0f %10.1f %12.2f %12.2f' % (name, elapsed, N/elapsed, metrics['mean_batch'],
+                                                            metrics['latency_p50_ms'], metrics['latency_p99_ms']))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
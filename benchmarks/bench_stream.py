@@ -0,0 +1,38 @@
+# streaming evaluation into a memory-mapped .npy file: time and peak heap against the number of points
+# run from the repository root: python benchmarks/bench_stream.py [N]
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import exp, sqrt
+from stream import evaluate_to_file, grid, stream
+
+def fun(x1, x2):
+    return exp(x1)*sqrt(x2 + 3) - x1*x2 + (x1 - x2)**3
+
+def main(N=4000000):
+    box = [[-1., 0.5], [0., 1.]]
+    print('%10s %12s %14s %16s' % ('points', 'time [s]', 'points/sec', 'peak heap [MB]'))
+    with tempfile.TemporaryDirectory() as directory:
+        for points in (N//16, N//4, N):
+            num = (points//1000, 1000)
+            tracemalloc.start()
+            start = time.perf_counter()
+            out = evaluate_to_file(fun, box, grid(box, num), os.path.join(directory, 'relaxations.npy'), subgradient=True)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print('%10d %12.3f %14.0f %16.1f' % (len(out), elapsed, len(out)/elapsed, peak/2**20))
+            del out
+
+    #the same reduction without a file: the largest relaxation gap cc - cv over the grid
+    gap = max(float(np.max(result.MC[1] - result.MC[0])) for start, result in stream(fun, box, grid(box, (N//1000, 1000))))
+    print('largest gap cc - cv over %d points: %.6f' % (N, gap))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
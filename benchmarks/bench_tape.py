@@ -0,0 +1,56 @@
+# per-evaluation cost of the operator-overloaded object graph versus replaying a recorded tape,
+# and forward versus reverse mode subgradients on the tape
+# run from the repository root: python benchmarks/bench_tape.py
+
+import os
+import sys
+import timeit
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCPy, MCSGPy, exp, sqrt
+from tape import trace
+
+EXPRESSIONS = {
+    'x1*x2': lambda x1, x2: x1*x2,
+    'x2**2 + x2*x1': lambda x1, x2: x2**2 + x2*x1,
+    'x1**3/sqrt(x1)*x2': lambda x1, x2: x1**(3)/sqrt(x1)*x2,
+    'exp(x1)*sqrt(x2+3)': lambda x1, x2: exp(x1)*sqrt(x2+3),
+}
+
+IA = [[1, 5], [-2, -1]]
+MC = [[3, 3], [-1.5, -1.5]]
+
+def main(number=2000):
+    x1 = MCSGPy(np.array([1, 5]), np.array([3, 3]), np.matrix([[1, 1], [0, 0]]))
+    x2 = MCSGPy(np.array([-2, -1]), np.array([-1.5, -1.5]), np.matrix([[0, 0], [1, 1]]))
+    x3 = MCPy(np.array([1, 5]), np.array([3, 3]))
+    x4 = MCPy(np.array([-2, -1]), np.array([-1.5, -1.5]))
+
+    print('%-22s %12s %12s %12s %12s' % ('expression', 'MCPy [us]', 'tape [us]', 'MCSGPy [us]', 'tape SG [us]'))
+    for name, fun in EXPRESSIONS.items():
+        tape = trace(fun, 2)
+        seeds = tape.seeds()
+        times = [
+            timeit.timeit(lambda: fun(x3, x4), number=number),
+            timeit.timeit(lambda: tape.evaluate(IA, MC), number=number),
+            timeit.timeit(lambda: fun(x1, x2), number=number),
+            timeit.timeit(lambda: tape.evaluate(IA, MC, seeds), number=number),
+        ]
+        print('%-22s %12.1f %12.1f %12.1f %12.1f' % ((name,) + tuple(t/number*1e6 for t in times)))
+
+    #forward versus reverse subgradients of a chain of bilinear terms in n variables
+    print()
+    print('%-22s %12s %12s' % ('n', 'forward [ms]', 'reverse [ms]'))
+    for n in [10, 100, 1000]:
+        tape = trace(lambda *x: sum((x[i]*x[i+1] for i in range(n-1)), exp(x[0])), n)
+        box = np.column_stack([np.full(n, 0.5), np.full(n, 2.0)])
+        point = np.column_stack([np.ones(n), np.ones(n)])
+        seeds = tape.seeds()
+        repeat = max(1, number//n)
+        t_forward = timeit.timeit(lambda: tape.evaluate(box, point, seeds), number=repeat)/repeat*1e3
+        t_reverse = timeit.timeit(lambda: tape.reverse(box, point), number=repeat)/repeat*1e3
+        print('%-22d %12.2f %12.2f' % (n, t_forward, t_reverse))
+
+if __name__ == '__main__':
+    main()
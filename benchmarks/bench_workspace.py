@@ -0,0 +1,51 @@
+# subgradient propagation in a preallocated workspace against Tape.evaluate, for growing n
+# run from the repository root: python benchmarks/bench_workspace.py [repeat]
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import exp, sqrt
+from tape import trace
+from workspace import workspace
+
+def chain(*x):
+    f = x[0]
+    for k in range(1, len(x)):
+        f = f*exp(x[k]*0.1) + sqrt(x[k]**2 + 1)
+    return f
+
+def best(fun, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fun()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main(repeat=5):
+    print('%6s %8s %8s %16s %16s %9s %14s' % ('n', 'nodes', 'slots', 'evaluate [ms]', 'workspace [ms]', 'speedup', 'buffer [kB]'))
+    for n in (10, 100, 500, 2000):
+        tape = trace(chain, n)
+        rng = np.random.default_rng(0)
+        LB = rng.uniform(-1, 0, n)
+        UB = LB + 1
+        IA = np.column_stack([LB, UB])
+        point = rng.uniform(LB, UB)
+        MC = np.column_stack([point, point])
+        seeds = tape.seeds()
+        ws = workspace(tape)
+
+        reference = tape.evaluate(IA, MC, seeds)
+        result = ws.evaluate(IA, MC)
+        assert np.array_equal(np.asarray(reference.SG), np.asarray(result.SG))
+
+        t_evaluate = best(lambda: tape.evaluate(IA, MC, seeds), repeat)
+        t_workspace = best(lambda: ws.evaluate(IA, MC), repeat)
+        print('%6d %8d %8d %16.2f %16.2f %8.2fx %14.1f' % (n, len(tape), ws.slots, 1e3*t_evaluate, 1e3*t_workspace,
+                                                           t_evaluate/t_workspace, ws.nbytes/1024))
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
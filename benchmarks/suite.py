@@ -0,0 +1,203 @@
+# reproducible benchmark suite of the MCPy/MCSGPy relaxations with JSON output
+# run from the repository root:
+#   python benchmarks/suite.py [--quick] [--output results.json] [--compare baseline.json] [--threshold 1.2]
+# every result has a stable id (group/class/case), its best time per call in seconds and the timing setup;
+# --compare prints the ratio to a previous run and exits with status 1 if a case got slower than the threshold
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from MC import MCPy, MCSGPy, exp, log, sqrt
+
+CLASSES = {'MCPy': MCPy, 'MCSGPy': MCSGPy}
+
+def variable(cls, IA, point, k=0, n=1):
+    '''
+    variable k of n on the box IA, relaxed at point
+    '''
+
+    IA = np.array(IA, dtype=float)
+    MC = np.array([point, point], dtype=float)
+    if cls is MCPy:
+        return MCPy(IA, MC)
+    SG = np.zeros((n, 2))
+    SG[k] = 1
+    return MCSGPy(IA, MC, np.asmatrix(SG))
+
+def measure(fun, repeat):
+    '''
+    best time per call of fun() over repeat rounds, the number of calls per round is chosen by timeit
+    '''
+
+    timer = timeit.Timer(fun)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))/number
+    return best, number
+
+#per-operator cases: operands x on [1, 5], y on [2, 4], z on [-1, 2] (sign change)
+OPERATORS = [
+    ('add', lambda x, y, z: x + y),
+    ('sub', lambda x, y, z: x - y),
+    ('mul', lambda x, y, z: x*y),
+    ('mul_scalar', lambda x, y, z: 2.5*x),
+    ('div', lambda x, y, z: x/y),
+    ('pow_even', lambda x, y, z: z**2),
+    ('pow_odd', lambda x, y, z: z**3),
+    ('pow_negative', lambda x, y, z: x**(-2)),
+    ('inv', lambda x, y, z: x**(-1)),
+    ('exp', lambda x, y, z: exp(x)),
+    ('log', lambda x, y, z: log(x)),
+    ('sqrt', lambda x, y, z: sqrt(x)),
+]
+
+def operator_cases(cls):
+    x = variable(cls, [1, 5], 3, 0, 3)
+    y = variable(cls, [2, 4], 3, 1, 3)
+    z = variable(cls, [-1, 2], 0.5, 2, 3)
+    for name, fun in OPERATORS:
+        yield name, {}, lambda fun=fun: fun(x, y, z)
+
+#composite expressions of examples.ipynb and convergence.ipynb
+def notebook_cases(cls):
+    x1 = variable(cls, [1, 5], 3, 0, 2)
+    x2 = variable(cls, [-2, -1], -1.5, 1, 2)
+    M = np.array([[x1, x2], [x1, x2]], dtype=object)
+    u = variable(cls, [-2, 4], 1)
+    v = variable(cls, [-1.2, -0.6], -0.9)
+    a = variable(cls, [-1, 1], 0.2, 0, 2)
+    b = variable(cls, [-1, 1], -0.3, 1, 2)
+    w = variable(cls, [0.5, 1.5], 1)
+    yield 'x1*x2', {}, lambda: x1*x2
+    yield 'exp(x1)*sqrt(x2+3)', {}, lambda: exp(x1)*sqrt(x2+3)
+    yield 'matrix_product_2x2', {}, lambda: M.dot(M)
+    yield 'x2**2+x2*x1', {}, lambda: x2**2 + x2*x1
+    yield 'x1**3/sqrt(x1)*x2', {}, lambda: x1**(3)/sqrt(x1)*x2
+    yield 'sqrt(x+2.4)*exp(x)', {}, lambda: sqrt(u + 2.4)*exp(u)
+    yield '-x*exp(-x)', {}, lambda: -v*exp(-v)
+    yield 'x1*x2**2', {}, lambda: a*b**(2)
+    yield 'exp(x**3)', {}, lambda: exp(w**3)
+    yield 'log(x**3)*sqrt(x)', {}, lambda: log(w**3)*sqrt(w)
+
+def chain(xs):
+    '''
+    sum of x_k*x_(k+1) + exp(x_k)/n over all variables: every variable enters a product and an exp
+    '''
+
+    n = len(xs)
+    f = xs[0]*xs[1 % n]
+    for k in range(1, n):
+        f = f + xs[k]*xs[(k+1) % n]
+    for k in range(n):
+        f = f + exp(xs[k])*(1/n)
+    return f
+
+def scaling_n_cases(cls, sizes):
+    for n in sizes:
+        xs = [variable(cls, [-1, 1 + 0.1*k], 0.1*k, k, n) for k in range(n)]
+        yield 'n=%d' % n, {'n': n}, lambda xs=xs: chain(xs)
+
+def nested(x, y, depth):
+    '''
+    f_0 = x, f_(k+1) = sqrt(f_k**2 + y): a chain of 3*depth rules without bilinear products
+    '''
+
+    f = x
+    for _ in range(depth):
+        f = sqrt(f**2 + y)
+    return f
+
+def scaling_depth_cases(cls, depths):
+    x = variable(cls, [1, 2], 1.5, 0, 2)
+    y = variable(cls, [0.5, 1], 0.75, 1, 2)
+    for depth in depths:
+        yield 'depth=%d' % depth, {'depth': depth}, lambda depth=depth: nested(x, y, depth)
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+def run(quick=False, repeat=5):
+    sizes = (2, 10, 50) if quick else (2, 10, 50, 100, 200)
+    depths = (1, 10, 50) if quick else (1, 10, 50, 100, 200)
+    groups = [
+        ('operator', operator_cases),
+        ('notebook', notebook_cases),
+        ('scaling_n', lambda cls: scaling_n_cases(cls, sizes)),
+        ('scaling_depth', lambda cls: scaling_depth_cases(cls, depths)),
+    ]
+    results = []
+    for group, cases in groups:
+        for class_name, cls in CLASSES.items():
+            for case, parameters, fun in cases(cls):
+                seconds, number = measure(fun, repeat)
+                result = {'id': '%s/%s/%s' % (group, class_name, case), 'group': group, 'class': class_name,
+                          'case': case, 'seconds': seconds, 'number': number, 'repeat': repeat}
+                result.update(parameters)
+                results.append(result)
+                print('%-48s %12.2f us' % (result['id'], 1e6*seconds), file=sys.stderr)
+    return {'environment': environment(), 'results': results}
+
+def compare(report, baseline, threshold):
+    '''
+    print the time ratios to a baseline report and return the ids that got slower than threshold
+    '''
+
+    previous = {result['id']: result['seconds'] for result in baseline['results']}
+    regressions = []
+    print('%-48s %12s %12s %8s' % ('id', 'baseline', 'current', 'ratio'))
+    for result in report['results']:
+        if result['id'] not in previous:
+            continue
+        ratio = result['seconds']/previous[result['id']]
+        flag = ' *' if ratio > threshold else ''
+        print('%-48s %12.2f %12.2f %8.2f%s' % (result['id'], 1e6*previous[result['id']], 1e6*result['seconds'], ratio, flag))
+        if ratio > threshold:
+            regressions.append(result['id'])
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='MCPy/MCSGPy benchmark suite')
+    parser.add_argument('--quick', action='store_true', help='smaller scaling sweeps')
+    parser.add_argument('--repeat', type=int, default=5, help='timing rounds per case')
+    parser.add_argument('--output', help='write the JSON report to this file (default: stdout)')
+    parser.add_argument('--compare', help='JSON report of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio reported as a regression')
+    args = parser.parse_args(argv)
+
+    report = run(args.quick, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=1)
+        print()
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        if regressions:
+            print('%d regression(s) above %.2fx' % (len(regressions), args.threshold))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
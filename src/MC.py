@@ -3,7 +3,8 @@
 import math
 import numpy as np 
 import sys
-from utility import eq_mul
+import rules
+from utility import eq_mul, sg_zeros, sg_hstack, odd_power_envelopes, mid
 
 class MCPy:
     '''
@@ -81,7 +82,8 @@ class MCPy:
         overloading interger power opertor
         '''
         
-        if power % 2 == 0 and power > 0:
+        kind = rules.power_kind(power)
+        if kind == 'even':
             """
             overloading positive even interger power
             """
@@ -95,12 +97,13 @@ class MCPy:
             cv_arg = mid(self.MC[0], self.MC[1], xmin)
             cc_arg = mid(self.MC[0], self.MC[1], xmax)
             cv = max(IA[0], cv_arg**power)
-            cc = min(IA[1], self.IA[0]**power + (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0]))
+            slope = (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else power*self.IA[0]**(power-1)
+            cc = min(IA[1], self.IA[0]**power + slope*(cc_arg-self.IA[0]))
             MC = np.array([cv, cc])           
                 
             return MCPy(IA, MC) 
         
-        elif power == -1:
+        elif kind == 'inv':
             '''
             overloading **(-1)
             '''
@@ -121,7 +124,8 @@ class MCPy:
             cv_arg = mid(self.MC[0],self.MC[1],xmin)
             cc_arg = mid(self.MC[0],self.MC[1],xmax)
             cv = max(IA[0],1/cv_arg)
-            cc = min(IA[1],(1/self.IA[1]-1/self.IA[0])/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0])+1/self.IA[0])
+            slope = (1/self.IA[1]-1/self.IA[0])/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else -1/self.IA[0]**2
+            cc = min(IA[1],slope*(cc_arg-self.IA[0])+1/self.IA[0])
             MC = np.array([cv, cc])
             
             if flag == 1:
@@ -130,34 +134,61 @@ class MCPy:
             else:
                 return MCPy(IA, MC)                         
         
-        elif power == 1:
+        elif kind == 'one':
             '''
             overloading **1
             '''
             return self
         
-        elif power % 2 == 1 and power > 2:   
+        elif kind == 'odd':
             '''
-            overloading positive odd integer power
+            overloading positive odd integer power: concave for x <= 0 and convex for x >= 0,
+            the envelopes on a sign-changing domain follow the tangents of utility.odd_power_envelopes
             '''
-            return self*self**(power-1)
-        
-        elif power % 2 == 1 and power < -1:
-            '''
-            overloading negative odd interger power
-            '''
-            temp = self**(-1)
-            return temp**(-power)
+            
+            IA = np.array([self.IA[0]**power, self.IA[1]**power])
+            
+            t_cv, slope_cv, t_cc, slope_cc = odd_power_envelopes(self.IA[0], self.IA[1], power)
+            cv_arg = mid(self.MC[0], self.MC[1], self.IA[0])
+            cc_arg = mid(self.MC[0], self.MC[1], self.IA[1])
+            cv_val = cv_arg**power if cv_arg > t_cv else IA[0] + slope_cv*(cv_arg-self.IA[0])
+            cc_val = cc_arg**power if cc_arg < t_cc else IA[1] + slope_cc*(cc_arg-self.IA[1])
+            cv = max(IA[0], cv_val)
+            cc = min(IA[1], cc_val)
+            MC = np.array([cv, cc])
+            
+            return MCPy(IA, MC)
         
-        elif power % 2 == 0 and power < -1:
+        elif kind == 'negative':
             '''
-            overloading negative even interger power
+            overloading negative interger power: convex and decreasing for x > 0; for x < 0 convex and
+            increasing if the power is even, concave and decreasing if it is odd
             '''
-            temp = self**(-1)
-            return temp**(-power)
-        
-        else:
-            raise ValueError('This power rule is not supported yet.')
+            
+            if self.IA[0]*self.IA[1] <= 0:
+                raise ValueError('1/x cannot contain domain 0')
+            
+            values = [self.IA[0]**float(power), self.IA[1]**float(power)]
+            IA = np.array([min(values), max(values)])
+            slope = (values[1] - values[0])/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else power*self.IA[0]**float(power-1)
+            
+            convex = self.IA[0] > 0 or power % 2 == 0
+            increasing = self.IA[1] < 0 and power % 2 == 0
+            xmin = self.IA[0] if increasing else self.IA[1]
+            xmax = self.IA[1] if increasing else self.IA[0]
+            cv_arg = mid(self.MC[0], self.MC[1], xmin)
+            cc_arg = mid(self.MC[0], self.MC[1], xmax)
+            if convex:
+                cv_val = cv_arg**float(power)
+                cc_val = values[0] + slope*(cc_arg-self.IA[0])
+            else:
+                cv_val = values[0] + slope*(cv_arg-self.IA[0])
+                cc_val = cc_arg**float(power)
+            cv = max(IA[0], cv_val)
+            cc = min(IA[1], cc_val)
+            MC = np.array([cv, cc])
+            
+            return MCPy(IA, MC)
             
     def __mul__(self, MCPy2):
         '''
@@ -299,7 +330,8 @@ class MCSGPy:
         overloading interger power opertor
         '''
         
-        if power % 2 == 0 and power > 0:
+        kind = rules.power_kind(power)
+        if kind == 'even':
             """
             overloading positive even interger power
             """
@@ -313,36 +345,36 @@ class MCSGPy:
             cv_arg = mid(self.MC[0], self.MC[1], xmin)
             cc_arg = mid(self.MC[0], self.MC[1], xmax)
             cv = max(IA[0], cv_arg**power)
-            cc = min(IA[1], self.IA[0]**power + (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0]))
+            slope = (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else power*self.IA[0]**(power-1)
+            cc = min(IA[1], self.IA[0]**power + slope*(cc_arg-self.IA[0]))
             MC = np.array([cv, cc])
             
             sigma_uu = power*self.MC[0]**(power-1)
-            sigma_ou = (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0])
+            sigma_ou = slope
             sigma_uo = power*self.MC[1]**(power-1)
-            sigma_oo = (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0])
+            sigma_oo = slope
             
-            n = len(self.SG[:,0])
             if IA[0] > cv_arg**power:
-                SG_cv = np.zeros((n,1))
+                SG_cv = sg_zeros(self.SG)
             elif xmin > self.MC[1]:
                 SG_cv = sigma_uo*self.SG[:,1]
             elif xmin <= self.MC[0]:
                 SG_cv = sigma_uu*self.SG[:,0]
             else:
-                SG_cv = np.asmatrix(np.zeros((n,1)))
+                SG_cv = sg_zeros(self.SG)
                 
-            if IA[1] < self.MC[0]**power + (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0])*(cc_arg-self.MC[0]):
-                SG = np.hstack((SG_cv, np.zeros((n,1))))
+            if IA[1] < self.MC[0]**power + slope*(cc_arg-self.MC[0]):
+                SG = sg_hstack(SG_cv, sg_zeros(self.SG))
             elif xmax >= self.MC[1]:
-                SG = np.hstack((SG_cv, sigma_oo*self.SG[:,1]))
+                SG = sg_hstack(SG_cv, sigma_oo*self.SG[:,1])
             elif xmax < self.MC[0]:
-                SG = np.hstack((SG_cv, sigma_ou*self.SG[:,0]))
+                SG = sg_hstack(SG_cv, sigma_ou*self.SG[:,0])
             else:
-                SG = np.hstack((SG_cv, np.zeros((n,1))))
+                SG = sg_hstack(SG_cv, sg_zeros(self.SG))
                 
             return MCSGPy(IA, MC, SG) 
         
-        elif power == -1:
+        elif kind == 'inv':
             '''
             overloading **(-1)
             '''
@@ -363,33 +395,33 @@ class MCSGPy:
             cv_arg = mid(self.MC[0],self.MC[1],xmin)
             cc_arg = mid(self.MC[0],self.MC[1],xmax)
             cv = max(IA[0],1/cv_arg)
-            cc = min(IA[1],(1/self.IA[1]-1/self.IA[0])/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0])+1/self.IA[0])
+            slope = (1/self.IA[1]-1/self.IA[0])/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else -1/self.IA[0]**2
+            cc = min(IA[1],slope*(cc_arg-self.IA[0])+1/self.IA[0])
             MC = np.array([cv, cc])
 
             sigma_uu = -1/self.MC[0]**2
-            sigma_ou = (1/self.IA[1]-1/self.IA[0])/(self.IA[1]-self.IA[0])
+            sigma_ou = slope
             sigma_uo = -1/self.MC[1]**2
-            sigma_oo = (1/self.IA[1]-1/self.IA[0])/(self.IA[1]-self.IA[0])
+            sigma_oo = slope
 
-            n = len(self.SG[:,0])
             if IA[0] > 1/cv_arg:
-                SG_cv = np.zeros((n,1))
+                SG_cv = sg_zeros(self.SG)
             elif xmin > self.MC[1]:
                 SG_cv = sigma_uo*self.SG[:,1]
             elif xmin <= self.MC[0]:
                 SG_cv = sigma_uu*self.SG[:,0]
             else:
-                SG_cv = np.zeros((n,1))
+                SG_cv = sg_zeros(self.SG)
             
-            if IA[1] < (1/self.IA[1]-1/self.IA[0])/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0])+1/self.IA[0]:
-                SG_cc = np.zeros((n,1))
+            if IA[1] < slope*(cc_arg-self.IA[0])+1/self.IA[0]:
+                SG_cc = sg_zeros(self.SG)
             elif xmax >= self.MC[1]:
                 SG_cc = sigma_oo*self.SG[:,1]
             elif xmax < self.MC[0]:
                 SG_cc = sigma_ou*self.SG[:,0]
             else:
-                SG_cc = np.zeros((n,1))
-            SG = np.asmatrix(np.hstack((SG_cv, SG_cc)))
+                SG_cc = sg_zeros(self.SG)
+            SG = sg_hstack(SG_cv, SG_cc)
             
             if flag == 1:
                 self = -self
@@ -397,34 +429,118 @@ class MCSGPy:
             else:
                 return MCSGPy(IA, MC, SG)                         
         
-        elif power == 1:
+        elif kind == 'one':
             '''
             overloading **1
             '''
             return self
         
-        elif power % 2 == 1 and power > 2:   
-            '''
-            overloading positive odd integer power
-            '''
-            return self*self**(power-1)
-        
-        elif power % 2 == 1 and power < -1:
+        elif kind == 'odd':
             '''
-            overloading negative odd interger power
+            overloading positive odd integer power: concave for x <= 0 and convex for x >= 0,
+            the envelopes on a sign-changing domain follow the tangents of utility.odd_power_envelopes
             '''
-            temp = self**(-1)
-            return temp**(-power)
+            
+            IA = np.array([self.IA[0]**power, self.IA[1]**power])
+            
+            t_cv, slope_cv, t_cc, slope_cc = odd_power_envelopes(self.IA[0], self.IA[1], power)
+            cv_arg = mid(self.MC[0], self.MC[1], self.IA[0])
+            cc_arg = mid(self.MC[0], self.MC[1], self.IA[1])
+            cv_val = cv_arg**power if cv_arg > t_cv else IA[0] + slope_cv*(cv_arg-self.IA[0])
+            cc_val = cc_arg**power if cc_arg < t_cc else IA[1] + slope_cc*(cc_arg-self.IA[1])
+            cv = max(IA[0], cv_val)
+            cc = min(IA[1], cc_val)
+            MC = np.array([cv, cc])
+            
+            sigma_uu = power*self.MC[0]**(power-1) if self.MC[0] > t_cv else slope_cv
+            sigma_uo = power*self.MC[1]**(power-1) if self.MC[1] > t_cv else slope_cv
+            sigma_ou = power*self.MC[0]**(power-1) if self.MC[0] < t_cc else slope_cc
+            sigma_oo = power*self.MC[1]**(power-1) if self.MC[1] < t_cc else slope_cc
+            
+            xmin = self.IA[0]
+            xmax = self.IA[1]
+            
+            if IA[0] > cv_val:
+                SG_cv = sg_zeros(self.SG)
+            elif xmin > self.MC[1]:
+                SG_cv = sigma_uo*self.SG[:,1]
+            elif xmin <= self.MC[0]:
+                SG_cv = sigma_uu*self.SG[:,0]
+            else:
+                SG_cv = sg_zeros(self.SG)
+            
+            if IA[1] < cc_val:
+                SG_cc = sg_zeros(self.SG)
+            elif xmax >= self.MC[1]:
+                SG_cc = sigma_oo*self.SG[:,1]
+            elif xmax < self.MC[0]:
+                SG_cc = sigma_ou*self.SG[:,0]
+            else:
+                SG_cc = sg_zeros(self.SG)
+            SG = sg_hstack(SG_cv, SG_cc)
+            
+            return MCSGPy(IA, MC, SG)
         
-        elif power % 2 == 0 and power < -1:
+        elif kind == 'negative':
             '''
-            overloading negative even interger power
+            overloading negative interger power: convex and decreasing for x > 0; for x < 0 convex and
+            increasing if the power is even, concave and decreasing if it is odd
             '''
-            temp = self**(-1)
-            return temp**(-power)
-        
-        else:
-            raise ValueError('This power rule is not supported yet.')
+            
+            if self.IA[0]*self.IA[1] <= 0:
+                raise ValueError('1/x cannot contain domain 0')
+            
+            values = [self.IA[0]**float(power), self.IA[1]**float(power)]
+            IA = np.array([min(values), max(values)])
+            slope = (values[1] - values[0])/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else power*self.IA[0]**float(power-1)
+            
+            convex = self.IA[0] > 0 or power % 2 == 0
+            increasing = self.IA[1] < 0 and power % 2 == 0
+            xmin = self.IA[0] if increasing else self.IA[1]
+            xmax = self.IA[1] if increasing else self.IA[0]
+            cv_arg = mid(self.MC[0], self.MC[1], xmin)
+            cc_arg = mid(self.MC[0], self.MC[1], xmax)
+            if convex:
+                cv_val = cv_arg**float(power)
+                cc_val = values[0] + slope*(cc_arg-self.IA[0])
+            else:
+                cv_val = values[0] + slope*(cv_arg-self.IA[0])
+                cc_val = cc_arg**float(power)
+            cv = max(IA[0], cv_val)
+            cc = min(IA[1], cc_val)
+            MC = np.array([cv, cc])
+            
+            if convex:
+                sigma_uu = power*self.MC[0]**float(power-1)
+                sigma_uo = power*self.MC[1]**float(power-1)
+                sigma_ou = slope
+                sigma_oo = slope
+            else:
+                sigma_uu = slope
+                sigma_uo = slope
+                sigma_ou = power*self.MC[0]**float(power-1)
+                sigma_oo = power*self.MC[1]**float(power-1)
+            
+            if IA[0] > cv_val:
+                SG_cv = sg_zeros(self.SG)
+            elif xmin > self.MC[1]:
+                SG_cv = sigma_uo*self.SG[:,1]
+            elif xmin <= self.MC[0]:
+                SG_cv = sigma_uu*self.SG[:,0]
+            else:
+                SG_cv = sg_zeros(self.SG)
+            
+            if IA[1] < cc_val:
+                SG_cc = sg_zeros(self.SG)
+            elif xmax >= self.MC[1]:
+                SG_cc = sigma_oo*self.SG[:,1]
+            elif xmax < self.MC[0]:
+                SG_cc = sigma_ou*self.SG[:,0]
+            else:
+                SG_cc = sg_zeros(self.SG)
+            SG = sg_hstack(SG_cv, SG_cc)
+            
+            return MCSGPy(IA, MC, SG)
             
     def __mul__(self, MCSGPy2):
         '''
@@ -447,7 +563,7 @@ class MCSGPy:
             return MCSGPy(
                 np.asarray([v1, v2]),
                 np.asarray([cc, cv]),
-                np.asmatrix(np.column_stack([SG_cc, SG_cv])))
+                sg_hstack(SG_cc, SG_cv))
 
 
         elif MCSGPy2>=0:
@@ -456,7 +572,7 @@ class MCSGPy:
         elif MCSGPy2<0:
             IA = MCSGPy2*swap_elements(np.copy(self.IA), 0, 1)
             MC = MCSGPy2*swap_elements(np.copy(self.MC), 0, 1)
-            SG = MCSGPy2*swap_columns(np.matrix.copy(self.SG), 0, 1)
+            SG = MCSGPy2*swap_columns(self.SG, 0, 1)
             return MCSGPy(IA, MC, SG)
         
         else:
@@ -495,9 +611,6 @@ def swap_elements(my_array, index1, index2):
     my_array = my_array[::-1]
     return my_array   
 
-def mid(a, b ,c):
-    return max(a, min(b,c))
-
 def log(self): 
     '''
     overloading log 
@@ -511,34 +624,34 @@ def log(self):
         xmax = self.IA[1]
         cv_arg = mid(self.MC[0],self.MC[1],xmin)
         cc_arg = mid(self.MC[0],self.MC[1],xmax)      
-        cv = max(IA[0],(math.log(self.IA[1])-math.log(self.IA[0]))/(self.IA[1]-self.IA[0])*(cv_arg-self.IA[0])+math.log(self.IA[0]))
+        slope = (math.log(self.IA[1])-math.log(self.IA[0]))/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else 1/self.IA[0]
+        cv = max(IA[0],slope*(cv_arg-self.IA[0])+math.log(self.IA[0]))
         cc = min(IA[1],math.log(cc_arg))
         MC = np.array([cv, cc])
         
-        sigma_uu = (math.log(self.IA[1])-math.log(self.IA[0]))/(self.IA[1]-self.IA[0])
+        sigma_uu = slope
         sigma_ou = 1/self.MC[0]
-        sigma_uo = (math.log(self.IA[1])-math.log(self.IA[0]))/(self.IA[1]-self.IA[0])
+        sigma_uo = slope
         sigma_oo = 1/self.MC[1]
 
-        n = len(self.SG[:,0])
-        if IA[0] > (math.log(self.IA[1])-math.log(self.IA[0]))/(self.IA[1]-self.IA[0])*(cv_arg-self.IA[0])+math.log(self.IA[0]):
-            SG_cv = np.zeros((n,1))
+        if IA[0] > slope*(cv_arg-self.IA[0])+math.log(self.IA[0]):
+            SG_cv = sg_zeros(self.SG)
         elif xmin > self.MC[1]:
             SG_cv = sigma_uo*self.SG[:,1]
         elif xmin <= self.MC[0]:
             SG_cv = sigma_uu*self.SG[:,0]
         else:
-            SG_cv = np.zeros((n,1))
+            SG_cv = sg_zeros(self.SG)
 
         if IA[1] < math.log(cc_arg):
-            SG_cc = np.zeros((n,1))
+            SG_cc = sg_zeros(self.SG)
         elif xmax >= self.MC[1]:
             SG_cc = sigma_oo*self.SG[:,1]
         elif xmax < self.MC[0]:
             SG_cc = sigma_ou*self.SG[:,0]
         else:
-            SG_cc = np.zeros((n,1))         
-        SG = np.asmatrix(np.hstack((SG_cv, SG_cc)))
+            SG_cc = sg_zeros(self.SG)         
+        SG = sg_hstack(SG_cv, SG_cc)
             
         return MCSGPy(IA, MC, SG)    
     
@@ -550,12 +663,16 @@ def log(self):
         xmax = self.IA[1]
         cv_arg = mid(self.MC[0],self.MC[1],xmin)
         cc_arg = mid(self.MC[0],self.MC[1],xmax)      
-        cv = max(IA[0],(math.log(self.IA[1])-math.log(self.IA[0]))/(self.IA[1]-self.IA[0])*(cv_arg-self.IA[0])+math.log(self.IA[0]))
+        slope = (math.log(self.IA[1])-math.log(self.IA[0]))/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else 1/self.IA[0]
+        cv = max(IA[0],slope*(cv_arg-self.IA[0])+math.log(self.IA[0]))
         cc = min(IA[1],math.log(cc_arg))
         MC = np.array([cv, cc])
         
         return MCPy(IA, MC)    
         
+    elif hasattr(self, 'log'):
+        return self.log()
+
     else:
         return math.log(self)
 
@@ -572,34 +689,34 @@ def sqrt(self):
         xmax = self.IA[1]
         cv_arg = mid(self.MC[0],self.MC[1],xmin)
         cc_arg = mid(self.MC[0],self.MC[1],xmax)
-        cv = max(IA[0],(math.sqrt(self.IA[1])-math.sqrt(self.IA[0]))/(self.IA[1]-self.IA[0])*(cv_arg-self.IA[0])+math.sqrt(self.IA[0]))
+        slope = (math.sqrt(self.IA[1])-math.sqrt(self.IA[0]))/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else (0.5/math.sqrt(self.IA[0]) if self.IA[0] > 0 else math.inf)
+        cv = max(IA[0],slope*(cv_arg-self.IA[0])+math.sqrt(self.IA[0]))
         cc = min(IA[1],math.sqrt(cc_arg))
         MC = np.array([cv, cc])
 
-        sigma_uu = (math.sqrt(self.IA[1])-math.sqrt(self.IA[0]))/(self.IA[1]-self.IA[0])
+        sigma_uu = slope
         sigma_ou = self.MC[0]**(-1/2)/2
-        sigma_uo = (math.sqrt(self.IA[1])-math.sqrt(self.IA[0]))/(self.IA[1]-self.IA[0])
+        sigma_uo = slope
         sigma_oo = self.MC[1]**(-1/2)/2
 
-        n = len(self.SG[:,0])
-        if IA[0] > (math.sqrt(self.IA[1])-math.sqrt(self.IA[0]))/(self.IA[1]-self.IA[0])*(cv_arg-self.IA[0])+math.sqrt(self.IA[0]):
-            SG_cv = np.zeros((n,1))
+        if IA[0] > slope*(cv_arg-self.IA[0])+math.sqrt(self.IA[0]):
+            SG_cv = sg_zeros(self.SG)
         elif xmin > self.MC[1]:
             SG_cv = sigma_uo*self.SG[:,1]
         elif xmin <= self.MC[0]:
             SG_cv = sigma_uu*self.SG[:,0]
         else:
-            SG_cv = np.zeros((n,1))        
+            SG_cv = sg_zeros(self.SG)        
 
         if IA[1] < math.sqrt(cc_arg):
-            SG_cc = np.zeros((n,1))
+            SG_cc = sg_zeros(self.SG)
         elif xmax >= self.MC[1]:
             SG_cc = sigma_oo*self.SG[:,1]
         elif xmax < self.MC[0]:
             SG_cc = sigma_ou*self.SG[:,0]
         else:
-            SG_cc = np.zeros((n,1))
-        SG = np.asmatrix(np.hstack((SG_cv, SG_cc)))
+            SG_cc = sg_zeros(self.SG)
+        SG = sg_hstack(SG_cv, SG_cc)
         return MCSGPy(IA, MC, SG) 
     
     
@@ -611,11 +728,15 @@ def sqrt(self):
         xmax = self.IA[1]
         cv_arg = mid(self.MC[0],self.MC[1],xmin)
         cc_arg = mid(self.MC[0],self.MC[1],xmax)
-        cv = max(IA[0],(math.sqrt(self.IA[1])-math.sqrt(self.IA[0]))/(self.IA[1]-self.IA[0])*(cv_arg-self.IA[0])+math.sqrt(self.IA[0]))
+        slope = (math.sqrt(self.IA[1])-math.sqrt(self.IA[0]))/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else (0.5/math.sqrt(self.IA[0]) if self.IA[0] > 0 else math.inf)
+        cv = max(IA[0],slope*(cv_arg-self.IA[0])+math.sqrt(self.IA[0]))
         cc = min(IA[1],math.sqrt(cc_arg))
         MC = np.array([cv, cc])
         return MCPy(IA, MC) 
         
+    elif hasattr(self, 'sqrt'):
+        return self.sqrt()
+
     else:
         return math.sqrt(self)
     
@@ -632,33 +753,33 @@ def exp(self):
         cv_arg = self.MC[0]
         cc_arg = self.MC[1]       
         cv = max(IA[0], math.exp(cv_arg))
-        cc = min(IA[1], (math.exp(self.IA[1])-math.exp(self.IA[0]))/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0])+math.exp(self.IA[0]))
+        slope = (math.exp(self.IA[1])-math.exp(self.IA[0]))/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else math.exp(self.IA[0])
+        cc = min(IA[1], slope*(cc_arg-self.IA[0])+math.exp(self.IA[0]))
         MC = np.array([cv, cc])
 
         sigma_uu = math.exp(self.MC[0])
-        sigma_ou = (math.exp(self.IA[1])-math.exp(self.IA[0]))/(self.IA[1]-self.IA[0])
+        sigma_ou = slope
         sigma_uo = math.exp(self.MC[1])
-        sigma_oo = (math.exp(self.IA[1])-math.exp(self.IA[0]))/(self.IA[1]-self.IA[0])
+        sigma_oo = slope
 
-        n = len(self.SG[:,0])
         if IA[0] > math.exp(cv_arg):
-            SG_cv = np.zeros((n,1))
+            SG_cv = sg_zeros(self.SG)
         elif xmin > self.MC[1]:
             SG_cv = sigma_uo*self.SG[:,1]
         elif xmin <= self.MC[0]:
             SG_cv = sigma_uu*self.SG[:,0]
         else:
-            SG_cv = np.zeros((n,1))        
+            SG_cv = sg_zeros(self.SG)        
 
-        if IA[1] < (math.exp(self.IA[1])-math.exp(self.IA[0]))/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0])+math.exp(self.IA[0]):
-            SG_cc = np.zeros((n,1))
+        if IA[1] < slope*(cc_arg-self.IA[0])+math.exp(self.IA[0]):
+            SG_cc = sg_zeros(self.SG)
         elif xmax >= self.MC[1]:
             SG_cc = sigma_oo*self.SG[:,1]
         elif xmax < self.MC[0]:
             SG_cc = sigma_ou*self.SG[:,0]
         else:
-            SG_cc = np.zeros((n,1))
-        SG = np.asmatrix(np.hstack((SG_cv, SG_cc)))
+            SG_cc = sg_zeros(self.SG)
+        SG = sg_hstack(SG_cv, SG_cc)
 
         return MCSGPy(IA, MC, SG) 
     
@@ -670,10 +791,14 @@ def exp(self):
         cv_arg = self.MC[0]
         cc_arg = self.MC[1]       
         cv = max(IA[0], math.exp(cv_arg))
-        cc = min(IA[1], (math.exp(self.IA[1])-math.exp(self.IA[0]))/(self.IA[1]-self.IA[0])*(cc_arg-self.IA[0])+math.exp(self.IA[0]))
+        slope = (math.exp(self.IA[1])-math.exp(self.IA[0]))/(self.IA[1]-self.IA[0]) if self.IA[1] != self.IA[0] else math.exp(self.IA[0])
+        cc = min(IA[1], slope*(cc_arg-self.IA[0])+math.exp(self.IA[0]))
         MC = np.array([cv, cc])
         
         return MCPy(IA, MC) 
     
+    elif hasattr(self, 'exp'):
+        return self.exp()
+
     else:
         return math.exp(self)
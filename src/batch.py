@@ -0,0 +1,430 @@
+import numpy as np
+import rules
+from MC import MCPy, MCSGPy
+from utility import vmin, vmax, vmid, eq_mul_batch, odd_power_envelopes_batch
+
+class MCBatchPy:
+    '''
+    MCBatchPy is the batched (struct-of-arrays) counterpart of MCPy/MCSGPy.
+    It holds the relaxations of N boxes/points at once and applies every McCormick rule
+    as a NumPy kernel over all N entries, so a grid of points costs a handful of array operations.
+    '''
+
+    def __init__(self, IA, MC, SG=None):
+        '''
+        Initialization:
+        MCBatchPy.IA
+        2-D numpy array of shape (2, N), rows [LB, UB].
+        MCBatchPy.MC
+        2-D numpy array of shape (2, N), rows [cv, cc].
+        MCBatchPy.SG
+        None or 3-D numpy array of shape (n, 2, N).
+        SG[:,0]/SG[:,1] are n-by-N blocks of subgradients for convex/concave relaxations.
+        '''
+
+        self.IA = np.asarray(IA, dtype=float)
+        self.MC = np.asarray(MC, dtype=float)
+        self.SG = None if SG is None else np.asarray(SG, dtype=float)
+
+    @property
+    def size(self):
+        '''
+        number of entries N in the batch
+        '''
+
+        return self.IA.shape[1]
+
+    def item(self, k):
+        '''
+        entry k of the batch as a scalar MCPy (or MCSGPy if subgradients are propagated)
+        '''
+
+        if self.SG is None:
+            return MCPy(self.IA[:,k].copy(), self.MC[:,k].copy())
+        return MCSGPy(self.IA[:,k].copy(), self.MC[:,k].copy(), np.asmatrix(self.SG[:,:,k]))
+
+    def __add__(self, MCBatchPy2):
+        '''
+        overloading addition operator
+        '''
+
+        if type(MCBatchPy2) == MCBatchPy:
+            IA = self.IA + MCBatchPy2.IA
+            MC = self.MC + MCBatchPy2.MC
+            if self.SG is None or MCBatchPy2.SG is None:
+                return MCBatchPy(IA, MC)
+            return MCBatchPy(IA, MC, self.SG + MCBatchPy2.SG)
+        else:
+            return MCBatchPy(self.IA + MCBatchPy2, self.MC + MCBatchPy2, self.SG)
+
+    def __radd__(self, MCBatchPy2):
+        '''
+        reverse overloading addition operator
+        '''
+
+        return self + MCBatchPy2
+
+    def __pos__(self):
+        '''
+        overloading pos operator
+        '''
+
+        return self
+
+    def __neg__(self):
+        '''
+        overloading neg operator
+        '''
+
+        return self * (-1)
+
+    def __sub__(self, MCBatchPy2):
+        '''
+        overloading subtraction operator
+        '''
+
+        if type(MCBatchPy2) == MCBatchPy:
+            return self + MCBatchPy2*(-1)
+        else:
+            return MCBatchPy(self.IA - MCBatchPy2, self.MC - MCBatchPy2, self.SG)
+
+    def __rsub__(self, MCBatchPy2):
+        '''
+        reverse overloading subtraction operator
+        '''
+
+        return self*(-1) + MCBatchPy2
+
+    def _negate_where(self, mask):
+        '''
+        multiply the entries selected by the boolean mask by -1
+        '''
+
+        IA = np.where(mask, -1*self.IA[::-1], self.IA)
+        MC = np.where(mask, -1*self.MC[::-1], self.MC)
+        SG = None if self.SG is None else np.where(mask, -1*self.SG[:, ::-1], self.SG)
+        return MCBatchPy(IA, MC, SG)
+
+    def __pow__(self, power):
+        '''
+        overloading interger power opertor
+        '''
+
+        kind = rules.power_kind(power)
+        if kind == 'even':
+            '''
+            overloading positive even interger power
+            '''
+
+            xmin = vmid(self.IA[0], self.IA[1], 0)
+            xmax = vmax(abs(self.IA[0]), abs(self.IA[1]))
+            LB = xmin**power
+            UB = vmax(self.IA[0]**power, self.IA[1]**power)
+            IA = np.array([LB, UB])
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope = np.where(self.IA[1] == self.IA[0], power*self.IA[0]**(power-1),
+                                 (self.IA[1]**power - self.IA[0]**power)/(self.IA[1]-self.IA[0]))
+                cv_arg = vmid(self.MC[0], self.MC[1], xmin)
+                cc_arg = vmid(self.MC[0], self.MC[1], xmax)
+                cv = vmax(LB, cv_arg**power)
+                cc = vmin(UB, self.IA[0]**power + slope*(cc_arg-self.IA[0]))
+                MC = np.array([cv, cc])
+
+                if self.SG is None:
+                    return MCBatchPy(IA, MC)
+
+                sigma_uu = power*self.MC[0]**(power-1)
+                sigma_uo = power*self.MC[1]**(power-1)
+                SG = _unary_sg(self,
+                               LB > cv_arg**power, xmin > self.MC[1], sigma_uo, xmin <= self.MC[0], sigma_uu,
+                               UB < self.MC[0]**power + slope*(cc_arg-self.MC[0]),
+                               xmax >= self.MC[1], slope, xmax < self.MC[0], slope)
+
+            return MCBatchPy(IA, MC, SG)
+
+        elif kind == 'inv':
+            '''
+            overloading **(-1)
+            '''
+
+            if np.any(self.IA[0]*self.IA[1] <= 0):
+                raise ValueError('1/x cannot contain domain 0')
+
+            #entries on a negative domain are mirrored to the positive domain and back
+            flag = self.IA[1] <= 0
+            x = self._negate_where(flag) if flag.any() else self
+
+            values = [1/x.IA[0], 1/x.IA[1]]
+            IA = np.array([vmin(*values), vmax(*values)])
+
+            xmin = x.IA[1]
+            xmax = x.IA[0]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope = np.where(x.IA[1] == x.IA[0], -1/x.IA[0]**2, (1/x.IA[1]-1/x.IA[0])/(x.IA[1]-x.IA[0]))
+                cv_arg = vmid(x.MC[0], x.MC[1], xmin)
+                cc_arg = vmid(x.MC[0], x.MC[1], xmax)
+                cc_val = slope*(cc_arg-x.IA[0])+1/x.IA[0]
+                cv = vmax(IA[0], 1/cv_arg)
+                cc = vmin(IA[1], cc_val)
+                MC = np.array([cv, cc])
+
+                SG = None
+                if x.SG is not None:
+                    sigma_uu = -1/x.MC[0]**2
+                    sigma_uo = -1/x.MC[1]**2
+                    SG = _unary_sg(x,
+                                   IA[0] > 1/cv_arg, xmin > x.MC[1], sigma_uo, xmin <= x.MC[0], sigma_uu,
+                                   IA[1] < cc_val, xmax >= x.MC[1], slope, xmax < x.MC[0], slope)
+
+            result = MCBatchPy(IA, MC, SG)
+            return result._negate_where(flag) if flag.any() else result
+
+        elif kind == 'one':
+            '''
+            overloading **1
+            '''
+            return self
+
+        elif kind == 'odd':
+            '''
+            overloading positive odd integer power, envelopes of utility.odd_power_envelopes
+            '''
+
+            IA = np.array([self.IA[0]**power, self.IA[1]**power])
+            t_cv, slope_cv, t_cc, slope_cc = odd_power_envelopes_batch(self.IA[0], self.IA[1], power)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cv_arg = vmid(self.MC[0], self.MC[1], self.IA[0])
+                cc_arg = vmid(self.MC[0], self.MC[1], self.IA[1])
+                cv_val = np.where(cv_arg > t_cv, cv_arg**power, IA[0] + slope_cv*(cv_arg-self.IA[0]))
+                cc_val = np.where(cc_arg < t_cc, cc_arg**power, IA[1] + slope_cc*(cc_arg-self.IA[1]))
+                MC = np.array([vmax(IA[0], cv_val), vmin(IA[1], cc_val)])
+
+                if self.SG is None:
+                    return MCBatchPy(IA, MC)
+
+                d_cv = power*self.MC[0]**(power-1)
+                d_cc = power*self.MC[1]**(power-1)
+                SG = _unary_sg(self,
+                               IA[0] > cv_val, self.IA[0] > self.MC[1], np.where(self.MC[1] > t_cv, d_cc, slope_cv),
+                               self.IA[0] <= self.MC[0], np.where(self.MC[0] > t_cv, d_cv, slope_cv),
+                               IA[1] < cc_val, self.IA[1] >= self.MC[1], np.where(self.MC[1] < t_cc, d_cc, slope_cc),
+                               self.IA[1] < self.MC[0], np.where(self.MC[0] < t_cc, d_cv, slope_cc))
+
+            return MCBatchPy(IA, MC, SG)
+
+        elif kind == 'negative':
+            '''
+            overloading negative interger power: convex and decreasing for x > 0; for x < 0 convex and
+            increasing if the power is even, concave and decreasing if it is odd
+            '''
+
+            if np.any(self.IA[0]*self.IA[1] <= 0):
+                raise ValueError('1/x cannot contain domain 0')
+
+            values = [self.IA[0]**power, self.IA[1]**power]
+            IA = np.array([vmin(*values), vmax(*values)])
+
+            convex = (self.IA[0] > 0) | (power % 2 == 0)
+            increasing = (self.IA[1] < 0) & (power % 2 == 0)
+            xmin = np.where(increasing, self.IA[0], self.IA[1])
+            xmax = np.where(increasing, self.IA[1], self.IA[0])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope = np.where(self.IA[1] == self.IA[0], power*self.IA[0]**(power-1), (values[1]-values[0])/(self.IA[1]-self.IA[0]))
+                cv_arg = vmid(self.MC[0], self.MC[1], xmin)
+                cc_arg = vmid(self.MC[0], self.MC[1], xmax)
+                cv_val = np.where(convex, cv_arg**power, values[0] + slope*(cv_arg-self.IA[0]))
+                cc_val = np.where(convex, values[0] + slope*(cc_arg-self.IA[0]), cc_arg**power)
+                MC = np.array([vmax(IA[0], cv_val), vmin(IA[1], cc_val)])
+
+                if self.SG is None:
+                    return MCBatchPy(IA, MC)
+
+                d_cv = power*self.MC[0]**(power-1)
+                d_cc = power*self.MC[1]**(power-1)
+                SG = _unary_sg(self,
+                               IA[0] > cv_val, xmin > self.MC[1], np.where(convex, d_cc, slope),
+                               xmin <= self.MC[0], np.where(convex, d_cv, slope),
+                               IA[1] < cc_val, xmax >= self.MC[1], np.where(convex, slope, d_cc),
+                               xmax < self.MC[0], np.where(convex, slope, d_cv))
+
+            return MCBatchPy(IA, MC, SG)
+
+    def __mul__(self, MCBatchPy2):
+        '''
+        overloading multiplication operator
+        '''
+
+        if type(MCBatchPy2) == MCBatchPy:
+
+            if self is MCBatchPy2:
+                return self**2
+
+            LB, UB, cv, cc, SG_cv, SG_cc = eq_mul_batch(
+                self.IA,
+                MCBatchPy2.IA,
+                self.MC,
+                MCBatchPy2.MC,
+                self.SG,
+                MCBatchPy2.SG)
+
+            SG = None if SG_cv is None else np.stack([SG_cv, SG_cc], axis=1)
+            return MCBatchPy(np.array([LB, UB]), np.array([cv, cc]), SG)
+
+        elif np.ndim(MCBatchPy2) == 0:
+            if MCBatchPy2 >= 0:
+                SG = None if self.SG is None else self.SG*MCBatchPy2
+                return MCBatchPy(self.IA*MCBatchPy2, self.MC*MCBatchPy2, SG)
+            elif MCBatchPy2 < 0:
+                SG = None if self.SG is None else MCBatchPy2*self.SG[:, ::-1]
+                return MCBatchPy(MCBatchPy2*self.IA[::-1], MCBatchPy2*self.MC[::-1], SG)
+            else:
+                raise ValueError('This rule is not defined yet.')
+
+        else:
+            #one scalar multiplier per entry of the batch
+            c = np.asarray(MCBatchPy2, dtype=float)
+            positive = c >= 0
+            IA = np.where(positive, self.IA*c, c*self.IA[::-1])
+            MC = np.where(positive, self.MC*c, c*self.MC[::-1])
+            SG = None if self.SG is None else np.where(positive, self.SG*c, c*self.SG[:, ::-1])
+            return MCBatchPy(IA, MC, SG)
+
+    def __rmul__(self, MCBatchPy2):
+        '''
+        reverse overloading of multiplication operator
+        '''
+        return self*MCBatchPy2
+
+    def __truediv__(self, MCBatchPy2):
+        '''
+        overloading division operator
+        '''
+        return self*MCBatchPy2**(-1)
+
+    def __rtruediv__(self, MCBatchPy2):
+        '''
+        reserve overloading division operator
+        '''
+        return self**(-1)*MCBatchPy2
+
+    def log(self):
+        '''
+        overloading log, called by MC.log
+        '''
+
+        if np.any(self.IA[0] <= 0):
+            raise ValueError('math domain error')
+
+        IA = np.log(self.IA)
+
+        xmin = self.IA[0]
+        xmax = self.IA[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(self.IA[1] == self.IA[0], 1/self.IA[0], (IA[1]-IA[0])/(self.IA[1]-self.IA[0]))
+            cv_arg = vmid(self.MC[0], self.MC[1], xmin)
+            cc_arg = vmid(self.MC[0], self.MC[1], xmax)
+            cv_val = slope*(cv_arg-self.IA[0])+IA[0]
+            cc_val = np.log(cc_arg)
+            MC = np.array([vmax(IA[0], cv_val), vmin(IA[1], cc_val)])
+
+            if self.SG is None:
+                return MCBatchPy(IA, MC)
+
+            SG = _unary_sg(self,
+                           IA[0] > cv_val, xmin > self.MC[1], slope, xmin <= self.MC[0], slope,
+                           IA[1] < cc_val, xmax >= self.MC[1], 1/self.MC[1], xmax < self.MC[0], 1/self.MC[0])
+
+        return MCBatchPy(IA, MC, SG)
+
+    def sqrt(self):
+        '''
+        overloading sqrt, called by MC.sqrt
+        '''
+
+        if np.any(self.IA[0] < 0):
+            raise ValueError('math domain error')
+
+        IA = np.sqrt(self.IA)
+
+        xmin = self.IA[0]
+        xmax = self.IA[1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(self.IA[1] == self.IA[0], 0.5/np.sqrt(self.IA[0]), (IA[1]-IA[0])/(self.IA[1]-self.IA[0]))
+            cv_arg = vmid(self.MC[0], self.MC[1], xmin)
+            cc_arg = vmid(self.MC[0], self.MC[1], xmax)
+            cv_val = slope*(cv_arg-self.IA[0])+IA[0]
+            cc_val = np.sqrt(cc_arg)
+            MC = np.array([vmax(IA[0], cv_val), vmin(IA[1], cc_val)])
+
+            if self.SG is None:
+                return MCBatchPy(IA, MC)
+
+            SG = _unary_sg(self,
+                           IA[0] > cv_val, xmin > self.MC[1], slope, xmin <= self.MC[0], slope,
+                           IA[1] < cc_val, xmax >= self.MC[1], self.MC[1]**(-1/2)/2,
+                           xmax < self.MC[0], self.MC[0]**(-1/2)/2)
+
+        return MCBatchPy(IA, MC, SG)
+
+    def exp(self):
+        '''
+        overloading exp, called by MC.exp
+        '''
+
+        IA = np.exp(self.IA)
+
+        xmin = self.IA[0]
+        xmax = self.IA[1]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            slope = np.where(self.IA[1] == self.IA[0], IA[0], (IA[1]-IA[0])/(self.IA[1]-self.IA[0]))
+            cv_val = np.exp(self.MC[0])
+            cc_val = slope*(self.MC[1]-self.IA[0])+IA[0]
+            MC = np.array([vmax(IA[0], cv_val), vmin(IA[1], cc_val)])
+
+            if self.SG is None:
+                return MCBatchPy(IA, MC)
+
+            SG = _unary_sg(self,
+                           IA[0] > cv_val, xmin > self.MC[1], np.exp(self.MC[1]), xmin <= self.MC[0], cv_val,
+                           IA[1] < cc_val, xmax >= self.MC[1], slope, xmax < self.MC[0], slope)
+
+        return MCBatchPy(IA, MC, SG)
+
+
+def _unary_sg(x, cv_zero, cv_uo, sigma_uo, cv_uu, sigma_uu, cc_zero, cc_oo, sigma_oo, cc_ou, sigma_ou):
+    '''
+    select the subgradients of a univariate rule entry by entry, following the branch order
+    used by MCSGPy (inactive relaxation, then the cc/cv column of the argument, else zero)
+    '''
+
+    SG_cv = np.where(cv_zero, 0.0,
+                     np.where(cv_uo, sigma_uo*x.SG[:,1], np.where(cv_uu, sigma_uu*x.SG[:,0], 0.0)))
+    SG_cc = np.where(cc_zero, 0.0,
+                     np.where(cc_oo, sigma_oo*x.SG[:,1], np.where(cc_ou, sigma_ou*x.SG[:,0], 0.0)))
+    return np.stack([SG_cv, SG_cc], axis=1)
+
+def variables(LB, UB, cv=None, cc=None, subgradient=True):
+    '''
+    build batched input variables x_1, ..., x_m from m-by-N arrays of bounds and relaxation points.
+    cv defaults to the box midpoints and cc defaults to cv.
+    With subgradient=True x_k carries the unit subgradient e_k in both columns (n = m),
+    as the variables in examples.ipynb do.
+    '''
+
+    LB = np.atleast_2d(np.asarray(LB, dtype=float))
+    UB = np.atleast_2d(np.asarray(UB, dtype=float))
+    LB, UB = np.broadcast_arrays(LB, UB)
+    cv = (LB + UB)/2 if cv is None else np.broadcast_to(np.asarray(cv, dtype=float), LB.shape)
+    cc = cv if cc is None else np.broadcast_to(np.asarray(cc, dtype=float), LB.shape)
+
+    m, N = LB.shape
+    result = []
+    for k in range(m):
+        SG = None
+        if subgradient:
+            SG = np.zeros((m, 2, N))
+            SG[k] = 1
+        result.append(MCBatchPy(np.array([LB[k], UB[k]]), np.array([cv[k], cc[k]]), SG))
+    return result
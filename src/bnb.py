@@ -0,0 +1,152 @@
+'''
+Spatial branch-and-bound for the global minimization of a factorable function over a box.
+
+Lower bounds come from the convex relaxation and its subgradient at the box midpoint:
+the affine cut cv(x0) + SG_cv*(x - x0) minimized over the box, together with the interval bound.
+Upper bounds are point evaluations at the box midpoints. Nodes are kept in a heap and selected
+best-bound first, bisected on the widest variable and pruned against the incumbent.
+'''
+
+import heapq
+import math
+import time
+import numpy as np
+from tape import Tape, trace
+from compiler import compile_tape
+
+class BnBResult:
+    '''
+    result of branch_and_bound
+    x                 best point found
+    upper             objective value at x (incumbent)
+    lower             global lower bound
+    nodes             number of evaluated nodes
+    time              wall time in seconds
+    nodes_per_second  node throughput
+    status            'optimal', 'node limit' or 'time limit'
+    '''
+
+    def __init__(self, x, upper, lower, nodes, time, status):
+        self.x = x
+        self.upper = upper
+        self.lower = lower
+        self.nodes = nodes
+        self.time = time
+        self.nodes_per_second = nodes/time if time > 0 else math.inf
+        self.status = status
+
+    def __repr__(self):
+        return 'BnBResult(status=%r, upper=%r, lower=%r, x=%s, nodes=%d, nodes_per_second=%.0f)' % (
+            self.status, self.upper, self.lower, np.array2string(self.x), self.nodes, self.nodes_per_second)
+
+
+class NodeBounder:
+    '''
+    lower and upper bounds of many boxes, with the compiled functions of a tape.
+    With vectorized=True all boxes of a call are evaluated in one batched pass.
+    '''
+
+    def __init__(self, tape, vectorized=False):
+        self.vectorized = vectorized
+        self.relaxation = compile_tape(tape, subgradient=True, vectorized=vectorized).function
+        self.value = compile_tape(tape, vectorized=vectorized).function
+
+    def __call__(self, LB, UB):
+        '''
+        LB/UB of shape (nvars, m); returns the lower bounds, the upper bounds and
+        the midpoints (nvars, m) at which the upper bounds were evaluated
+        '''
+
+        x0 = (LB + UB)/2
+        if self.vectorized:
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                lower, upper = self._bound(LB, UB, x0)
+            return np.broadcast_to(lower, LB.shape[1:]), np.broadcast_to(upper, LB.shape[1:]), x0
+
+        lower = np.empty(LB.shape[1])
+        upper = np.empty(LB.shape[1])
+        for c in range(LB.shape[1]):
+            lower[c], upper[c] = self._bound(LB[:,c].tolist(), UB[:,c].tolist(), x0[:,c].tolist())
+        return lower, upper, x0
+
+    def _bound(self, LB, UB, x0):
+        l, u, cv, cc, SG_cv, SG_cc = self.relaxation(LB, UB, x0, x0)
+        cut = cv
+        for k in range(len(x0)):
+            cut = cut + np.minimum(SG_cv[k]*(LB[k] - x0[k]), SG_cv[k]*(UB[k] - x0[k]))
+        return np.fmax(l, cut), self.value(x0, x0, x0, x0)[0]
+
+
+def branch_and_bound(fun, box, atol=1e-6, rtol=1e-6, max_nodes=100000, max_time=None, batch=1):
+    '''
+    minimize fun over box, a sequence of [LB, UB] per variable.
+    fun is a python function of the variables (written as for MCSGPy, see tape.trace) or a Tape.
+    The search stops once the best bound is within max(atol, rtol*|upper|) of the incumbent,
+    or at max_nodes/max_time.
+    batch is the number of nodes taken from the queue per iteration; their children are
+    evaluated together in one vectorized pass when batch > 1, which raises node throughput
+    for larger models.
+    '''
+
+    start = time.perf_counter()
+    box = np.array(box, dtype=float)
+    tape = fun if type(fun) == Tape else trace(fun, len(box))
+    bounder = NodeBounder(tape, vectorized=batch > 1)
+
+    lower, upper, points = bounder(box[:,0:1], box[:,1:2])
+    incumbent, x_best = float(upper[0]), points[:,0]
+    heap = [(float(lower[0]), 0, box[:,0], box[:,1])]
+    count = 1
+    nodes = 1
+    pruned = math.inf
+    status = 'optimal'
+
+    def tolerance():
+        return max(atol, rtol*abs(incumbent))
+
+    while heap:
+        if heap[0][0] >= incumbent - tolerance():
+            break
+        if nodes >= max_nodes:
+            status = 'node limit'
+            break
+        if max_time is not None and time.perf_counter() - start > max_time:
+            status = 'time limit'
+            break
+
+        LB, UB = [], []
+        while heap and len(LB) < 2*batch:
+            bound, _, lb, ub = heapq.heappop(heap)
+            if bound >= incumbent - tolerance():
+                pruned = min(pruned, bound)
+                continue
+            #bisection on the widest variable
+            k = np.argmax(ub - lb)
+            middle = (lb[k] + ub[k])/2
+            left_ub = ub.copy()
+            left_ub[k] = middle
+            right_lb = lb.copy()
+            right_lb[k] = middle
+            LB += [lb, right_lb]
+            UB += [left_ub, ub]
+        if not LB:
+            break
+
+        LB = np.array(LB).T
+        UB = np.array(UB).T
+        lower, upper, points = bounder(LB, UB)
+        nodes += LB.shape[1]
+
+        best = np.argmin(upper)
+        if upper[best] < incumbent:
+            incumbent, x_best = float(upper[best]), points[:,best]
+
+        for c in range(LB.shape[1]):
+            if lower[c] < incumbent - tolerance():
+                heapq.heappush(heap, (float(lower[c]), count, LB[:,c], UB[:,c]))
+                count += 1
+            else:
+                pruned = min(pruned, float(lower[c]))
+
+    lower = min(heap[0][0] if heap else math.inf, pruned, incumbent)
+    return BnBResult(x_best, incumbent, lower, nodes, time.perf_counter() - start, status)
@@ -0,0 +1,205 @@
+'''
+Memoization of relaxation results, keyed by expression, boxes and relaxation points.
+
+A RelaxationCache maps (expression identity, IA and MC of every argument) to the MCPy/MCSGPy
+result, in a size-bounded LRU table. A repeated evaluation, e.g. a parent node evaluated again
+in branch-and-bound, returns the stored result, subgradients included, without running the
+McCormick rules. With tol > 0 the bounds and points are compared on a grid of spacing tol: a hit
+may then return the result of a nearby box/point (each value within about tol of the requested one),
+which is in general not a valid relaxation of the requested box, so tol > 0 is for heuristics
+(e.g. screening or warm starts), not for bounds that must be rigorous.
+Arguments with a nan bound or point never match a key; they are evaluated without the cache.
+'''
+
+import math
+from collections import OrderedDict
+from copy import deepcopy
+import numpy as np
+from MC import MCPy, MCSGPy
+from batch import MCBatchPy
+from mcarray import MCArray
+from sparse import SparseSG
+from tape import Tape
+
+class Uncacheable(Exception):
+    '''
+    raised internally for an argument with a nan value, whose key would never match
+    '''
+
+class RelaxationCache:
+    '''
+    size-bounded LRU cache of relaxation results.
+    RelaxationCache.hits/misses/evictions count the lookups since the last clear().
+    '''
+
+    def __init__(self, maxsize=1024, tol=0.0):
+        '''
+        Initialization:
+        maxsize  number of results kept, the least recently used one is evicted first
+        tol      grid spacing of the IA/MC keys, 0 for exact matches. With tol > 0 the IA/MC that round
+                 to the same grid points share one entry, and the result returned was computed on the
+                 first of them: not a rigorous relaxation of the others.
+        '''
+
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive')
+        if tol < 0:
+            raise ValueError('tol must be nonnegative')
+        self.maxsize = maxsize
+        self.tol = tol
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits/lookups if lookups else 0.0
+
+    def __repr__(self):
+        return 'RelaxationCache(size=%d/%d, hits=%d, misses=%d, evictions=%d, hit_rate=%.3f)' % (
+            len(self), self.maxsize, self.hits, self.misses, self.evictions, self.hit_rate)
+
+    def key(self, expression, args):
+        '''
+        (expression identity, per-argument IA/MC/SG): a tape is identified by its structure (Tape.digest),
+        any other callable by itself
+        '''
+
+        identity = expression.digest() if type(expression) == Tape else expression
+        return (identity,) + tuple(self.argument_key(x) for x in args)
+
+    def argument_key(self, x):
+        '''
+        hashable key of one argument: IA/MC rounded to the grid, SG compared exactly (usually seeds).
+        Relaxations of any shape (MCPy, MCSGPy, MCBatchPy, MCArray), numbers and numeric arrays are supported.
+        '''
+
+        if type(x) == MCSGPy:
+            SG = x.SG.toarray() if type(x.SG) == SparseSG else np.asarray(x.SG, dtype=float)
+            return (self.quantize(x.IA), self.quantize(x.MC), SG.shape, SG.tobytes())
+        elif type(x) == MCPy:
+            return (self.quantize(x.IA), self.quantize(x.MC))
+        elif hasattr(x, 'IA') and hasattr(x, 'MC'):
+            SG = getattr(x, 'SG', None)
+            SG_key = None if SG is None else (np.shape(SG), np.asarray(SG, dtype=float).tobytes())
+            return (type(x).__name__, np.shape(x.IA), self.quantize(x.IA), self.quantize(x.MC), SG_key)
+        try:
+            values = np.asarray(x, dtype=float)
+        except (TypeError, ValueError):
+            raise TypeError('cannot cache an argument of type %s: relaxations, numbers and numeric arrays are supported'
+                            % type(x).__name__) from None
+        if values.ndim == 0:
+            if math.isnan(values):
+                raise Uncacheable()
+            return float(values)
+        return (values.shape, self.quantize(values))
+
+    def quantize(self, values):
+        values = np.asarray(values, dtype=float).ravel().tolist()
+        if any(math.isnan(v) for v in values):
+            raise Uncacheable()
+        if self.tol == 0:
+            return tuple(values)
+        return tuple(round(v/self.tol) if math.isfinite(v) else v for v in values)
+
+    def get(self, key):
+        '''
+        stored result of key (marked as most recently used), or None
+        '''
+
+        result = self.table.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.table.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self.table[key] = result
+        self.table.move_to_end(key)
+        if len(self.table) > self.maxsize:
+            self.table.popitem(last=False)
+            self.evictions += 1
+
+    def __call__(self, expression, *args):
+        '''
+        expression(*args) from the cache, evaluated and stored on a miss.
+        The result is a copy, so changing it does not change the stored entry.
+        '''
+
+        try:
+            key = self.key(expression, args)
+        except Uncacheable:
+            self.misses += 1
+            return expression(*args)
+        result = self.get(key)
+        if result is None:
+            result = expression(*args)
+            self.put(key, result)
+        return copy(result)
+
+    def evaluate(self, tape, IA, MC, SG=None):
+        '''
+        cached Tape.evaluate(IA, MC, SG), with IA/MC given per input variable
+        '''
+
+        SG_key = None if SG is None else (np.shape(SG), np.asarray(SG, dtype=float).tobytes())
+        try:
+            key = ('evaluate', tape.digest(), self.quantize(np.ravel(IA)), self.quantize(np.ravel(MC)), SG_key)
+        except Uncacheable:
+            self.misses += 1
+            return tape.evaluate(IA, MC, SG)
+        result = self.get(key)
+        if result is None:
+            result = tape.evaluate(IA, MC, SG)
+            self.put(key, result)
+        return copy(result)
+
+    def clear(self):
+        self.table.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+def cached(fun, maxsize=1024, tol=0.0):
+    '''
+    fun(*args) memoized in its own RelaxationCache, available as the cache attribute, e.g.
+
+        f = cached(lambda x1, x2: x1*exp(x2))
+        f(x1, x2); f(x1, x2)
+        f.cache.hits  # 1
+    '''
+
+    cache = RelaxationCache(maxsize, tol)
+
+    def wrapper(*args):
+        return cache(fun, *args)
+
+    wrapper.cache = cache
+    wrapper.__wrapped__ = fun
+    wrapper.__doc__ = fun.__doc__
+    return wrapper
+
+def copy(result):
+    '''
+    new relaxation object with copies of the stored arrays (MCPy, MCSGPy, MCBatchPy, MCArray),
+    a deep copy of any other result
+    '''
+
+    if type(result) == MCSGPy:
+        #SparseSG operations never work in place, it is shared
+        SG = result.SG if type(result.SG) == SparseSG else result.SG.copy()
+        return MCSGPy(result.IA.copy(), result.MC.copy(), SG)
+    elif type(result) == MCPy:
+        return MCPy(result.IA.copy(), result.MC.copy())
+    elif type(result) == MCBatchPy:
+        return MCBatchPy(result.IA.copy(), result.MC.copy(), None if result.SG is None else result.SG.copy())
+    elif type(result) == MCArray:
+        return MCArray(result.IA.copy(), result.MC.copy(), None if result.SG is None else result.SG.copy(),
+                       result.labels.copy())
+    return deepcopy(result)
@@ -0,0 +1,508 @@
+'''
+Compilation of recorded tapes to specialized straight-line python functions.
+
+The McCormick rules of MC.py/utility.py are inlined node by node into generated source,
+either on floats (scalar, with if/elif branches) or on numpy arrays over a batch (vectorized,
+with np.where selections), so evaluation allocates no relaxation object per intermediate.
+Subgradients are obtained by an inlined reverse sweep over the recorded branch coefficients.
+Compiled functions are cached by the structural hash of the tape (Tape.digest).
+'''
+
+import math
+import numpy as np
+import rules
+from MC import MCPy, MCSGPy
+from batch import MCBatchPy
+from utility import vmin, vmax, odd_power_envelopes, odd_power_envelopes_batch
+from tape import trace, VAR, ADD, ADDC, MULC, MUL, POW, INV, EXP, LOG, SQRT
+
+_cache = {}
+
+class CompiledTape:
+    '''
+    CompiledTape holds the generated source and function of a tape.
+    CompiledTape.function(LB, UB, CV, CC) takes one entry per input variable in every argument
+    (floats, or arrays of shape (N,) if vectorized) and returns (LB, UB, cv, cc) of the output,
+    followed by the per-variable subgradient tuples (SG_cv, SG_cc) if compiled with subgradients
+    (unit seeds, n = nvars). Calling the object wraps inputs and results as MCPy/MCSGPy/MCBatchPy.
+    '''
+
+    def __init__(self, tape, subgradient=False, vectorized=False):
+        self.nvars = tape.nvars
+        self.digest = tape.digest()
+        self.subgradient = subgradient
+        self.vectorized = vectorized
+        self.source = generate(tape, subgradient, vectorized)
+        namespace = {'inf': math.inf, 'np': np}
+        if vectorized:
+            namespace.update(min=vmin, max=vmax, exp=np.exp, log=np.log, sqrt=np.sqrt,
+                             odd_envelopes=odd_power_envelopes_batch)
+        else:
+            namespace.update(exp=math.exp, log=math.log, sqrt=math.sqrt, odd_envelopes=odd_power_envelopes)
+        exec(compile(self.source, '<compiled %s>' % self.digest[:12], 'exec'), namespace)
+        self.function = namespace['relaxation']
+
+    def __call__(self, IA, MC):
+        '''
+        evaluate on IA/MC given per input variable: shape (nvars, 2) for scalar functions,
+        (nvars, 2, N) for vectorized ones
+        '''
+
+        if self.vectorized:
+            IA = np.asarray(IA, dtype=float)
+            MC = np.asarray(MC, dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                result = self.function(IA[:,0], IA[:,1], MC[:,0], MC[:,1])
+            N = IA.shape[2]
+            values = [np.broadcast_to(value, (N,)) for value in result[:4]]
+            SG = None
+            if self.subgradient:
+                #entries of the inputs the output does not depend on are the scalar 0
+                SG = np.stack([[np.broadcast_to(entry, (N,)) for entry in result[4]],
+                               [np.broadcast_to(entry, (N,)) for entry in result[5]]], axis=1).astype(float)
+            return MCBatchPy(values[:2], values[2:], SG)
+
+        LB = [float(x[0]) for x in IA]
+        UB = [float(x[1]) for x in IA]
+        CV = [float(x[0]) for x in MC]
+        CC = [float(x[1]) for x in MC]
+        result = self.function(LB, UB, CV, CC)
+        if not self.subgradient:
+            return MCPy(np.array(result[:2]), np.array(result[2:4]))
+        return MCSGPy(np.array(result[:2]), np.array(result[2:4]),
+                      np.asmatrix(np.column_stack([result[4], result[5]])))
+
+
+def compile_tape(tape, subgradient=False, vectorized=False):
+    '''
+    compiled function of a tape, generated once per structure and taken from the cache afterwards
+    '''
+
+    key = (tape.digest(), subgradient, vectorized)
+    if key not in _cache:
+        _cache[key] = CompiledTape(tape, subgradient, vectorized)
+    return _cache[key]
+
+def compile_function(fun, nvars, subgradient=False, vectorized=False):
+    '''
+    trace fun(x_1, ..., x_nvars) and compile it, see compile_tape
+    '''
+
+    return compile_tape(trace(fun, nvars), subgradient, vectorized)
+
+def clear_cache():
+    _cache.clear()
+
+def literal(c):
+    '''
+    python source of a constant
+    '''
+
+    if isinstance(c, (int, np.integer)):
+        return repr(int(c))
+    c = float(c)
+    if math.isfinite(c):
+        return repr(c)
+    return "float('%r')" % c
+
+
+class _Writer:
+    '''
+    accumulates the lines of the generated function
+    '''
+
+    def __init__(self, vectorized):
+        self.vectorized = vectorized
+        self.lines = []
+        self.indent = 1
+
+    def __call__(self, line):
+        self.lines.append('    '*self.indent + line)
+
+    def secant(self, f_lb, f_ub, lb, ub, derivative):
+        '''
+        source of the secant slope, the derivative at lb on a degenerate interval lb == ub
+        '''
+
+        if self.vectorized:
+            return 'np.where(%s == %s, %s, (%s - %s)/(%s - %s))' % (ub, lb, derivative, f_ub, f_lb, ub, lb)
+        return '((%s - %s)/(%s - %s) if %s != %s else %s)' % (f_ub, f_lb, ub, lb, ub, lb, derivative)
+
+    def select(self, targets, cases, default):
+        '''
+        assign targets the values of the first case whose condition holds, else default
+        '''
+
+        if self.vectorized:
+            conditions = []
+            for n, (condition, values) in enumerate(cases):
+                name = '%s_c%d' % (targets[0], n)
+                self('%s = %s' % (name, condition))
+                conditions.append(name)
+            for t, target in enumerate(targets):
+                expression = default[t]
+                for n in range(len(cases)-1, -1, -1):
+                    expression = 'np.where(%s, %s, %s)' % (conditions[n], cases[n][1][t], expression)
+                self('%s = %s' % (target, expression))
+            return
+
+        for n, (condition, values) in enumerate(cases):
+            self(('if %s:' if n == 0 else 'elif %s:') % condition)
+            self.indent += 1
+            for target, value in zip(targets, values):
+                self('%s = %s' % (target, value))
+            self.indent -= 1
+        self('else:')
+        self.indent += 1
+        for target, value in zip(targets, default):
+            self('%s = %s' % (target, value))
+        self.indent -= 1
+
+    def check(self, condition, message):
+        '''
+        raise ValueError if the condition holds (for any entry of a batch)
+        '''
+
+        if self.vectorized:
+            self('if np.any(%s):' % condition)
+        else:
+            self('if %s:' % condition)
+        self("    raise ValueError('%s')" % message)
+
+
+def generate(tape, subgradient=False, vectorized=False):
+    '''
+    python source of the function relaxation(LB, UB, CV, CC) evaluating the tape
+    '''
+
+    w = _Writer(vectorized)
+    ops, args, consts = tape.ops, tape.args, tape.consts
+
+    #only nodes the output depends on are emitted
+    needed = [False]*len(ops)
+    needed[tape.output] = True
+    for k in range(tape.output, -1, -1):
+        if needed[k] and ops[k] != VAR:
+            for a in args[k]:
+                if a >= 0:
+                    needed[a] = True
+
+    for k in range(tape.output+1):
+        if needed[k]:
+            _emit_rule(w, k, ops[k], args[k][0], args[k][1], consts[k], subgradient)
+
+    o = tape.output
+    if not subgradient:
+        w('return l%d, u%d, a%d, c%d' % (o, o, o, o))
+        return 'def relaxation(LB, UB, CV, CC):\n' + '\n'.join(w.lines) + '\n'
+
+    #reverse sweep: d{k}_0..3 is the map d[cv, cc](output)/d[cv, cc](node k)
+    w('d%d_0 = 1.0; d%d_1 = 0.0; d%d_2 = 0.0; d%d_3 = 1.0' % (o, o, o, o))
+    assigned = set([o])
+    seeds = {}
+    def accumulate(target, expressions):
+        for n, expression in enumerate(expressions):
+            if target in assigned:
+                w('%s_%d = %s_%d + %s' % (target, n, target, n, expression))
+            else:
+                w('%s_%d = %s' % (target, n, expression))
+        assigned.add(target)
+
+    for k in range(o, -1, -1):
+        if not needed[k]:
+            continue
+        op, (i, j), c = ops[k], args[k], consts[k]
+        d = ['d%d_%d' % (k, n) for n in range(4)]
+        if op == VAR:
+            seeds.setdefault(i, []).append(k)
+        elif op == ADD:
+            accumulate('d%d' % i, d)
+            accumulate('d%d' % j, d)
+        elif op == ADDC:
+            accumulate('d%d' % i, d)
+        elif op == MULC:
+            c = literal(c)
+            if float(c) >= 0:
+                accumulate('d%d' % i, ['%s*%s' % (x, c) for x in d])
+            else:
+                accumulate('d%d' % i, ['%s*%s' % (d[1], c), '%s*%s' % (d[0], c), '%s*%s' % (d[3], c), '%s*%s' % (d[2], c)])
+        else:
+            accumulate('d%d' % i, _compose(d, ['x%d_%d' % (k, n) for n in range(4)]))
+            if op == MUL:
+                accumulate('d%d' % j, _compose(d, ['y%d_%d' % (k, n) for n in range(4)]))
+
+    SG_cv, SG_cc = [], []
+    for v in range(tape.nvars):
+        nodes = seeds.get(v, [])
+        SG_cv.append(' + '.join('d%d_0 + d%d_1' % (k, k) for k in nodes) or '0.0')
+        SG_cc.append(' + '.join('d%d_2 + d%d_3' % (k, k) for k in nodes) or '0.0')
+    w('return l%d, u%d, a%d, c%d, (%s,), (%s,)' % (o, o, o, o, ', '.join(SG_cv), ', '.join(SG_cc)))
+    return 'def relaxation(LB, UB, CV, CC):\n' + '\n'.join(w.lines) + '\n'
+
+def _compose(A, J):
+    '''
+    source of the 2-by-2 map product A*J
+    '''
+
+    return ['%s*%s + %s*%s' % (A[0], J[0], A[1], J[2]), '%s*%s + %s*%s' % (A[0], J[1], A[1], J[3]),
+            '%s*%s + %s*%s' % (A[2], J[0], A[3], J[2]), '%s*%s + %s*%s' % (A[2], J[1], A[3], J[3])]
+
+def _emit_rule(w, k, op, i, j, c, subgradient):
+    '''
+    inline the rule of node k; l/u/a/c are LB/UB/cv/cc, x/y the subgradient maps of the operands
+    '''
+
+    l, u, a, cc = 'l%d' % i, 'u%d' % i, 'a%d' % i, 'c%d' % i
+    L, U, A, C = 'l%d' % k, 'u%d' % k, 'a%d' % k, 'c%d' % k
+    x = ['x%d_%d' % (k, n) for n in range(4)]
+
+    if op == VAR:
+        w('%s = LB[%d]; %s = UB[%d]; %s = CV[%d]; %s = CC[%d]' % (L, i, U, i, A, i, C, i))
+
+    elif op == ADD:
+        l2, u2, a2, c2 = 'l%d' % j, 'u%d' % j, 'a%d' % j, 'c%d' % j
+        w('%s = %s + %s; %s = %s + %s; %s = %s + %s; %s = %s + %s' % (L, l, l2, U, u, u2, A, a, a2, C, cc, c2))
+
+    elif op == ADDC:
+        c = literal(c)
+        w('%s = %s + %s; %s = %s + %s; %s = %s + %s; %s = %s + %s' % (L, l, c, U, u, c, A, a, c, C, cc, c))
+
+    elif op == MULC:
+        positive = float(c) >= 0
+        c = literal(c)
+        if positive:
+            w('%s = %s*%s; %s = %s*%s; %s = %s*%s; %s = %s*%s' % (L, l, c, U, u, c, A, a, c, C, cc, c))
+        else:
+            #swap_elements: bounds and relaxations reverse for a negative scalar
+            w('%s = %s*%s; %s = %s*%s; %s = %s*%s; %s = %s*%s' % (L, c, u, U, c, l, A, c, cc, C, c, a))
+
+    elif op == MUL:
+        _emit_mul(w, k, i, j, subgradient)
+
+    elif op == POW:
+        kind = rules.power_kind(c)
+        if kind == 'even':
+            _emit_pow_even(w, k, i, c, subgradient)
+        elif kind == 'odd':
+            _emit_pow_odd(w, k, i, c, subgradient)
+        elif kind == 'negative':
+            _emit_pow_neg(w, k, i, c, subgradient)
+        else:
+            #tape.py records **(-1) as INV and **1 as its operand
+            raise ValueError('This power rule is not supported yet.')
+
+    elif op == INV:
+        _emit_inv(w, k, i, subgradient)
+
+    elif op in (EXP, LOG, SQRT):
+        f = {EXP: 'exp', LOG: 'log', SQRT: 'sqrt'}[op]
+        s, cvv, ccv = 's%d' % k, 'cvv%d' % k, 'ccv%d' % k
+        if op == LOG:
+            w.check('%s <= 0' % l, 'math domain error')
+        elif op == SQRT:
+            w.check('%s < 0' % l, 'math domain error')
+        w('%s = %s(%s); %s = %s(%s)' % (L, f, l, U, f, u))
+        #the derivative of sqrt at 0 is inf, as 0.5/0 on arrays
+        sqrt_derivative = '0.5/%s' % L if w.vectorized else '(0.5/%s if %s > 0 else inf)' % (L, L)
+        w('%s = %s' % (s, w.secant(L, U, l, u, {EXP: L, LOG: '1/%s' % l, SQRT: sqrt_derivative}[op])))
+        if op == EXP:
+            #exp is increasing: cv at MC[0], cc at MC[1]
+            w('%s = exp(%s); %s = %s*(%s - %s) + %s' % (cvv, a, ccv, s, cc, l, L))
+            sigma_uo, sigma_uu = 'exp(%s)' % cc, cvv
+            sigma_oo, sigma_ou = s, s
+        else:
+            w('ca%d = max(%s, min(%s, %s)); cb%d = max(%s, min(%s, %s))' % (k, a, cc, l, k, a, cc, u))
+            w('%s = %s*(ca%d - %s) + %s; %s = %s(cb%d)' % (cvv, s, k, l, L, ccv, f, k))
+            sigma_uo, sigma_uu = s, s
+            if op == LOG:
+                sigma_oo, sigma_ou = '1/%s' % cc, '1/%s' % a
+            else:
+                sigma_oo, sigma_ou = '%s**(-0.5)/2' % cc, '%s**(-0.5)/2' % a
+        w('%s = max(%s, %s); %s = min(%s, %s)' % (A, L, cvv, C, U, ccv))
+        if subgradient:
+            w.select(x[:2], [('%s > %s' % (L, cvv), ('0.0', '0.0')),
+                             ('%s > %s' % (l, cc), ('0.0', sigma_uo)),
+                             ('%s <= %s' % (l, a), (sigma_uu, '0.0'))], ('0.0', '0.0'))
+            w.select(x[2:], [('%s < %s' % (U, ccv), ('0.0', '0.0')),
+                             ('%s >= %s' % (u, cc), ('0.0', sigma_oo)),
+                             ('%s < %s' % (u, a), (sigma_ou, '0.0'))], ('0.0', '0.0'))
+
+def _emit_mul(w, k, i, j, subgradient):
+    '''
+    inline eq_mul for node k = node i * node j
+    '''
+
+    l1, u1, a1, c1 = 'l%d' % i, 'u%d' % i, 'a%d' % i, 'c%d' % i
+    l2, u2, a2, c2 = 'l%d' % j, 'u%d' % j, 'a%d' % j, 'c%d' % j
+    L, U, A, C = 'l%d' % k, 'u%d' % k, 'a%d' % k, 'c%d' % k
+    t = ['t%d_%d' % (k, n) for n in range(4)]
+    al, be, ga, de = 'al%d' % k, 'be%d' % k, 'ga%d' % k, 'de%d' % k
+
+    w('%s = %s*%s; %s = %s*%s; %s = %s*%s; %s = %s*%s' % (t[0], l1, l2, t[1], l1, u2, t[2], u1, l2, t[3], u1, u2))
+    w('%s = min(%s, %s, %s, %s); %s = max(%s, %s, %s, %s)' % (L, t[0], t[1], t[2], t[3], U, t[0], t[1], t[2], t[3]))
+    w('%s = min(%s*%s, %s*%s) + min(%s*%s, %s*%s) - %s' % (al, l2, a1, l2, c1, l1, a2, l1, c2, t[0]))
+    w('%s = min(%s*%s, %s*%s) + min(%s*%s, %s*%s) - %s' % (be, u2, a1, u2, c1, u1, a2, u1, c2, t[3]))
+    w('%s = max(%s*%s, %s*%s) + max(%s*%s, %s*%s) - %s' % (ga, l2, a1, l2, c1, u1, a2, u1, c2, t[2]))
+    w('%s = max(%s*%s, %s*%s) + max(%s*%s, %s*%s) - %s' % (de, u2, a1, u2, c1, l1, a2, l1, c2, t[1]))
+    w('%s = max(%s, max(%s, %s)); %s = min(%s, min(%s, %s))' % (A, L, al, be, C, U, ga, de))
+    if not subgradient:
+        return
+
+    x = ['x%d_%d' % (k, n) for n in range(4)]
+    y = ['y%d_%d' % (k, n) for n in range(4)]
+    #a nonnegative multiplier takes column 0 in the cv row and column 1 in the cc row
+    def first(v):
+        return '%s if %s >= 0 else 0.0' % (v, v) if not w.vectorized else 'np.where(%s >= 0, %s, 0.0)' % (v, v)
+    def second(v):
+        return '0.0 if %s >= 0 else %s' % (v, v) if not w.vectorized else 'np.where(%s >= 0, 0.0, %s)' % (v, v)
+    def wrap(v):
+        return v if w.vectorized else '(%s)' % v
+
+    w.select([x[0], x[1], y[0], y[1]],
+             [('%s > max(%s, %s)' % (L, al, be), ('0.0',)*4),
+              ('%s >= %s' % (al, be), (wrap(first(l2)), wrap(second(l2)), wrap(first(l1)), wrap(second(l1))))],
+             (wrap(first(u2)), wrap(second(u2)), wrap(first(u1)), wrap(second(u1))))
+    w.select([x[2], x[3], y[2], y[3]],
+             [('%s < min(%s, %s)' % (U, ga, de), ('0.0',)*4),
+              ('%s <= %s' % (ga, de), (wrap(second(l2)), wrap(first(l2)), wrap(second(u1)), wrap(first(u1))))],
+             (wrap(second(u2)), wrap(first(u2)), wrap(second(l1)), wrap(first(l1))))
+
+def _emit_inv(w, k, i, subgradient):
+    '''
+    inline **(-1) for node k; a negative domain is mirrored to the positive one and back
+    '''
+
+    l, u, a, cc = 'l%d' % i, 'u%d' % i, 'a%d' % i, 'c%d' % i
+    L, U, A, C = 'l%d' % k, 'u%d' % k, 'a%d' % k, 'c%d' % k
+    f = 'f%d' % k
+    v = ['v%d_%d' % (k, n) for n in range(4)]
+    r = ['r%d_%d' % (k, n) for n in range(4)]
+    j = ['j%d_%d' % (k, n) for n in range(4)]
+    x = ['x%d_%d' % (k, n) for n in range(4)]
+
+    w.check('%s*%s <= 0' % (l, u), '1/x cannot contain domain 0')
+    w('%s = %s <= 0' % (f, u))
+    w.select(v, [(f, ('-1*%s' % u, '-1*%s' % l, '-1*%s' % cc, '-1*%s' % a))], (l, u, a, cc))
+
+    il, iu, s = 'il%d' % k, 'iu%d' % k, 's%d' % k
+    w('%s = 1/%s; %s = 1/%s' % (il, v[0], iu, v[1]))
+    w('%s = min(%s, %s); %s = max(%s, %s)' % (r[0], il, iu, r[1], il, iu))
+    w('%s = %s' % (s, w.secant(il, iu, v[0], v[1], '-1/%s**2' % v[0])))
+    #xmin = UB, xmax = LB on the positive domain
+    w('ca%d = max(%s, min(%s, %s)); cb%d = max(%s, min(%s, %s))' % (k, v[2], v[3], v[1], k, v[2], v[3], v[0]))
+    w('ccv%d = %s*(cb%d - %s) + %s' % (k, s, k, v[0], il))
+    w('%s = max(%s, 1/ca%d); %s = min(%s, ccv%d)' % (r[2], r[0], k, r[3], r[1], k))
+    w.select([L, U, A, C], [(f, ('-1*%s' % r[1], '-1*%s' % r[0], '-1*%s' % r[3], '-1*%s' % r[2]))], tuple(r))
+    if not subgradient:
+        return
+
+    w.select(j[:2], [('%s > 1/ca%d' % (r[0], k), ('0.0', '0.0')),
+                     ('%s > %s' % (v[1], v[3]), ('0.0', '-1/%s**2' % v[3])),
+                     ('%s <= %s' % (v[1], v[2]), ('-1/%s**2' % v[2], '0.0'))], ('0.0', '0.0'))
+    w.select(j[2:], [('%s < ccv%d' % (r[1], k), ('0.0', '0.0')),
+                     ('%s >= %s' % (v[0], v[3]), ('0.0', s)),
+                     ('%s < %s' % (v[0], v[2]), (s, '0.0'))], ('0.0', '0.0'))
+    #mirroring on both sides maps (a, b, c, d) to (d, c, b, a)
+    w.select(x, [(f, (j[3], j[2], j[1], j[0]))], tuple(j))
+
+def _emit_pow_even(w, k, i, c, subgradient):
+    '''
+    inline the positive even power rule for node k = node i**c
+    '''
+
+    l, u, a, cc = 'l%d' % i, 'u%d' % i, 'a%d' % i, 'c%d' % i
+    L, U, A, C = 'l%d' % k, 'u%d' % k, 'a%d' % k, 'c%d' % k
+    x = ['x%d_%d' % (k, n) for n in range(4)]
+    p = literal(c)
+    m, M, s, q, ca, cb = ['%s%d' % (name, k) for name in ('m', 'M', 's', 'q', 'ca', 'cb')]
+    w('%s = max(%s, min(%s, 0.0)); %s = max(abs(%s), abs(%s))' % (m, l, u, M, l, u))
+    w('pl%d = %s**%s; pu%d = %s**%s' % (k, l, p, k, u, p))
+    w('%s = %s**%s; %s = max(pl%d, pu%d)' % (L, m, p, U, k, k))
+    w('%s = %s' % (s, w.secant('pl%d' % k, 'pu%d' % k, l, u, '%s*%s**%s' % (p, l, literal(c-1)))))
+    w('%s = max(%s, min(%s, %s)); %s = max(%s, min(%s, %s))' % (ca, a, cc, m, cb, a, cc, M))
+    w('%s = %s**%s' % (q, ca, p))
+    w('%s = max(%s, %s); %s = min(%s, pl%d + %s*(%s - %s))' % (A, L, q, C, U, k, s, cb, l))
+    if subgradient:
+        w.select(x[:2], [('%s > %s' % (L, q), ('0.0', '0.0')),
+                         ('%s > %s' % (m, cc), ('0.0', '%s*%s**%s' % (p, cc, literal(c-1)))),
+                         ('%s <= %s' % (m, a), ('%s*%s**%s' % (p, a, literal(c-1)), '0.0'))], ('0.0', '0.0'))
+        #the concave branch test of MCSGPy.__pow__ evaluates the secant at cv
+        w.select(x[2:], [('%s < %s**%s + %s*(%s - %s)' % (U, a, p, s, cb, a), ('0.0', '0.0')),
+                         ('%s >= %s' % (M, cc), ('0.0', s)),
+                         ('%s < %s' % (M, a), (s, '0.0'))], ('0.0', '0.0'))
+
+def _emit_pow_odd(w, k, i, c, subgradient):
+    '''
+    inline the odd power rule for node k = node i**c, envelopes of utility.odd_power_envelopes
+    '''
+
+    l, u, a, cc = 'l%d' % i, 'u%d' % i, 'a%d' % i, 'c%d' % i
+    L, U, A, C = 'l%d' % k, 'u%d' % k, 'a%d' % k, 'c%d' % k
+    x = ['x%d_%d' % (k, n) for n in range(4)]
+    p, q = literal(c), literal(c-1)
+    tv, sv, tc, sc, ca, cb, cvv, ccv = ['%s%d' % (name, k) for name in ('tv', 'sv', 'tc', 'sc', 'ca', 'cb', 'cvv', 'ccv')]
+
+    w('%s = %s**%s; %s = %s**%s' % (L, l, p, U, u, p))
+    w('%s, %s, %s, %s = odd_envelopes(%s, %s, %s)' % (tv, sv, tc, sc, l, u, p))
+    w('%s = max(%s, min(%s, %s)); %s = max(%s, min(%s, %s))' % (ca, a, cc, l, cb, a, cc, u))
+    w.select([cvv], [('%s > %s' % (ca, tv), ('%s**%s' % (ca, p),))], ('%s + %s*(%s - %s)' % (L, sv, ca, l),))
+    w.select([ccv], [('%s < %s' % (cb, tc), ('%s**%s' % (cb, p),))], ('%s + %s*(%s - %s)' % (U, sc, cb, u),))
+    w('%s = max(%s, %s); %s = min(%s, %s)' % (A, L, cvv, C, U, ccv))
+    if not subgradient:
+        return
+
+    #derivatives of the envelopes at cv and cc of the operand
+    su = ['su%d_%d' % (k, n) for n in range(4)]
+    w.select([su[0]], [('%s > %s' % (a, tv), ('%s*%s**%s' % (p, a, q),))], (sv,))
+    w.select([su[1]], [('%s > %s' % (cc, tv), ('%s*%s**%s' % (p, cc, q),))], (sv,))
+    w.select([su[2]], [('%s < %s' % (a, tc), ('%s*%s**%s' % (p, a, q),))], (sc,))
+    w.select([su[3]], [('%s < %s' % (cc, tc), ('%s*%s**%s' % (p, cc, q),))], (sc,))
+    w.select(x[:2], [('%s > %s' % (L, cvv), ('0.0', '0.0')),
+                     ('%s > %s' % (l, cc), ('0.0', su[1])),
+                     ('%s <= %s' % (l, a), (su[0], '0.0'))], ('0.0', '0.0'))
+    w.select(x[2:], [('%s < %s' % (U, ccv), ('0.0', '0.0')),
+                     ('%s >= %s' % (u, cc), ('0.0', su[3])),
+                     ('%s < %s' % (u, a), (su[2], '0.0'))], ('0.0', '0.0'))
+
+def _emit_pow_neg(w, k, i, c, subgradient):
+    '''
+    inline the negative power rule for node k = node i**c, c < -1
+    '''
+
+    l, u, a, cc = 'l%d' % i, 'u%d' % i, 'a%d' % i, 'c%d' % i
+    L, U, A, C = 'l%d' % k, 'u%d' % k, 'a%d' % k, 'c%d' % k
+    x = ['x%d_%d' % (k, n) for n in range(4)]
+    p, q = literal(c), literal(c-1)
+    fl, fu, s, xn, xm, ca, cb, cvv, ccv = ['%s%d' % (name, k) for name in ('fl', 'fu', 's', 'xn', 'xm', 'ca', 'cb', 'cvv', 'ccv')]
+    su = ['su%d_%d' % (k, n) for n in range(4)]
+    d_cv, d_cc = '%s*%s**%s' % (p, a, q), '%s*%s**%s' % (p, cc, q)
+
+    w.check('%s*%s <= 0' % (l, u), '1/x cannot contain domain 0')
+    w('%s = %s**%s; %s = %s**%s' % (fl, l, p, fu, u, p))
+    w('%s = min(%s, %s); %s = max(%s, %s)' % (L, fl, fu, U, fl, fu))
+    w('%s = %s' % (s, w.secant(fl, fu, l, u, '%s*%s**%s' % (p, l, q))))
+    if c % 2 == 0:
+        #convex: increasing on a negative domain, decreasing on a positive one
+        w.select([xn, xm], [('%s < 0' % u, (l, u))], (u, l))
+        w('%s = max(%s, min(%s, %s)); %s = max(%s, min(%s, %s))' % (ca, a, cc, xn, cb, a, cc, xm))
+        w('%s = %s**%s; %s = %s + %s*(%s - %s)' % (cvv, ca, p, ccv, fl, s, cb, l))
+    else:
+        #decreasing: convex on a positive domain, concave on a negative one
+        w('%s = %s; %s = %s' % (xn, u, xm, l))
+        w('%s = max(%s, min(%s, %s)); %s = max(%s, min(%s, %s))' % (ca, a, cc, xn, cb, a, cc, xm))
+        w.select([cvv, ccv], [('%s > 0' % l, ('%s**%s' % (ca, p), '%s + %s*(%s - %s)' % (fl, s, cb, l)))],
+                 ('%s + %s*(%s - %s)' % (fl, s, ca, l), '%s**%s' % (cb, p)))
+    w('%s = max(%s, %s); %s = min(%s, %s)' % (A, L, cvv, C, U, ccv))
+    if not subgradient:
+        return
+
+    if c % 2 == 0:
+        w('%s = %s; %s = %s; %s = %s; %s = %s' % (su[0], d_cv, su[1], d_cc, su[2], s, su[3], s))
+    else:
+        w.select(su, [('%s > 0' % l, (d_cv, d_cc, s, s))], (s, s, d_cv, d_cc))
+    w.select(x[:2], [('%s > %s' % (L, cvv), ('0.0', '0.0')),
+                     ('%s > %s' % (xn, cc), ('0.0', su[1])),
+                     ('%s <= %s' % (xn, a), (su[0], '0.0'))], ('0.0', '0.0'))
+    w.select(x[2:], [('%s < %s' % (U, ccv), ('0.0', '0.0')),
+                     ('%s >= %s' % (xm, cc), ('0.0', su[3])),
+                     ('%s < %s' % (xm, a), (su[2], '0.0'))], ('0.0', '0.0'))
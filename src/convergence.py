@@ -0,0 +1,176 @@
+'''
+Empirical convergence order of the relaxations of a factorable function over shrinking boxes.
+
+convergence_order(fun, center) evaluates the relaxations on a geometric family of nested boxes
+X_k = center +- width*ratio**k/2 (every variable), each box sampled at the same relative points in
+one vectorized pass of the compiled tape (compiler.py) together with the function values there
+(degenerate boxes [z, z]). The points are the center, the vertices of the box (so the sampled range
+of a function monotone in every variable is its exact range) and random points. Per width it measures the largest gap cc - cv, the pointwise distance
+max(f - cv, cc - f) and the Hausdorff distances of [min cv, max cc] and of the interval bound
+[LB, UB] to the sampled range of f, and fits measure ~ constant*width**order on a log-log scale
+over the smallest widths (the asymptotic regime).
+McCormick relaxations are expected to show order 2, the interval bounds order 1.
+The widths are evaluated in parallel on a process pool.
+'''
+
+import itertools
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from tape import Tape, trace
+from compiler import compile_tape
+
+MEASURES = ('gap', 'pointwise', 'hausdorff', 'interval')
+
+#boxes of up to MAX_VERTICES variables are sampled at all 2**n vertices
+MAX_VERTICES = 10
+
+_worker = {}
+
+class ConvergenceResult:
+    '''
+    result of convergence_order
+    widths     (K,) box widths, largest first
+    measures   dict of (K,) arrays per measure: 'gap' max(cc - cv), 'pointwise' max(f - cv, cc - f),
+               'hausdorff' and 'interval' the distances of [min cv, max cc] and [LB, UB] to the range of f
+    orders     dict of the fitted orders per measure, nan if fewer than two fitted widths are above the floor
+    constants  dict of the fitted constants, measure ~ constant*width**order
+    time       wall time in seconds
+    '''
+
+    def __init__(self, widths, measures, orders, constants, time):
+        self.widths = widths
+        self.measures = measures
+        self.orders = orders
+        self.constants = constants
+        self.time = time
+
+    @property
+    def order(self):
+        '''
+        pointwise convergence order of the relaxations
+        '''
+
+        return self.orders['pointwise']
+
+    def __repr__(self):
+        return 'ConvergenceResult(%s, widths=%d, time=%.3f)' % (
+            ', '.join('%s=%.3f' % (name, self.orders[name]) for name in MEASURES), len(self.widths), self.time)
+
+    def table(self):
+        '''
+        the measures per width as text
+        '''
+
+        lines = ['%12s' % 'width' + ''.join('%14s' % name for name in MEASURES)]
+        for k, width in enumerate(self.widths):
+            lines.append('%12.4e' % width + ''.join('%14.4e' % self.measures[name][k] for name in MEASURES))
+        lines.append('%12s' % 'order' + ''.join('%14.3f' % self.orders[name] for name in MEASURES))
+        return '\n'.join(lines)
+
+
+def convergence_order(fun, center, width=1.0, ratio=0.5, count=12, samples=256, processes=None, seed=0, floor=1e-10,
+                      fit=None):
+    '''
+    convergence orders of the relaxations of fun on count nested boxes of widths width*ratio**k around center.
+    fun is a python function of the variables (see tape.trace) or a Tape, center a point with one entry per
+    variable; the largest box must lie in the domain of fun.
+    samples    points per box: the center, the vertices (see vertices) and random points up to samples,
+               at the same relative positions in every box
+    processes  worker processes for the widths, os.cpu_count() by default, 1 to evaluate in-process
+    floor      measures below it (round-off) are left out of the fits
+    fit        number of the smallest widths the orders are fitted on, count//2 (at least 2) by default
+    '''
+
+    start = time.perf_counter()
+    center = np.atleast_1d(np.array(center, dtype=float))
+    n = len(center)
+    if not 0 < ratio < 1:
+        raise ValueError('ratio must be in (0, 1)')
+    tape = fun if type(fun) == Tape else trace(fun, n)
+
+    rng = np.random.default_rng(seed)
+    fixed = np.vstack([np.full(n, 0.5), vertices(n)])
+    unit = np.vstack([fixed, rng.random((max(samples - len(fixed), 0), n))])
+    widths = width*ratio**np.arange(count)
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or count == 1:
+        compiled = compile_tape(tape, vectorized=True)
+        rows = [_measure(compiled, center, w, unit) for w in widths]
+    else:
+        with ProcessPoolExecutor(min(processes, count), initializer=_initialize, initargs=(tape,)) as pool:
+            rows = list(pool.map(_evaluate_width, [center]*count, widths, [unit]*count))
+
+    measures = {name: np.array([row[k] for row in rows]) for k, name in enumerate(MEASURES)}
+    fit = max(count//2, 2) if fit is None else fit
+    orders = {}
+    constants = {}
+    for name in MEASURES:
+        orders[name], constants[name] = fit_order(widths[-fit:], measures[name][-fit:], floor)
+    return ConvergenceResult(widths, measures, orders, constants, time.perf_counter() - start)
+
+def vertices(n):
+    '''
+    relative positions in [0, 1]**n of the sampled vertices: all 2**n of them up to MAX_VERTICES variables,
+    else the corners 0 and 1 and the midpoints of the faces (one coordinate 0 or 1, the others 1/2)
+    '''
+
+    if n <= MAX_VERTICES:
+        return np.array(list(itertools.product((0.0, 1.0), repeat=n)))
+    faces = np.full((2*n, n), 0.5)
+    faces[np.arange(n), np.arange(n)] = 0.0
+    faces[n + np.arange(n), np.arange(n)] = 1.0
+    return np.vstack([np.zeros(n), np.ones(n), faces])
+
+def fit_order(widths, values, floor=1e-10):
+    '''
+    least-squares fit of log(values) = log(constant) + order*log(widths) over the values above floor,
+    returns (order, constant)
+    '''
+
+    widths = np.asarray(widths, dtype=float)
+    values = np.asarray(values, dtype=float)
+    keep = np.isfinite(values) & (values > floor)
+    if keep.sum() < 2:
+        return np.nan, np.nan
+    order, intercept = np.polyfit(np.log(widths[keep]), np.log(values[keep]), 1)
+    return float(order), float(np.exp(intercept))
+
+def _measure(compiled, center, width, unit):
+    '''
+    the measures of one box: its N sample points and the N degenerate boxes [z, z] in one batch of 2N
+    '''
+
+    n = len(center)
+    N = len(unit)
+    LB = center - width/2
+    Z = (LB + unit*width).T
+    IA = np.empty((n, 2, 2*N))
+    IA[:, 0, :N] = LB[:, None]
+    IA[:, 1, :N] = (center + width/2)[:, None]
+    IA[:, 0, N:] = IA[:, 1, N:] = Z
+    MC = np.empty((n, 2, 2*N))
+    MC[:, 0, :N] = MC[:, 1, :N] = Z
+    MC[:, 0, N:] = MC[:, 1, N:] = Z
+    result = compiled(IA, MC)
+
+    cv, cc = result.MC[:, :N]
+    f = result.IA[0, N:]
+    f_min, f_max = f.min(), f.max()
+    gap = np.max(cc - cv)
+    pointwise = max(np.max(f - cv), np.max(cc - f))
+    hausdorff = max(f_min - np.min(cv), np.max(cc) - f_max, 0.0)
+    interval = max(f_min - result.IA[0, 0], result.IA[1, 0] - f_max, 0.0)
+    return float(gap), float(pointwise), float(hausdorff), float(interval)
+
+def _initialize(tape):
+    '''
+    worker initializer: compile the tape once per process
+    '''
+
+    _worker['compiled'] = compile_tape(tape, vectorized=True)
+
+def _evaluate_width(center, width, unit):
+    return _measure(_worker['compiled'], center, width, unit)
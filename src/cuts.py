@@ -0,0 +1,98 @@
+'''
+Affine under- and overestimators of a factorable function at many linearization points at once.
+
+affine_cuts(fun, box, points) evaluates the convex/concave relaxations and their subgradients at
+K points of one box in a single vectorized pass of the compiled tape (compiler.py) and returns the
+cuts as dense C-contiguous arrays: f(y) >= a_cv + g_cv*y and f(y) <= a_cc + g_cc*y for y in the box.
+AffineCuts.epigraph() and AffineCuts.constraint() arrange them as A_ub/b_ub rows for an LP solver
+such as scipy.optimize.linprog.
+'''
+
+import numpy as np
+from tape import Tape, trace
+from compiler import compile_tape
+
+class AffineCuts:
+    '''
+    cuts of one box at K points
+    points         (K, n) linearization points
+    cv_slopes      (K, n) subgradients of the convex relaxation, cv_intercepts (K,): f(y) >= a + g*y
+    cc_slopes      (K, n) subgradients of the concave relaxation, cc_intercepts (K,): f(y) <= a + g*y
+    cv, cc         (K,) relaxation values at the points
+    LB, UB         interval bounds of f on the box
+    '''
+
+    def __init__(self, points, cv, cc, cv_slopes, cc_slopes, LB, UB):
+        self.points = points
+        self.cv = cv
+        self.cc = cc
+        self.cv_slopes = cv_slopes
+        self.cc_slopes = cc_slopes
+        self.cv_intercepts = cv - np.einsum('kn,kn->k', cv_slopes, points)
+        self.cc_intercepts = cc - np.einsum('kn,kn->k', cc_slopes, points)
+        self.LB = LB
+        self.UB = UB
+
+    def __len__(self):
+        return len(self.points)
+
+    def __repr__(self):
+        return 'AffineCuts(K=%d, n=%d, IA=[%r, %r])' % (self.points.shape[0], self.points.shape[1], self.LB, self.UB)
+
+    def epigraph(self):
+        '''
+        A_ub (K, n+1), b_ub (K,) of t >= a_cv + g_cv*y over the variables (y, t):
+        minimizing t subject to them (and the box) is Kelley's lower bound of f
+        '''
+
+        A = np.empty((len(self), self.points.shape[1] + 1))
+        A[:,:-1] = self.cv_slopes
+        A[:,-1] = -1
+        return A, -self.cv_intercepts
+
+    def constraint(self, lower=-np.inf, upper=np.inf):
+        '''
+        A_ub (m, n), b_ub (m,) of the outer approximation of lower <= f(y) <= upper:
+        a_cv + g_cv*y <= upper for a finite upper, and a_cc + g_cc*y >= lower for a finite lower
+        '''
+
+        A, b = [], []
+        if np.isfinite(upper):
+            A.append(self.cv_slopes)
+            b.append(upper - self.cv_intercepts)
+        if np.isfinite(lower):
+            A.append(-self.cc_slopes)
+            b.append(self.cc_intercepts - lower)
+        if not A:
+            return np.empty((0, self.points.shape[1])), np.empty(0)
+        return np.ascontiguousarray(np.concatenate(A)), np.concatenate(b)
+
+
+def affine_cuts(fun, box, points):
+    '''
+    cuts of fun on box, a sequence of [LB, UB] per variable, at the rows of points (K, n),
+    which must lie in the box. fun is a python function of the variables (see tape.trace) or a Tape.
+    '''
+
+    box = np.array(box, dtype=float)
+    points = np.array(points, dtype=float, ndmin=2, order='C')
+    n = len(box)
+    if points.shape[1] != n:
+        raise ValueError('points must have one column per variable')
+    K = points.shape[0]
+
+    tape = fun if type(fun) == Tape else trace(fun, n)
+    relaxation = compile_tape(tape, subgradient=True, vectorized=True).function
+    LB = [np.full(K, box[k, 0]) for k in range(n)]
+    UB = [np.full(K, box[k, 1]) for k in range(n)]
+    X = [points[:,k] for k in range(n)]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        l, u, cv, cc, SG_cv, SG_cc = relaxation(LB, UB, X, X)
+
+    cv_slopes = np.empty((K, n))
+    cc_slopes = np.empty((K, n))
+    for k in range(n):
+        cv_slopes[:,k] = SG_cv[k]
+        cc_slopes[:,k] = SG_cc[k]
+    return AffineCuts(points, np.broadcast_to(cv, (K,)).astype(float), np.broadcast_to(cc, (K,)).astype(float),
+                      cv_slopes, cc_slopes, float(np.min(l)), float(np.max(u)))
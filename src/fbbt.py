@@ -0,0 +1,288 @@
+'''
+Forward-backward interval constraint propagation (FBBT) over a recorded expression (tape.py).
+
+The forward pass computes the interval of every node, the constraint lower <= f(x) <= upper
+is imposed on the output, and the backward pass inverts every operation to tighten the
+intervals of its operands, down to the variables. Both passes are repeated to a fixed point
+within a budget of iterations. Variable bounds may be infinite.
+
+The contraction is safe in floating point: every computed bound is rounded outward by one ulp
+(math.nextafter) after the operation that produced it, and the p-th roots of the backward power
+rule are checked against z**p and stepped outward until they enclose the exact root, so a feasible
+point, boundary points included, is never cut off by round-off.
+'''
+
+import math
+from MC import mid
+from tape import VAR, ADD, ADDC, MULC, MUL, POW, INV, EXP, LOG, SQRT
+
+inf = math.inf
+
+class Infeasible(Exception):
+    '''
+    raised internally when an interval becomes empty
+    '''
+
+def contract(tape, box, lower=-inf, upper=inf, max_iter=20, tol=1e-6):
+    '''
+    contract box, a sequence of [LB, UB] per variable, with the constraint lower <= tape(x) <= upper.
+    Returns the contracted box as a list of [LB, UB], or None if the constraint is infeasible on the box.
+    Iterates until no bound moves by more than tol*(1 + |bound|), or max_iter forward-backward passes.
+    '''
+
+    return propagate([(tape, lower, upper)], box, max_iter, tol)
+
+def propagate(constraints, box, max_iter=20, tol=1e-6):
+    '''
+    contract box with several constraints (tape, lower, upper) over the same variables,
+    sweeping all constraints in every iteration. Returns the box or None, as contract.
+    '''
+
+    box = [(float(LB), float(UB)) for LB, UB in box]
+    values = [None]*len(constraints)
+    try:
+        for iteration in range(max_iter):
+            previous = box
+            for k, (tape, lower, upper) in enumerate(constraints):
+                values[k] = forward(tape, box, values[k])
+                values[k][tape.output] = meet(values[k][tape.output], (lower, upper))
+                box = backward(tape, values[k], box)
+            if all(_converged(old, new, tol) for old, new in zip(previous, box)):
+                break
+    except Infeasible:
+        return None
+    return [list(bounds) for bounds in box]
+
+def forward(tape, box, values=None):
+    '''
+    interval of every node of the tape on box, intersected with the previous values if given
+    '''
+
+    result = [None]*len(tape.ops)
+    for k, (op, (i, j), c) in enumerate(zip(tape.ops, tape.args, tape.consts)):
+        if op == VAR:
+            x = box[i]
+        elif op == ADD:
+            x = outward(result[i][0] + result[j][0], result[i][1] + result[j][1])
+        elif op == ADDC:
+            x = outward(result[i][0] + c, result[i][1] + c)
+        elif op == MULC:
+            x = scale(result[i], c)
+        elif op == MUL:
+            x = multiply(result[i], result[j])
+        elif op == POW:
+            x = power(result[i], c)
+        elif op == INV:
+            x = inverse(result[i])
+        elif op == EXP:
+            x = nonnegative(*outward(_exp(result[i][0]), _exp(result[i][1])))
+        elif op == LOG:
+            LB, UB = meet(result[i], (0, inf))
+            x = outward(math.log(LB) if LB > 0 else -inf, math.log(UB) if UB > 0 else -inf)
+        elif op == SQRT:
+            LB, UB = meet(result[i], (0, inf))
+            x = nonnegative(*outward(math.sqrt(LB), math.sqrt(UB)))
+        result[k] = x if values is None else meet(x, values[k])
+    return result
+
+def backward(tape, values, box):
+    '''
+    tighten the operands of every node from its interval, in reverse order, and return the new box
+    '''
+
+    for k in range(len(tape.ops) - 1, -1, -1):
+        op, (i, j), c = tape.ops[k], tape.args[k], tape.consts[k]
+        z = values[k]
+        if op == VAR:
+            box = box[:i] + [meet(box[i], z)] + box[i+1:]
+        elif op == ADD:
+            x, y = values[i], values[j]
+            values[i] = meet(x, outward(z[0] - y[1], z[1] - y[0]))
+            values[j] = meet(y, outward(z[0] - values[i][1], z[1] - values[i][0]))
+        elif op == ADDC:
+            values[i] = meet(values[i], outward(z[0] - c, z[1] - c))
+        elif op == MULC:
+            if c != 0:
+                values[i] = meet(values[i], quotient(z, c))
+        elif op == MUL:
+            x, y = values[i], values[j]
+            values[i] = divide(x, z, y)
+            values[j] = divide(y, z, values[i])
+        elif op == POW:
+            values[i] = root(values[i], z, c)
+        elif op == INV:
+            values[i] = meet(values[i], inverse(z))
+        elif op == EXP:
+            z = meet(z, (0, inf))
+            values[i] = meet(values[i], outward(math.log(z[0]) if z[0] > 0 else -inf, math.log(z[1]) if z[1] > 0 else -inf))
+        elif op == LOG:
+            values[i] = meet(values[i], nonnegative(*outward(_exp(z[0]), _exp(z[1]))))
+        elif op == SQRT:
+            z = meet(z, (0, inf))
+            values[i] = meet(values[i], nonnegative(*outward(_power(z[0], 2), _power(z[1], 2))))
+    return list(box)
+
+def meet(x, y):
+    '''
+    intersection of two intervals, Infeasible if empty
+    '''
+
+    LB = max(x[0], y[0])
+    UB = min(x[1], y[1])
+    if LB > UB:
+        raise Infeasible()
+    return (LB, UB)
+
+def hull(*intervals):
+    '''
+    smallest interval containing the nonempty intervals, Infeasible if all are empty
+    '''
+
+    intervals = [x for x in intervals if x[0] <= x[1]]
+    if not intervals:
+        raise Infeasible()
+    return (min(x[0] for x in intervals), max(x[1] for x in intervals))
+
+def outward(LB, UB):
+    '''
+    the interval [LB, UB] widened by one ulp on both sides, to enclose the round-off of LB and UB
+    '''
+
+    return (math.nextafter(LB, -inf), math.nextafter(UB, inf))
+
+def nonnegative(LB, UB):
+    '''
+    [LB, UB] with LB raised to 0, for functions known to be nonnegative (the widening of a lower bound 0
+    must not make it contain negative values, which would lose the sign in inverse/divide)
+    '''
+
+    return (max(LB, 0.0), UB)
+
+def scale(x, c):
+    '''
+    interval of c*x
+    '''
+
+    if c >= 0:
+        return outward(_product(x[0], c), _product(x[1], c))
+    else:
+        return outward(_product(c, x[1]), _product(c, x[0]))
+
+def quotient(x, c):
+    '''
+    interval of x/c for a nonzero constant c
+    '''
+
+    if c > 0:
+        return outward(x[0]/c, x[1]/c)
+    else:
+        return outward(x[1]/c, x[0]/c)
+
+def multiply(x, y):
+    '''
+    interval of the bilinear product x*y
+    '''
+
+    values = [_product(x[0], y[0]), _product(x[0], y[1]), _product(x[1], y[0]), _product(x[1], y[1])]
+    return outward(min(values), max(values))
+
+def inverse(x):
+    '''
+    interval of 1/x, unbounded when x contains 0
+    '''
+
+    if x[0] > 0 or x[1] < 0:
+        return outward(1/x[1], 1/x[0])
+    elif x[0] == 0 and x[1] > 0:
+        return outward(1/x[1], inf)
+    elif x[1] == 0 and x[0] < 0:
+        return outward(-inf, 1/x[0])
+    else:
+        return (-inf, inf)
+
+def divide(x, z, y):
+    '''
+    tighten x with x*y in z: extended division z/y, which gives two pieces when y contains 0
+    '''
+
+    if y[0] > 0 or y[1] < 0:
+        return meet(x, multiply(z, inverse(y)))
+    elif z[0] <= 0 <= z[1]:
+        return x
+    elif y[0] == y[1] == 0:
+        raise Infeasible()
+    elif z[0] > 0:
+        pieces = [outward(-inf, z[0]/y[0]) if y[0] < 0 else (inf, -inf), outward(z[0]/y[1], inf) if y[1] > 0 else (inf, -inf)]
+    else:
+        pieces = [outward(-inf, z[1]/y[1]) if y[1] > 0 else (inf, -inf), outward(z[1]/y[0], inf) if y[0] < 0 else (inf, -inf)]
+    return hull(*[(max(x[0], LB), min(x[1], UB)) for LB, UB in pieces])
+
+def power(x, p):
+    '''
+    interval of x**p for a nonzero integer p
+    '''
+
+    if p < 0:
+        return inverse(power(x, -p))
+    elif p % 2 == 0:
+        return nonnegative(*outward(_power(mid(x[0], x[1], 0), p), max(_power(x[0], p), _power(x[1], p))))
+    else:
+        return outward(_power(x[0], p), _power(x[1], p))
+
+def root(x, z, p):
+    '''
+    tighten x with x**p in z, for a nonzero integer p
+    '''
+
+    if p < 0:
+        #x**p = 1/x**(-p)
+        return root(x, meet(inverse(z), power(x, -p)), -p)
+    elif p % 2 == 0:
+        z = meet(z, (0, inf))
+        r = _root(z[1], p, True)
+        s = _root(z[0], p, False)
+        #x lies in [-r, -s] or [s, r]
+        return hull((max(x[0], -r), min(x[1], -s)), (max(x[0], s), min(x[1], r)))
+    else:
+        return meet(x, (_odd_root(z[0], p, False), _odd_root(z[1], p, True)))
+
+def _root(z, p, up):
+    '''
+    p-th root of z >= 0 rounded up (a bound >= the exact root) or down. z**(1/p) can be off by many
+    ulps for large |log z|, so it is stepped until r**p passes z, then one more ulp for the round-off of r**p.
+    '''
+
+    r = z**(1/p)
+    if up:
+        while _power(r, p) < z:
+            r = math.nextafter(r, inf)
+        return math.nextafter(r, inf)
+    while r > 0 and _power(r, p) > z:
+        r = math.nextafter(r, 0)
+    return max(math.nextafter(r, -inf), 0.0)
+
+def _odd_root(z, p, up):
+    #the magnitude of a negative z is rounded the other way
+    return math.copysign(_root(abs(z), p, up == (z >= 0)), z)
+
+def _product(a, b):
+    #0*inf is taken as 0, the limit of the bounded factor
+    if a == 0 or b == 0:
+        return 0.0
+    return a*b
+
+def _exp(x):
+    try:
+        return math.exp(x)
+    except OverflowError:
+        return inf
+
+def _power(x, p):
+    #x**p for a positive integer p, float ** int raises OverflowError instead of returning inf
+    try:
+        return x**p
+    except OverflowError:
+        return inf if x > 0 or p % 2 == 0 else -inf
+
+def _converged(old, new, tol):
+    return all(abs(a - b) <= tol*(1 + abs(a)) or a == b for a, b in zip(old, new))
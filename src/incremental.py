@@ -0,0 +1,132 @@
+'''
+Two-phase evaluation of a recorded expression (tape.py) on a fixed box.
+
+prepare(tape, IA) runs the box phase once: the interval of every node and all the data of its
+rule that depend only on the box (f(LB)/f(UB), secant slopes, xmin/xmax, odd power envelopes,
+corner products of bilinear terms). The returned PreparedTape runs the point phase for any
+relaxation point MC in the box: only cv/cc and the subgradients, with the same results as
+Tape.evaluate/Tape.reverse on that box. Inner solvers that move MC on a fixed IA pay the box
+phase once instead of at every iteration. Both phases are the <rule>_box/<rule>_point functions
+of rules.py, the same ones that Tape.evaluate composes.
+'''
+
+import numpy as np
+import rules
+from MC import MCPy, MCSGPy
+from tape import VAR, ADD, ADDC, MULC, MUL, POW, INV, EXP, LOG, SQRT, apply, apply2
+
+class PreparedTape:
+    '''
+    PreparedTape is the box phase of a tape on the box IA.
+    PreparedTape.IA holds the interval (LB, UB) of every node, PreparedTape.data the box-only
+    data of its rule; evaluate()/reverse() run the point phase.
+    '''
+
+    def __init__(self, tape, IA):
+        '''
+        Initialization:
+        tape  the recorded expression (tape.trace)
+        IA    sequence of [LB, UB], one per input variable
+        Raises the same domain errors as Tape.evaluate on the box.
+        '''
+
+        self.tape = tape
+        self.IA = [None]*len(tape.ops)
+        self.data = [None]*len(tape.ops)
+        #the point phase runs over (node, input) of the variables and (node, point phase, data, i, j) of the rest
+        self.variables = []
+        self.schedule = []
+        for k, (op, (i, j), c) in enumerate(zip(tape.ops, tape.args, tape.consts)):
+            if op == VAR:
+                self.IA[k] = (float(IA[i][0]), float(IA[i][1]))
+                self.variables.append((k, i))
+                continue
+            elif op in (ADD, MUL):
+                box, point = PHASES[op]
+                d = box(self.IA[i], self.IA[j])
+            elif op in (ADDC, MULC):
+                box, point = PHASES[op]
+                d = box(self.IA[i], c)
+            elif op == POW:
+                box, point = rules.integer_power_rule(c)
+                d = box(self.IA[i], c)
+            else:
+                box, point = PHASES[op]
+                d = box(self.IA[i])
+            self.IA[k] = (d[0], d[1])
+            self.data[k] = d
+            self.schedule.append((k, point, d, i, j))
+
+    def forward(self, MC):
+        '''
+        point phase of every node: list of (cv, cc) and list of the local subgradient maps
+        '''
+
+        values = [None]*len(self.IA)
+        maps = [None]*len(self.IA)
+        for k, i in self.variables:
+            values[k] = (float(MC[i][0]), float(MC[i][1]))
+        for k, point, d, i, j in self.schedule:
+            if j < 0:
+                values[k], J = point(d, values[i])
+                maps[k] = (J,)
+            else:
+                values[k], Jx, Jy = point(d, values[i], values[j])
+                maps[k] = (Jx, Jy)
+        return values, maps
+
+    def evaluate(self, MC, SG=None):
+        '''
+        Tape.evaluate(IA, MC, SG) on the prepared box: MC is a sequence of [cv, cc] per input
+        variable, SG None (returns MCPy) or of shape (nvars, n, 2) (returns MCSGPy, forward mode)
+        '''
+
+        values, maps = self.forward(MC)
+        LB, UB = self.IA[self.tape.output]
+        cv, cc = values[self.tape.output]
+        if SG is None:
+            return MCPy(np.array([LB, UB]), np.array([cv, cc]))
+
+        tape = self.tape
+        grads = [None]*len(tape.ops)
+        for k, (op, (i, j)) in enumerate(zip(tape.ops, tape.args)):
+            if op == VAR:
+                grads[k] = (np.asarray(SG[i][:,0], dtype=float).ravel(),
+                            np.asarray(SG[i][:,1], dtype=float).ravel())
+            elif j >= 0:
+                grads[k] = apply2(maps[k][0], grads[i], maps[k][1], grads[j])
+            else:
+                grads[k] = apply(maps[k][0], grads[i])
+        SG_cv, SG_cc = grads[tape.output]
+        return MCSGPy(np.array([LB, UB]), np.array([cv, cc]), np.asmatrix(np.column_stack([SG_cv, SG_cc])))
+
+    def reverse(self, MC, SG=None):
+        '''
+        Tape.reverse(IA, MC, SG) on the prepared box: subgradients by one backward sweep
+        '''
+
+        values, maps = self.forward(MC)
+        SG_cv, SG_cc = self.tape.sweep(maps, SG)
+        LB, UB = self.IA[self.tape.output]
+        cv, cc = values[self.tape.output]
+        return MCSGPy(np.array([LB, UB]), np.array([cv, cc]), np.asmatrix(np.column_stack([SG_cv, SG_cc])))
+
+
+def prepare(tape, IA):
+    '''
+    box phase of tape on IA, see PreparedTape
+    '''
+
+    return PreparedTape(tape, IA)
+
+#(box phase, point phase) of the rules, see rules.py; POW is dispatched on the exponent
+PHASES = {
+    ADD: (rules.add_box, rules.add_point),
+    MUL: (rules.mul_box, rules.mul_point),
+    ADDC: (rules.addc_box, rules.addc_point),
+    MULC: (rules.mulc_box, rules.mulc_point),
+    INV: (rules.inv_box, rules.inv_point),
+    EXP: (rules.exp_box, rules.exp_point),
+    LOG: (rules.log_box, rules.log_point),
+    SQRT: (rules.sqrt_box, rules.sqrt_point),
+}
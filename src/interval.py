@@ -0,0 +1,247 @@
+'''
+Interval arithmetic only: the IA part of the McCormick rules without MC values or subgradients.
+
+IAPy is a cheap scalar type for bound screening, and evaluate()/screen() replay a recorded
+expression (tape.py) with interval rules on one box or on arrays of boxes at once. Powers use
+the exact images of x**p (even, odd and negative p), so the bounds are never looser than the
+IA of MCPy/MCSGPy.
+'''
+
+import math
+import numpy as np
+import rules
+from MC import mid
+from utility import vmin, vmax, vmid
+from tape import VAR, ADD, ADDC, MULC, MUL, POW, INV, EXP, LOG, SQRT
+
+class IAPy:
+    '''
+    IAPy carries only the interval [LB, UB] of an expression, as two python floats in __slots__.
+    Use it as a first screening pass, and compute the relaxations (MCPy/MCSGPy) only for surviving boxes.
+    '''
+
+    __slots__ = ('LB', 'UB')
+
+    def __init__(self, IA):
+        '''
+        Initialization:
+        IA = [LB, UB] bounds of the interval arithmetic.
+        '''
+
+        self.LB = float(IA[0])
+        self.UB = float(IA[1])
+
+    @property
+    def IA(self):
+        return np.array([self.LB, self.UB])
+
+    def __repr__(self):
+        return 'IAPy(IA=[%r, %r])' % (self.LB, self.UB)
+
+    def __add__(self, IAPy2):
+        '''
+        overloading addition operator
+        '''
+
+        if type(IAPy2) == IAPy:
+            return _make(self.LB + IAPy2.LB, self.UB + IAPy2.UB)
+        else:
+            return _make(self.LB + IAPy2, self.UB + IAPy2)
+
+    def __radd__(self, IAPy2):
+        '''
+        reverse overloading addition operator
+        '''
+
+        return self + IAPy2
+
+    def __pos__(self):
+        '''
+        overloading pos operator
+        '''
+
+        return self
+
+    def __neg__(self):
+        '''
+        overloading neg operator
+        '''
+
+        return _make(-self.UB, -self.LB)
+
+    def __sub__(self, IAPy2):
+        '''
+        overloading subtraction operator
+        '''
+
+        if type(IAPy2) == IAPy:
+            return _make(self.LB - IAPy2.UB, self.UB - IAPy2.LB)
+        else:
+            return _make(self.LB - IAPy2, self.UB - IAPy2)
+
+    def __rsub__(self, IAPy2):
+        '''
+        reverse overloading subtraction operator
+        '''
+
+        return -self + IAPy2
+
+    def __pow__(self, power):
+        '''
+        overloading interger power opertor
+        '''
+
+        return _make(*ipow(self.LB, self.UB, power))
+
+    def __mul__(self, IAPy2):
+        '''
+        overloading multiplication operator
+        '''
+
+        if type(IAPy2) == IAPy:
+            if self is IAPy2:
+                return self**2
+            return _make(*imul(self.LB, self.UB, IAPy2.LB, IAPy2.UB))
+        elif IAPy2 >= 0:
+            return _make(self.LB*IAPy2, self.UB*IAPy2)
+        elif IAPy2 < 0:
+            return _make(IAPy2*self.UB, IAPy2*self.LB)
+        else:
+            raise ValueError('This rule is not defined yet.')
+
+    def __rmul__(self, IAPy2):
+        '''
+        reverse overloading of multiplication operator
+        '''
+        return self*IAPy2
+
+    def __truediv__(self, IAPy2):
+        '''
+        overloading division operator
+        '''
+        return self*IAPy2**(-1)
+
+    def __rtruediv__(self, IAPy2):
+        '''
+        reserve overloading division operator
+        '''
+        return self**(-1)*IAPy2
+
+    def exp(self):
+        '''
+        overloading exp, called by MC.exp
+        '''
+        return _make(math.exp(self.LB), math.exp(self.UB))
+
+    def log(self):
+        '''
+        overloading log, called by MC.log
+        '''
+        return _make(math.log(self.LB), math.log(self.UB))
+
+    def sqrt(self):
+        '''
+        overloading sqrt, called by MC.sqrt
+        '''
+        return _make(math.sqrt(self.LB), math.sqrt(self.UB))
+
+
+def _make(LB, UB):
+    '''
+    build an IAPy from two floats without going through __init__
+    '''
+
+    result = object.__new__(IAPy)
+    result.LB = LB
+    result.UB = UB
+    return result
+
+def imul(LB1, UB1, LB2, UB2):
+    '''
+    interval of the bilinear product, on floats or arrays
+    '''
+
+    if type(LB1) == float:
+        values = [LB1*LB2, LB1*UB2, UB1*LB2, UB1*UB2]
+        return min(values), max(values)
+    values = (LB1*LB2, LB1*UB2, UB1*LB2, UB1*UB2)
+    return vmin(*values), vmax(*values)
+
+def ipow(LB, UB, power):
+    '''
+    interval of x**power for a nonzero integer power, on floats or arrays
+    '''
+
+    scalar = type(LB) == float
+    kind = rules.power_kind(power)
+    if kind == 'even':
+        if scalar:
+            return mid(LB, UB, 0)**power, max(LB**power, UB**power)
+        return vmid(LB, UB, 0)**power, vmax(LB**power, UB**power)
+    elif kind == 'one':
+        return LB, UB
+    elif kind == 'odd':
+        return LB**power, UB**power
+    elif kind == 'inv':
+        if (LB*UB <= 0 if scalar else np.any(LB*UB <= 0)):
+            raise ValueError('1/x cannot contain domain 0')
+        return 1/UB, 1/LB
+    else:
+        return ipow(*ipow(LB, UB, -1), -power)
+
+def evaluate(tape, IA):
+    '''
+    interval replay of a tape.
+    IA of shape (nvars, 2) returns the bounds (LB, UB) as floats,
+    IA of shape (nvars, 2, N) returns two arrays of the N bounds.
+    '''
+
+    IA = np.asarray(IA, dtype=float)
+    if IA.ndim == 2:
+        bounds = [(float(IA[k, 0]), float(IA[k, 1])) for k in range(len(IA))]
+        exp, log, sqrt = math.exp, math.log, math.sqrt
+    else:
+        bounds = [(IA[k, 0], IA[k, 1]) for k in range(len(IA))]
+        exp, log, sqrt = np.exp, _log, _sqrt
+
+    values = [None]*len(tape.ops)
+    for k, (op, (i, j), c) in enumerate(zip(tape.ops, tape.args, tape.consts)):
+        if op == VAR:
+            values[k] = bounds[i]
+        elif op == ADD:
+            values[k] = (values[i][0] + values[j][0], values[i][1] + values[j][1])
+        elif op == ADDC:
+            values[k] = (values[i][0] + c, values[i][1] + c)
+        elif op == MULC:
+            values[k] = (values[i][0]*c, values[i][1]*c) if c >= 0 else (c*values[i][1], c*values[i][0])
+        elif op == MUL:
+            values[k] = imul(*values[i], *values[j])
+        elif op == POW:
+            values[k] = ipow(*values[i], c)
+        elif op == INV:
+            values[k] = ipow(*values[i], -1)
+        elif op == EXP:
+            values[k] = (exp(values[i][0]), exp(values[i][1]))
+        elif op == LOG:
+            values[k] = (log(values[i][0]), log(values[i][1]))
+        elif op == SQRT:
+            values[k] = (sqrt(values[i][0]), sqrt(values[i][1]))
+    return values[tape.output]
+
+def screen(tape, IA, upper):
+    '''
+    mask of the boxes IA (nvars, 2, N) whose interval lower bound does not exceed upper,
+    i.e. the boxes that survive the screening against an incumbent value
+    '''
+
+    return evaluate(tape, IA)[0] <= upper
+
+def _log(x):
+    if np.any(x <= 0):
+        raise ValueError('math domain error')
+    return np.log(x)
+
+def _sqrt(x):
+    if np.any(x < 0):
+        raise ValueError('math domain error')
+    return np.sqrt(x)
@@ -0,0 +1,159 @@
+import numpy as np
+import rules
+
+class MCLitePy:
+    '''
+    MCLitePy is a compact scalar counterpart of MCPy for small expressions.
+    LB/UB/cv/cc are stored as four python floats in __slots__ and every rule runs on floats (rules.py),
+    so no numpy array is built in the hot path. MCLitePy.IA and MCLitePy.MC are numpy views for compatibility.
+    '''
+
+    __slots__ = ('LB', 'UB', 'cv', 'cc')
+
+    def __init__(self, IA, MC):
+        '''
+        Initialization, as MCPy(IA, MC):
+        IA = [LB, UB] bounds of the interval arithmetic.
+        MC = [cv, cc] convex underestimator/concave overestimator.
+        '''
+
+        self.LB = float(IA[0])
+        self.UB = float(IA[1])
+        self.cv = float(MC[0])
+        self.cc = float(MC[1])
+
+    @property
+    def IA(self):
+        return np.array([self.LB, self.UB])
+
+    @property
+    def MC(self):
+        return np.array([self.cv, self.cc])
+
+    def __repr__(self):
+        return 'MCLitePy(IA=[%r, %r], MC=[%r, %r])' % (self.LB, self.UB, self.cv, self.cc)
+
+    def __add__(self, MCLitePy2):
+        '''
+        overloading addition operator
+        '''
+
+        if type(MCLitePy2) == MCLitePy:
+            return _make((self.LB + MCLitePy2.LB, self.UB + MCLitePy2.UB, self.cv + MCLitePy2.cv, self.cc + MCLitePy2.cc))
+        else:
+            return _make((self.LB + MCLitePy2, self.UB + MCLitePy2, self.cv + MCLitePy2, self.cc + MCLitePy2))
+
+    def __radd__(self, MCLitePy2):
+        '''
+        reverse overloading addition operator
+        '''
+
+        return self + MCLitePy2
+
+    def __pos__(self):
+        '''
+        overloading pos operator
+        '''
+
+        return self
+
+    def __neg__(self):
+        '''
+        overloading neg operator
+        '''
+
+        return self*(-1)
+
+    def __sub__(self, MCLitePy2):
+        '''
+        overloading subtraction operator
+        '''
+
+        if type(MCLitePy2) == MCLitePy:
+            return self + MCLitePy2*(-1)
+        else:
+            return _make((self.LB - MCLitePy2, self.UB - MCLitePy2, self.cv - MCLitePy2, self.cc - MCLitePy2))
+
+    def __rsub__(self, MCLitePy2):
+        '''
+        reverse overloading subtraction operator
+        '''
+
+        return self*(-1) + MCLitePy2
+
+    def __pow__(self, power):
+        '''
+        overloading interger power opertor
+        '''
+
+        kind = rules.power_kind(power)
+        if kind == 'inv':
+            return _make(rules.inv((self.LB, self.UB, self.cv, self.cc))[0])
+        elif kind == 'one':
+            return self
+        else:
+            return _make(rules.integer_power((self.LB, self.UB, self.cv, self.cc), power)[0])
+
+    def __mul__(self, MCLitePy2):
+        '''
+        overloading multiplication operator
+        '''
+
+        if type(MCLitePy2) == MCLitePy:
+            if self is MCLitePy2:
+                return self**2
+            return _make(rules.mul((self.LB, self.UB, self.cv, self.cc),
+                                   (MCLitePy2.LB, MCLitePy2.UB, MCLitePy2.cv, MCLitePy2.cc))[0])
+        elif MCLitePy2 >= 0:
+            return _make((self.LB*MCLitePy2, self.UB*MCLitePy2, self.cv*MCLitePy2, self.cc*MCLitePy2))
+        elif MCLitePy2 < 0:
+            #swap_elements: bounds and relaxations reverse for a negative scalar
+            return _make((MCLitePy2*self.UB, MCLitePy2*self.LB, MCLitePy2*self.cc, MCLitePy2*self.cv))
+        else:
+            raise ValueError('This rule is not defined yet.')
+
+    def __rmul__(self, MCLitePy2):
+        '''
+        reverse overloading of multiplication operator
+        '''
+        return self*MCLitePy2
+
+    def __truediv__(self, MCLitePy2):
+        '''
+        overloading division operator
+        '''
+        return self*MCLitePy2**(-1)
+
+    def __rtruediv__(self, MCLitePy2):
+        '''
+        reserve overloading division operator
+        '''
+        return self**(-1)*MCLitePy2
+
+    def exp(self):
+        '''
+        overloading exp, called by MC.exp
+        '''
+        return _make(rules.exp((self.LB, self.UB, self.cv, self.cc))[0])
+
+    def log(self):
+        '''
+        overloading log, called by MC.log
+        '''
+        return _make(rules.log((self.LB, self.UB, self.cv, self.cc))[0])
+
+    def sqrt(self):
+        '''
+        overloading sqrt, called by MC.sqrt
+        '''
+        return _make(rules.sqrt((self.LB, self.UB, self.cv, self.cc))[0])
+
+
+def _make(values):
+    '''
+    build an MCLitePy from a tuple (LB, UB, cv, cc) without going through __init__
+    '''
+
+    result = object.__new__(MCLitePy)
+    result.LB, result.UB, result.cv, result.cc = values
+    return result
@@ -0,0 +1,458 @@
+'''
+Arrays of McCormick relaxations stored as stacked numpy arrays, for linear-algebra models.
+
+MCArray replaces np.matrix/np.array of MCPy/MCSGPy objects (as in examples.ipynb): the bounds,
+relaxations and subgradients of all entries live in three arrays and every rule runs as one
+NumPy kernel (the MCBatchPy rules of batch.py) over the whole array. A @ B forms the products
+A[i,k]*B[k,j] with the vectorized bilinear rule utility.eq_mul_batch and sums them over k;
+products with a constant matrix are two BLAS matrix products per bound. Entries that are the same
+object (x1*x1 in the object version) are recognized by their labels and take the square rule.
+'''
+
+import weakref
+import numpy as np
+from MC import MCPy, MCSGPy
+from sparse import SparseSG
+from batch import MCBatchPy
+
+_next_label = 0
+_object_labels = weakref.WeakKeyDictionary()
+
+class MCArray:
+    '''
+    MCArray is an n-dimensional array of relaxations with the operators of numpy arrays:
+    +, -, *, / and integer ** entry by entry (with broadcasting), @ for matrix-vector and
+    matrix-matrix products, sum/mean reductions, indexing, reshape and transpose.
+    exp, log and sqrt from MC work on it. An entry indexed with integers is returned as MCPy/MCSGPy.
+    '''
+
+    #numpy arrays on the left of an operator defer to the reflected methods of MCArray
+    __array_ufunc__ = None
+
+    def __init__(self, IA, MC, SG=None, labels=None):
+        '''
+        Initialization:
+        MCArray.IA
+        numpy array of shape (2, *shape), IA[0]/IA[1] are the lower/upper bounds of the entries.
+        MCArray.MC
+        numpy array of shape (2, *shape), MC[0]/MC[1] are the convex/concave relaxations.
+        MCArray.SG
+        None or numpy array of shape (n, 2, *shape), SG[:,0]/SG[:,1] are the subgradients of the
+        convex/concave relaxations with respect to n variables.
+        MCArray.labels
+        integer array of shape shape: entries with the same label are the same relaxation object.
+        New labels are drawn when it is None.
+        '''
+
+        self.IA = np.asarray(IA, dtype=float)
+        self.MC = np.asarray(MC, dtype=float)
+        self.SG = None if SG is None else np.asarray(SG, dtype=float)
+        self.labels = _fresh(self.IA.shape[1:]) if labels is None else np.asarray(labels)
+
+    @property
+    def shape(self):
+        return self.IA.shape[1:]
+
+    @property
+    def ndim(self):
+        return self.IA.ndim - 1
+
+    @property
+    def size(self):
+        return self.labels.size
+
+    @property
+    def T(self):
+        return self.transpose()
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        n = 'None' if self.SG is None else str(self.SG.shape[0])
+        return 'MCArray(shape=%r, n=%s)' % (self.shape, n)
+
+    def __getitem__(self, key):
+        '''
+        numpy indexing of the entries, an entry indexed with integers is returned as MCPy/MCSGPy
+        '''
+
+        if type(key) != tuple:
+            key = (key,)
+        SG = None if self.SG is None else self.SG[(slice(None), slice(None)) + key]
+        return _result(self.IA[(slice(None),) + key], self.MC[(slice(None),) + key], SG, self.labels[key])
+
+    def item(self, index):
+        '''
+        entry index (a tuple of integers) as MCPy, or MCSGPy if subgradients are propagated.
+        The object keeps the label of the entry, so array() of it is recognized as the same entry.
+        '''
+
+        if type(index) != tuple:
+            index = (index,)
+        SG = None if self.SG is None else self.SG[(slice(None), slice(None)) + index]
+        return _result(self.IA[(slice(None),) + index], self.MC[(slice(None),) + index], SG, self.labels[index])
+
+    def to_objects(self):
+        '''
+        numpy object array of the entries as MCPy/MCSGPy
+        '''
+
+        objects = np.empty(self.shape, dtype=object)
+        for index in np.ndindex(*self.shape):
+            objects[index] = self.item(index)
+        return objects
+
+    def reshape(self, *shape):
+        if len(shape) == 1 and type(shape[0]) == tuple:
+            shape = shape[0]
+        labels = self.labels.reshape(shape)
+        SG = None if self.SG is None else self.SG.reshape(self.SG.shape[:2] + labels.shape)
+        return MCArray(self.IA.reshape((2,) + labels.shape), self.MC.reshape((2,) + labels.shape), SG, labels)
+
+    def transpose(self, *axes):
+        if not axes:
+            axes = tuple(range(self.ndim))[::-1]
+        elif len(axes) == 1 and type(axes[0]) == tuple:
+            axes = axes[0]
+        SG = None if self.SG is None else self.SG.transpose((0, 1) + tuple(a + 2 for a in axes))
+        return MCArray(self.IA.transpose((0,) + tuple(a + 1 for a in axes)),
+                       self.MC.transpose((0,) + tuple(a + 1 for a in axes)), SG, self.labels.transpose(axes))
+
+    def broadcast_to(self, shape):
+        '''
+        read-only view of the array broadcast to shape, the labels are repeated with the entries
+        '''
+
+        shape = tuple(shape)
+        if shape == self.shape:
+            return self
+        #new leading axes go after the IA/MC (and SG) axes
+        x = self.reshape((1,)*(len(shape) - self.ndim) + self.shape)
+        SG = None if x.SG is None else np.broadcast_to(x.SG, x.SG.shape[:2] + shape)
+        return MCArray(np.broadcast_to(x.IA, (2,) + shape), np.broadcast_to(x.MC, (2,) + shape), SG,
+                       np.broadcast_to(x.labels, shape))
+
+    def _batch(self):
+        return MCBatchPy(self.IA, self.MC, self.SG)
+
+    def __add__(self, MCArray2):
+        '''
+        overloading addition operator
+        '''
+
+        x, y = _broadcast(self, _operand(MCArray2))
+        return _from_batch(x._batch() + (y._batch() if type(y) == MCArray else y))
+
+    def __radd__(self, MCArray2):
+        '''
+        reverse overloading addition operator
+        '''
+
+        return self + MCArray2
+
+    def __pos__(self):
+        '''
+        overloading pos operator
+        '''
+
+        return self
+
+    def __neg__(self):
+        '''
+        overloading neg operator
+        '''
+
+        return self * (-1)
+
+    def __sub__(self, MCArray2):
+        '''
+        overloading subtraction operator
+        '''
+
+        return self + (-1)*_operand(MCArray2)
+
+    def __rsub__(self, MCArray2):
+        '''
+        reverse overloading subtraction operator
+        '''
+
+        return self*(-1) + MCArray2
+
+    def __mul__(self, MCArray2):
+        '''
+        overloading multiplication operator, entry by entry
+        '''
+
+        x, y = _broadcast(self, _operand(MCArray2))
+        if type(y) != MCArray:
+            return _from_batch(x._batch()*y)
+        return _product(x, y)
+
+    def __rmul__(self, MCArray2):
+        '''
+        reverse overloading of multiplication operator
+        '''
+
+        return self*MCArray2
+
+    def __truediv__(self, MCArray2):
+        '''
+        overloading division operator
+        '''
+
+        MCArray2 = _operand(MCArray2)
+        if type(MCArray2) != MCArray:
+            return self*(1/MCArray2)
+        return self*MCArray2**(-1)
+
+    def __rtruediv__(self, MCArray2):
+        '''
+        reserve overloading division operator
+        '''
+
+        return self**(-1)*MCArray2
+
+    def __pow__(self, power):
+        '''
+        overloading interger power opertor, entry by entry
+        '''
+
+        if power == 1:
+            return self
+        return _from_batch(self._batch()**power)
+
+    def __matmul__(self, MCArray2):
+        '''
+        matrix product with numpy semantics for 1-D (vectors) and 2-D operands
+        '''
+
+        MCArray2 = _operand(MCArray2)
+        if type(MCArray2) != MCArray:
+            return _linear(self, MCArray2)
+        return _matmul(self, MCArray2)
+
+    def __rmatmul__(self, MCArray2):
+        '''
+        reverse matrix product, C @ A = (A.T @ C.T).T
+        '''
+
+        MCArray2 = _operand(MCArray2)
+        if type(MCArray2) != MCArray:
+            result = _linear(self.T, MCArray2.T)
+            return result.T if type(result) == MCArray else result
+        return _matmul(MCArray2, self)
+
+    def sum(self, axis=None):
+        '''
+        sum of the entries over axis (an int, a tuple or None for all axes)
+        '''
+
+        if axis is None:
+            axis = tuple(range(self.ndim))
+        elif type(axis) != tuple:
+            axis = (axis,)
+        axis = tuple(a % self.ndim for a in axis)
+        SG = None if self.SG is None else self.SG.sum(axis=tuple(a + 2 for a in axis))
+        return _result(self.IA.sum(axis=tuple(a + 1 for a in axis)), self.MC.sum(axis=tuple(a + 1 for a in axis)), SG)
+
+    def mean(self, axis=None):
+        '''
+        mean of the entries over axis, the sum times 1/count
+        '''
+
+        if axis is None:
+            count = self.size
+        else:
+            count = int(np.prod([self.shape[a] for a in (axis if type(axis) == tuple else (axis,))]))
+        return self.sum(axis)*(1/count)
+
+    def log(self):
+        '''
+        overloading log, called by MC.log
+        '''
+
+        return _from_batch(self._batch().log())
+
+    def sqrt(self):
+        '''
+        overloading sqrt, called by MC.sqrt
+        '''
+
+        return _from_batch(self._batch().sqrt())
+
+    def exp(self):
+        '''
+        overloading exp, called by MC.exp
+        '''
+
+        return _from_batch(self._batch().exp())
+
+
+def array(objects):
+    '''
+    MCArray of a nested sequence, np.array or np.matrix of MCPy/MCSGPy objects.
+    Subgradients are kept if every entry is an MCSGPy; repeated objects share a label.
+    '''
+
+    objects = np.asarray(objects, dtype=object)
+    if objects.dtype != object:
+        raise ValueError('array needs MCPy/MCSGPy entries')
+    entries = objects.ravel()
+    shape = objects.shape
+    IA = np.array([x.IA for x in entries], dtype=float).T.reshape((2,) + shape)
+    MC = np.array([x.MC for x in entries], dtype=float).T.reshape((2,) + shape)
+    SG = None
+    if len(entries) and all(type(x) == MCSGPy for x in entries):
+        SG = np.array([x.SG.toarray() if type(x.SG) == SparseSG else np.asarray(x.SG, dtype=float) for x in entries])
+        SG = SG.transpose(1, 2, 0).reshape(SG.shape[1:] + shape)
+    labels = np.array([_label(x) for x in entries], dtype=np.int64).reshape(shape)
+    return MCArray(IA, MC, SG, labels)
+
+def variables(LB, UB, cv=None, cc=None, subgradient=True):
+    '''
+    vector x of the n variables with bounds LB, UB and relaxation points cv, cc (the box midpoints and cv
+    by default). With subgradient=True x[k] carries the unit subgradient e_k, as the variables in examples.ipynb.
+    '''
+
+    LB, UB = np.broadcast_arrays(np.asarray(LB, dtype=float), np.asarray(UB, dtype=float))
+    cv = (LB + UB)/2 if cv is None else np.broadcast_to(np.asarray(cv, dtype=float), LB.shape)
+    cc = cv if cc is None else np.broadcast_to(np.asarray(cc, dtype=float), LB.shape)
+    SG = None
+    if subgradient:
+        SG = np.zeros((LB.size, 2) + LB.shape)
+        SG[:, 0] = SG[:, 1] = np.eye(LB.size).reshape((LB.size,) + LB.shape)
+    return MCArray(np.array([LB, UB]), np.array([cv, cc]), SG)
+
+def _fresh(shape):
+    '''
+    labels never used before, one per entry
+    '''
+
+    global _next_label
+    start = _next_label
+    _next_label += int(np.prod(shape, dtype=np.int64))
+    return np.arange(start, _next_label, dtype=np.int64).reshape(shape)
+
+def _label(x):
+    '''
+    label of an MCPy/MCSGPy object, the same for as long as the object lives
+    '''
+
+    label = _object_labels.get(x)
+    if label is None:
+        label = _object_labels[x] = int(_fresh(())[()])
+    return label
+
+def _operand(x):
+    '''
+    MCArray, or numpy array of constants
+    '''
+
+    if type(x) == MCArray:
+        return x
+    if type(x) in (MCPy, MCSGPy):
+        return array(x)
+    x = np.asarray(x)
+    if x.dtype == object:
+        return array(x)
+    return x.astype(float)
+
+def _broadcast(x, y):
+    '''
+    x and y broadcast to their common shape (y may be a constant array)
+    '''
+
+    shape = np.broadcast_shapes(x.shape, np.shape(y))
+    if type(y) == MCArray:
+        return x.broadcast_to(shape), y.broadcast_to(shape)
+    return x.broadcast_to(shape), np.broadcast_to(y, shape)
+
+def _result(IA, MC, SG, labels=None):
+    '''
+    MCArray, or MCPy/MCSGPy for a single entry (shape ())
+    '''
+
+    if np.ndim(IA) == 1:
+        if SG is None:
+            result = MCPy(np.array(IA), np.array(MC))
+        else:
+            result = MCSGPy(np.array(IA), np.array(MC), np.asmatrix(SG))
+        if labels is not None:
+            _object_labels[result] = int(labels)
+        return result
+    return MCArray(IA, MC, SG, labels)
+
+def _from_batch(result):
+    return _result(result.IA, result.MC, result.SG)
+
+def _product(x, y):
+    '''
+    entry-by-entry product of x and y of the same shape: the bilinear rule, or the square rule
+    where the entries are the same object
+    '''
+
+    same = x.labels == y.labels
+    if same.all():
+        return _from_batch(x._batch()**2)
+    result = x._batch()*y._batch()
+    if same.any():
+        square = x._batch()**2
+        IA = np.where(same, square.IA, result.IA)
+        MC = np.where(same, square.MC, result.MC)
+        SG = None if result.SG is None else np.where(same, square.SG, result.SG)
+        return _result(IA, MC, SG)
+    return _from_batch(result)
+
+def _matmul(A, B, budget=2**20):
+    '''
+    A @ B of two MCArrays: the products A[i,k]*B[k,j] on a (k, m, p) grid, summed over k.
+    The contraction axis is split in blocks of about budget products times subgradient entries,
+    so the grid stays small for long inner products.
+    '''
+
+    if not 1 <= A.ndim <= 2 or not 1 <= B.ndim <= 2:
+        raise ValueError('matmul needs 1-D or 2-D operands')
+    a = A.reshape(1, -1) if A.ndim == 1 else A
+    b = B.reshape(-1, 1) if B.ndim == 1 else B
+    (m, K), (k, p) = a.shape, b.shape
+    if K != k:
+        raise ValueError('matmul: shapes %r and %r are not aligned' % (A.shape, B.shape))
+
+    n = 1 if a.SG is None or b.SG is None else a.SG.shape[0] + 1
+    block = max(1, budget//(m*p*n))
+    aT = a.T
+    total = None
+    for start in range(0, k, block):
+        stop = min(k, start + block)
+        products = _product(*_broadcast(aT[start:stop].reshape(stop - start, m, 1), b[start:stop].reshape(stop - start, 1, p)))
+        partial = products.sum(axis=0)
+        total = partial if total is None else total + partial
+
+    if A.ndim == 1 and B.ndim == 1:
+        return total[0, 0]
+    elif A.ndim == 1:
+        return total[0]
+    elif B.ndim == 1:
+        return total[:, 0]
+    return total
+
+def _linear(A, C):
+    '''
+    A @ C for a constant matrix C: with C = C+ + C- split by sign, LB = LB_A @ C+ + UB_A @ C-,
+    UB = UB_A @ C+ + LB_A @ C-, and likewise for cv/cc and their subgradients
+    '''
+
+    if not 1 <= A.ndim <= 2 or not 1 <= C.ndim <= 2:
+        raise ValueError('matmul needs 1-D or 2-D operands')
+    if A.shape[-1] != C.shape[0]:
+        raise ValueError('matmul: shapes %r and %r are not aligned' % (A.shape, C.shape))
+    positive = np.maximum(C, 0)
+    negative = np.minimum(C, 0)
+    IA = np.array([A.IA[0] @ positive + A.IA[1] @ negative, A.IA[1] @ positive + A.IA[0] @ negative])
+    MC = np.array([A.MC[0] @ positive + A.MC[1] @ negative, A.MC[1] @ positive + A.MC[0] @ negative])
+    SG = None
+    if A.SG is not None:
+        SG = np.stack([A.SG[:,0] @ positive + A.SG[:,1] @ negative,
+                       A.SG[:,1] @ positive + A.SG[:,0] @ negative], axis=1)
+    return _result(IA, MC, SG)
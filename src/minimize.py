@@ -0,0 +1,153 @@
+'''
+Minimization of the convex relaxation of a factorable function over a box, for lower bounds.
+
+Every iteration evaluates the convex relaxation cv and its subgradient SG[:,0] at a point x of the
+box (relaxation point MC = [x, x]). The affine cut cv(x) + SG_cv*(y - x) underestimates the
+function on the whole box, so the minimum of a cut over the box (or of the maximum of all cuts,
+in the cutting-plane mode) is a valid lower bound at every iteration, as is the interval bound.
+The points are chosen by projected subgradient steps or by Kelley's cutting-plane method.
+'''
+
+import math
+import time
+import numpy as np
+from tape import Tape, trace
+from compiler import compile_tape
+
+class RelaxationResult:
+    '''
+    result of minimize_relaxation
+    x           point with the lowest convex relaxation found
+    value       convex relaxation at x, an upper estimate of the minimum of the relaxation
+    lower       valid lower bound of the function on the box
+    iterations  number of relaxation evaluations
+    time        wall time in seconds
+    status      'converged', 'pruned' (lower above the incumbent), 'iteration limit' or 'time limit'
+    cuts        affine cuts (a, g) with f(y) >= a + g*y on the box, for warm starts
+    '''
+
+    def __init__(self, x, value, lower, iterations, time, status, cuts):
+        self.x = x
+        self.value = value
+        self.lower = lower
+        self.iterations = iterations
+        self.time = time
+        self.status = status
+        self.cuts = cuts
+
+    def __repr__(self):
+        return 'RelaxationResult(status=%r, lower=%r, value=%r, x=%s, iterations=%d, time=%.6f)' % (
+            self.status, self.lower, self.value, np.array2string(self.x), self.iterations, self.time)
+
+
+def minimize_relaxation(fun, box, x0=None, method='subgradient', step='polyak', step_size=0.5,
+                        max_iter=100, atol=1e-6, rtol=1e-6, incumbent=None, max_time=None, warm_start=None):
+    '''
+    minimize the convex relaxation of fun over box, a sequence of [LB, UB] per variable.
+    fun is a python function of the variables (written as for MCSGPy, see tape.trace) or a Tape.
+    method     'subgradient' (projected subgradient steps) or 'kelley' (cutting planes, needs scipy)
+    step       step-size rule of the subgradient method, along -d/|d| where d is SG_cv without the
+               components that push against an active bound of the box:
+               'polyak'       (cv(x) - target)/|d| towards the target level value - delta (at least lower),
+                              delta starts at step_size*(value - lower) and halves after every iteration
+                              that does not lower value
+               'constant'     step_size*diameter of the box
+               'diminishing'  step_size*diameter/sqrt(k+1)
+    x0         starting point, the box midpoint by default
+    warm_start RelaxationResult of a parent node: its point is the starting point (projected on the box),
+               and the kelley mode starts from its cuts, which stay valid on a sub-box
+    incumbent  stop as soon as the lower bound exceeds it (the box can be pruned)
+    Stops when value - lower <= max(atol, rtol*|value|), or at max_iter/max_time.
+    '''
+
+    start = time.perf_counter()
+    box = np.array(box, dtype=float)
+    LB, UB = box[:,0], box[:,1]
+    tape = fun if type(fun) == Tape else trace(fun, len(box))
+    relaxation = compile_tape(tape, subgradient=True).function
+    if method not in ('subgradient', 'kelley'):
+        raise ValueError('method must be subgradient or kelley')
+    if step not in ('polyak', 'constant', 'diminishing'):
+        raise ValueError('step must be polyak, constant or diminishing')
+
+    if x0 is None:
+        x0 = warm_start.x if warm_start is not None else (LB + UB)/2
+    x = np.clip(np.array(x0, dtype=float), LB, UB)
+    cuts = list(warm_start.cuts) if warm_start is not None and method == 'kelley' else []
+    diameter = np.linalg.norm(UB - LB)
+    lower = -math.inf
+    value = math.inf
+    delta = None
+    x_best = x
+    status = 'iteration limit'
+
+    iterations = 0
+    while iterations < max_iter:
+        point = x.tolist()
+        l, u, cv, cc, SG_cv, SG_cc = relaxation(LB.tolist(), UB.tolist(), point, point)
+        g = np.array(SG_cv, dtype=float)
+        iterations += 1
+
+        progress = cv < value
+        if progress:
+            value, x_best = cv, x
+        a = cv - g @ x
+        lower = max(lower, l)
+        if method == 'subgradient':
+            lower = max(lower, a + np.minimum(g*LB, g*UB).sum())
+        else:
+            cuts.append((a, g))
+            x, model = _kelley(cuts, LB, UB)
+            lower = max(lower, model)
+
+        if incumbent is not None and lower > incumbent:
+            status = 'pruned'
+            break
+        if value - lower <= max(atol, rtol*abs(value)):
+            status = 'converged'
+            break
+        if max_time is not None and time.perf_counter() - start > max_time:
+            status = 'time limit'
+            break
+
+        if method == 'subgradient':
+            #components pushing against an active bound are dropped, so the step length is not spent on them
+            d = np.where(((x <= LB) & (g > 0)) | ((x >= UB) & (g < 0)), 0.0, g)
+            norm = np.linalg.norm(d)
+            if norm == 0:
+                break
+            if step == 'polyak':
+                #the current lower bound as target overshoots as long as it is loose, so the target
+                #level sits delta below the best value and delta shrinks when a step brings no progress
+                if delta is None:
+                    delta = step_size*(value - lower)
+                elif not progress:
+                    delta /= 2
+                length = (cv - max(value - delta, lower))/norm
+            elif step == 'constant':
+                length = step_size*diameter
+            else:
+                length = step_size*diameter/math.sqrt(iterations)
+            x = np.clip(x - length*d/norm, LB, UB)
+
+    return RelaxationResult(x_best, value, min(lower, value), iterations, time.perf_counter() - start, status, cuts)
+
+def _kelley(cuts, LB, UB):
+    '''
+    minimizer and minimum over the box of the cutting-plane model max_k a_k + g_k*y:
+    the LP min t s.t. g_k*y - t <= -a_k, LB <= y <= UB
+    '''
+
+    try:
+        from scipy.optimize import linprog
+    except ImportError:
+        raise ImportError('the kelley mode of minimize_relaxation needs scipy')
+
+    n = len(LB)
+    c = np.zeros(n + 1)
+    c[-1] = 1
+    A = np.array([np.append(g, -1) for a, g in cuts])
+    b = np.array([-a for a, g in cuts])
+    bounds = [(LB[k], UB[k]) for k in range(n)] + [(None, None)]
+    result = linprog(c, A_ub=A, b_ub=b, bounds=bounds, method='highs')
+    return np.clip(result.x[:n], LB, UB), result.fun
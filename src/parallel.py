@@ -0,0 +1,130 @@
+'''
+Multi-core evaluation of a recorded expression on large sets of boxes.
+
+The boxes and relaxation points are copied once into shared memory, the index range is split
+into chunks over a process pool and every worker writes its IA/MC/SG block directly into a shared
+output array, so no MCSGPy/np.matrix object is pickled. Workers evaluate the vectorized compiled
+function of the tape (compiler.py), small batches are evaluated in-process. Given the path of a tape
+file (serialize.py), the workers memory-map the file instead of receiving the pickled tape.
+'''
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from batch import MCBatchPy
+from compiler import compile_tape
+from serialize import load
+
+_worker = {}
+
+class BoxEvaluator:
+    '''
+    BoxEvaluator keeps a process pool whose workers have compiled the tape once.
+    Use it as a context manager, or call close() when done.
+    '''
+
+    def __init__(self, tape, subgradient=False, processes=None, min_batch=20000, chunks_per_process=4):
+        '''
+        Initialization:
+        tape         the recorded expression (tape.trace), or the path of a tape file (serialize.save)
+        subgradient  also compute the subgradients (unit seeds, n = tape.nvars)
+        processes    number of worker processes, os.cpu_count() by default
+        min_batch    batches smaller than this are evaluated in-process
+        '''
+
+        self.path = tape if type(tape) == str else None
+        self.tape = load(tape) if type(tape) == str else tape
+        self.subgradient = subgradient
+        self.processes = processes or os.cpu_count() or 1
+        self.min_batch = min_batch
+        self.chunks_per_process = chunks_per_process
+        self.compiled = compile_tape(self.tape, subgradient, vectorized=True)
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __call__(self, IA, MC):
+        '''
+        evaluate on IA/MC of shape (nvars, 2, N), returns an MCBatchPy of the N results
+        '''
+
+        IA = np.ascontiguousarray(IA, dtype=float)
+        MC = np.ascontiguousarray(MC, dtype=float)
+        N = IA.shape[2]
+        if self.processes == 1 or N < self.min_batch:
+            return self.compiled(IA, MC)
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.processes, initializer=_initialize,
+                                            initargs=(self.path or self.tape, self.subgradient))
+
+        shapes = [IA.shape, MC.shape, (2, N), (2, N)]
+        if self.subgradient:
+            shapes.append((self.tape.nvars, 2, N))
+        segments = [shared_memory.SharedMemory(create=True, size=max(1, 8*int(np.prod(shape)))) for shape in shapes]
+        try:
+            views = [np.ndarray(shape, dtype=float, buffer=segment.buf) for shape, segment in zip(shapes, segments)]
+            views[0][...] = IA
+            views[1][...] = MC
+
+            names = [segment.name for segment in segments]
+            bounds = np.linspace(0, N, self.processes*self.chunks_per_process + 1).astype(int)
+            futures = [self.pool.submit(_evaluate_chunk, names, shapes, start, stop)
+                       for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+            for future in futures:
+                future.result()
+
+            result = MCBatchPy(views[2].copy(), views[3].copy(), views[4].copy() if self.subgradient else None)
+        finally:
+            #views must be released before the segments can be closed
+            views = None
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+        return result
+
+
+def evaluate_boxes(tape, IA, MC, subgradient=False, processes=None, min_batch=20000):
+    '''
+    one-off evaluation of the tape on IA/MC of shape (nvars, 2, N) with a temporary BoxEvaluator
+    '''
+
+    with BoxEvaluator(tape, subgradient, processes, min_batch) as evaluator:
+        return evaluator(IA, MC)
+
+def _initialize(tape, subgradient):
+    '''
+    worker initializer: compile the tape (or the tape file at the path tape) once per process
+    '''
+
+    if type(tape) == str:
+        tape = load(tape)
+    _worker['compiled'] = compile_tape(tape, subgradient, vectorized=True)
+
+def _evaluate_chunk(names, shapes, start, stop):
+    '''
+    evaluate boxes start:stop and write the results into the shared output arrays
+    '''
+
+    segments = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        views = [np.ndarray(shape, dtype=float, buffer=segment.buf) for shape, segment in zip(shapes, segments)]
+        result = _worker['compiled'](views[0][:, :, start:stop], views[1][:, :, start:stop])
+        views[2][:, start:stop] = result.IA
+        views[3][:, start:stop] = result.MC
+        if len(views) == 5:
+            views[4][:, :, start:stop] = result.SG
+    finally:
+        views = result = None
+        for segment in segments:
+            segment.close()
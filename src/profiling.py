@@ -0,0 +1,322 @@
+'''
+Opt-in profiling of the McCormick rules of MC.py: calls, wall time, allocations and subgradient branches.
+
+profile() replaces the instrumented rules (MCPy/MCSGPy.__mul__ and __pow__, eq_mul, exp, log, sqrt,
+swap_elements, swap_columns) by counting wrappers, in the classes and in every module that holds a
+reference to them (e.g. after from MC import exp), and puts the originals back on exit.
+Nothing is patched outside of the context, so the rules run at full speed when profiling is off.
+'''
+
+import functools
+import math
+import sys
+import time
+import tracemalloc
+from collections import Counter
+import MC
+import rules
+from MC import MCPy, MCSGPy, mid
+
+_active = None
+
+class RuleStats:
+    '''
+    counters of one rule
+    calls      number of calls
+    time       wall time in seconds, including the rules called inside (e.g. eq_mul in MCSGPy.__mul__)
+    allocated  bytes allocated at the peak of each call, summed over the calls (profile(memory=True) only)
+    branches   Counter of the branches taken, e.g. 'cv:sigma_uu', 'cc:sigma_oo', 'cv:alpha' or 'scalar'
+    '''
+
+    __slots__ = ('calls', 'time', 'allocated', 'branches')
+
+    def __init__(self):
+        self.calls = 0
+        self.time = 0.0
+        self.allocated = 0
+        self.branches = Counter()
+
+    def __repr__(self):
+        return 'RuleStats(calls=%d, time=%.6f, allocated=%d, branches=%r)' % (
+            self.calls, self.time, self.allocated, dict(self.branches))
+
+
+class Profile:
+    '''
+    Profile collects one RuleStats per rule while it is active, e.g.
+
+        with profiling.profile() as stats:
+            f(x1, x2)
+        print(stats.report())
+
+    The power rules are reported per branch, e.g. MCSGPy.__pow__(odd). The subgradient branches of the
+    univariate rules are the sigma selections: sigma_uu/sigma_uo multiply SG[:,0]/SG[:,1] of the operand
+    in the convex relaxation, sigma_ou/sigma_oo in the concave one, zero is the flat middle part and bound
+    the relaxation clipped at its interval bound (zero subgradient). The odd powers add :linear when sigma
+    is the slope of the linear part of their envelopes (utility.odd_power_envelopes). The labels follow
+    the box phases of rules.py, which take the branches of MC.py. eq_mul reports the alpha/beta and
+    gamma/delta underestimator taken, or bound if the interval bound is active.
+    '''
+
+    def __init__(self, callback=None, memory=False):
+        '''
+        Initialization:
+        callback  called after every instrumented call as callback(rule, time, allocated, branches)
+        memory    trace allocations with tracemalloc (slow, started and stopped with the context)
+        '''
+
+        self.callback = callback
+        self.memory = memory
+        self.rules = {}
+        self._undo = []
+        self._peaks = []
+        self._tracing = False
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError('profiling is already active')
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._undo = _install(self)
+        _active = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        for owner, name, value in reversed(self._undo):
+            if type(owner) == dict:
+                owner[name] = value
+            else:
+                setattr(owner, name, value)
+        self._undo = []
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        _active = None
+        return False
+
+    def record(self, rule, elapsed, allocated, branches):
+        stats = self.rules.get(rule)
+        if stats is None:
+            stats = self.rules[rule] = RuleStats()
+        stats.calls += 1
+        stats.time += elapsed
+        stats.allocated += allocated
+        stats.branches.update(branches)
+        if self.callback is not None:
+            self.callback(rule, elapsed, allocated, branches)
+
+    def report(self):
+        '''
+        table of the rules sorted by total time
+        '''
+
+        lines = ['%-28s %9s %12s %12s %12s  %s' % ('rule', 'calls', 'time [ms]', 'per call [us]', 'allocated', 'branches')]
+        for rule, stats in sorted(self.rules.items(), key=lambda item: -item[1].time):
+            branches = ', '.join('%s %d' % item for item in stats.branches.most_common())
+            lines.append('%-28s %9d %12.3f %12.2f %12d  %s' % (
+                rule, stats.calls, 1e3*stats.time, 1e6*stats.time/stats.calls, stats.allocated, branches))
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return 'Profile(%s)' % ', '.join('%s: %d calls' % (rule, stats.calls) for rule, stats in self.rules.items())
+
+
+def profile(callback=None, memory=False):
+    '''
+    context manager that profiles the rules evaluated inside it, returns the Profile
+    '''
+
+    return Profile(callback, memory)
+
+def _wrap(stats, original, name, branches):
+    '''
+    counting wrapper of original: name(args) gives the rule name (None passes the call through
+    uncounted) and branches(args, result) the branch labels, both evaluated outside of the timing
+    '''
+
+    @functools.wraps(original)
+    def wrapper(*args):
+        rule = name(args)
+        if rule is None:
+            return original(*args)
+        if stats.memory:
+            start, peak = tracemalloc.get_traced_memory()
+            #the peak is reset per call, so the enclosing calls keep theirs on a stack
+            if stats._peaks:
+                stats._peaks[-1] = max(stats._peaks[-1], peak)
+            tracemalloc.reset_peak()
+            stats._peaks.append(start)
+        t0 = time.perf_counter()
+        result = original(*args)
+        elapsed = time.perf_counter() - t0
+        allocated = 0
+        if stats.memory:
+            peak = max(stats._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            allocated = peak - start
+            if stats._peaks:
+                stats._peaks[-1] = max(stats._peaks[-1], peak)
+        stats.record(rule, elapsed, allocated, branches(args, result) if branches else ())
+        return result
+
+    return wrapper
+
+def _install(stats):
+    '''
+    put the wrappers in place, returns the (owner, name, original) list to undo it
+    '''
+
+    undo = []
+    for cls in (MCPy, MCSGPy):
+        for attr, name, branches in (
+                ('__mul__', _named(cls.__name__ + '.__mul__'), _mul_kind),
+                ('__pow__', _pow_name(cls.__name__), _pow_branches if cls == MCSGPy else None)):
+            original = cls.__dict__[attr]
+            setattr(cls, attr, _wrap(stats, original, name, branches))
+            undo.append((cls, attr, original))
+
+    functions = {
+        'eq_mul': (_named('eq_mul'), _eq_mul_branches),
+        'exp': (_relaxation('exp'), _univariate('exp')),
+        'log': (_relaxation('log'), _univariate('log')),
+        'sqrt': (_relaxation('sqrt'), _univariate('sqrt')),
+        'swap_elements': (_named('swap_elements'), None),
+        'swap_columns': (_named('swap_columns'), None),
+    }
+    wrappers = {}
+    for attr, (name, branches) in functions.items():
+        original = getattr(MC, attr)
+        wrappers[id(original)] = (original, _wrap(stats, original, name, branches))
+
+    #every module-level reference, so that from MC import exp is profiled as well
+    for module in list(sys.modules.values()):
+        namespace = getattr(module, '__dict__', None)
+        if type(namespace) != dict:
+            continue
+        for attr, value in list(namespace.items()):
+            entry = wrappers.get(id(value))
+            if entry is not None and entry[0] is value:
+                namespace[attr] = entry[1]
+                undo.append((namespace, attr, value))
+    return undo
+
+def _named(rule):
+    return lambda args: rule
+
+def _relaxation(rule):
+    #MC.log(float) and friends fall through to math, e.g. inside MC.log itself
+    return lambda args: rule if type(args[0]) in (MCPy, MCSGPy) else None
+
+def _pow_name(cls):
+    return lambda args: '%s.__pow__(%s)' % (cls, _pow_branch(args[1]))
+
+def _pow_branch(power):
+    try:
+        return rules.power_kind(power)
+    except ValueError:
+        return 'unsupported'
+
+_CV_SIGMA = {0: 'cv:sigma_uu', 1: 'cv:sigma_uo', None: 'cv:zero', 'bound': 'cv:bound'}
+_CC_SIGMA = {0: 'cc:sigma_ou', 1: 'cc:sigma_oo', None: 'cc:zero', 'bound': 'cc:bound'}
+
+def _select(bound, x_cv, x_cc, MC):
+    '''
+    branch of the convex and of the concave relaxation as the rules take it: 'bound' if the interval bound
+    is active (bound = (LB > cv_val, UB < cc_val)), else the column of SG multiplied by sigma, selected by
+    the minimizer x_cv of the convex and the maximizer x_cc of the concave relaxation (None: zero)
+    '''
+
+    cv = 'bound' if bound[0] else 1 if x_cv > MC[1] else 0 if x_cv <= MC[0] else None
+    cc = 'bound' if bound[1] else 1 if x_cc >= MC[1] else 0 if x_cc < MC[0] else None
+    return cv, cc
+
+def _labels(cv, cc, linear=(False, False)):
+    #linear: the sigma is the slope of the linear part of the odd power envelopes
+    return (_CV_SIGMA[cv] + (':linear' if linear[0] and cv in (0, 1) else ''),
+            _CC_SIGMA[cc] + (':linear' if linear[1] and cc in (0, 1) else ''))
+
+def _univariate(rule):
+    '''
+    branch labels of MC.exp, MC.log or MC.sqrt, from the box phase of the rule in rules.py
+    '''
+
+    box, f = {'exp': (rules.exp_box, math.exp), 'log': (rules.log_box, math.log), 'sqrt': (rules.sqrt_box, math.sqrt)}[rule]
+
+    def branches(args, result):
+        x = args[0]
+        if type(x) != MCSGPy:
+            return ()
+        cv, cc = x.MC
+        LB, UB, lb, ub, slope = box(x.IA)
+        if rule == 'exp':
+            cv_val, cc_val = f(cv), slope*(cc-lb)+LB
+        else:
+            cv_val, cc_val = slope*(mid(cv, cc, lb)-lb)+LB, f(mid(cv, cc, ub))
+        return _labels(*_select((LB > cv_val, UB < cc_val), lb, ub, x.MC))
+
+    return branches
+
+def _pow_branches(args, result):
+    x, power = args
+    cv, cc = x.MC
+    branch = _pow_branch(power)
+    if branch == 'even':
+        LB, UB, power, lb, xmin, xmax, slope, f_lb = rules.pow_even_box(x.IA, power)
+        #the bound test of the concave relaxation takes the secant through cv, as the rule does
+        bound = (LB > mid(cv, cc, xmin)**power, UB < cv**power + slope*(mid(cv, cc, xmax)-cv))
+        return _labels(*_select(bound, xmin, xmax, x.MC))
+    elif branch == 'odd':
+        LB, UB, power, lb, ub, t_cv, slope_cv, t_cc, slope_cc = rules.pow_odd_box(x.IA, power)
+        cv_arg, cc_arg = mid(cv, cc, lb), mid(cv, cc, ub)
+        cv_val = cv_arg**power if cv_arg > t_cv else LB + slope_cv*(cv_arg-lb)
+        cc_val = cc_arg**power if cc_arg < t_cc else UB + slope_cc*(cc_arg-ub)
+        cv_side, cc_side = _select((LB > cv_val, UB < cc_val), lb, ub, x.MC)
+        #sigma is the power rule at the point of its column, the envelope slope past the tangent point
+        linear = (cv_side in (0, 1) and not x.MC[cv_side] > t_cv, cc_side in (0, 1) and not x.MC[cc_side] < t_cc)
+        return _labels(cv_side, cc_side, linear)
+    elif branch == 'negative':
+        LB, UB, power, lb, f_lb, slope, convex, xmin, xmax = rules.pow_neg_box(x.IA, power)
+        cv_arg, cc_arg = mid(cv, cc, xmin), mid(cv, cc, xmax)
+        if convex:
+            cv_val, cc_val = cv_arg**power, f_lb + slope*(cc_arg-lb)
+        else:
+            cv_val, cc_val = f_lb + slope*(cv_arg-lb), cc_arg**power
+        return _labels(*_select((LB > cv_val, UB < cc_val), xmin, xmax, x.MC))
+    elif branch == 'inv':
+        d = rules.inv_box(x.IA)
+        LB, UB, lb, ub, slope, f_lb = d[3:]
+        MC = (-cc, -cv) if d[2] else (cv, cc)
+        bound = (LB > 1/mid(MC[0], MC[1], ub), UB < slope*(mid(MC[0], MC[1], lb)-lb)+f_lb)
+        cv_side, cc_side = _select(bound, ub, lb, MC)
+        if d[2]:
+            #the rule works on -x, whose columns are swapped, and negates the result
+            flip = {0: 1, 1: 0}
+            cv_side, cc_side = flip.get(cc_side, cc_side), flip.get(cv_side, cv_side)
+        return _labels(cv_side, cc_side)
+    return ()
+
+def _mul_kind(args, result):
+    x, y = args
+    if type(y) == type(x):
+        return ('square',) if x == y else ('bilinear',)
+    return ('scalar',) if y >= 0 else ('negative scalar',)
+
+def _eq_mul_branches(args, result):
+    IA1, IA2, MC1, MC2 = args[:4]
+    min_value, max_value = result[:2]
+    cv_alpha = min(IA2[0]*MC1[0], IA2[0]*MC1[1]) + min(IA1[0]*MC2[0], IA1[0]*MC2[1]) - IA1[0]*IA2[0]
+    cv_beta = min(IA2[1]*MC1[0], IA2[1]*MC1[1]) + min(IA1[1]*MC2[0], IA1[1]*MC2[1]) - IA1[1]*IA2[1]
+    cc_gamma = max(IA2[0]*MC1[0], IA2[0]*MC1[1]) + max(IA1[1]*MC2[0], IA1[1]*MC2[1]) - IA1[1]*IA2[0]
+    cc_delta = max(IA2[1]*MC1[0], IA2[1]*MC1[1]) + max(IA1[0]*MC2[0], IA1[0]*MC2[1]) - IA1[0]*IA2[1]
+
+    if min_value > max(cv_alpha, cv_beta):
+        cv = 'cv:bound'
+    else:
+        cv = 'cv:alpha' if cv_alpha >= cv_beta else 'cv:beta'
+    if max_value < min(cc_gamma, cc_delta):
+        cc = 'cc:bound'
+    else:
+        cc = 'cc:gamma' if cc_gamma <= cc_delta else 'cc:delta'
+    return cv, cc
@@ -0,0 +1,543 @@
+'''
+McCormick rules of MC.py written on plain python floats.
+
+Every rule takes its operands as tuples (LB, UB, cv, cc) and returns the result tuple together
+with the local subgradient map of each operand. A map J = (a, b, c, d) means
+SG_cv = a*SG[:,0] + b*SG[:,1] and SG_cc = c*SG[:,0] + d*SG[:,1],
+i.e. it records which branch the rule took and the sigma it used.
+The results are the same as MCPy/MCSGPy, branch for branch.
+
+Every rule is split into a box phase and a point phase:
+<rule>_box(x[, c])  takes the operand bounds (x[0], x[1]) and returns the data of the rule that depend
+                    on the box only, a tuple starting with (LB, UB) of the result (secant slopes,
+                    f(LB), xmin/xmax, the tangents of the odd powers, the corner products of mul)
+<rule>_point(d, x)  takes that data and the operand point x = (cv, cc) and returns (cv, cc) of the
+                    result with the subgradient maps
+<rule>(x) composes the two; incremental.py keeps the box phase of a fixed box and reruns the point phase.
+'''
+
+import math
+from utility import odd_power_envelopes, mid
+
+IDENTITY = (1, 0, 0, 1)
+NEGATE = (0, -1, -1, 0)
+ZERO = (0, 0, 0, 0)
+
+def compose(J2, J1):
+    '''
+    subgradient map of applying J1 first and J2 afterwards
+    '''
+
+    a2, b2, c2, d2 = J2
+    a1, b1, c1, d1 = J1
+    return (a2*a1 + b2*c1, a2*b1 + b2*d1, c2*a1 + d2*c1, c2*b1 + d2*d1)
+
+def secant(f_lb, f_ub, lb, ub, derivative):
+    '''
+    slope of the secant, on a degenerate interval lb == ub its limit: derivative(lb)
+    '''
+
+    if ub == lb:
+        return derivative(lb)
+    return (f_ub - f_lb)/(ub - lb)
+
+def _log_derivative(x):
+    return 1/x
+
+def _sqrt_derivative(x):
+    return 0.5/math.sqrt(x) if x > 0 else math.inf
+
+def add(x, y):
+    '''
+    addition of two relaxations
+    '''
+
+    d = add_box(x, y)
+    (CV, CC), Jx, Jy = add_point(d, x[2:], y[2:])
+    return (d[0], d[1], CV, CC), Jx, Jy
+
+def add_box(x, y):
+    return (x[0]+y[0], x[1]+y[1])
+
+def add_point(d, x, y):
+    return (x[0]+y[0], x[1]+y[1]), IDENTITY, IDENTITY
+
+def addc(x, c):
+    '''
+    addition of a constant
+    '''
+
+    d = addc_box(x, c)
+    (CV, CC), J = addc_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def addc_box(x, c):
+    return (x[0]+c, x[1]+c, c)
+
+def addc_point(d, x):
+    c = d[2]
+    return (x[0]+c, x[1]+c), IDENTITY
+
+def mulc(x, c):
+    '''
+    multiplication by a constant, bounds and relaxations swap for c < 0
+    '''
+
+    d = mulc_box(x, c)
+    (CV, CC), J = mulc_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def mulc_box(x, c):
+    if c >= 0:
+        return (x[0]*c, x[1]*c, c)
+    else:
+        return (c*x[1], c*x[0], c)
+
+def mulc_point(d, x):
+    c = d[2]
+    if c >= 0:
+        return (x[0]*c, x[1]*c), (c, 0, 0, c)
+    else:
+        return (c*x[1], c*x[0]), (0, c, c, 0)
+
+def mul(x, y):
+    '''
+    bilinear product, same as utility.eq_mul
+    '''
+
+    d = mul_box(x, y)
+    (CV, CC), Jx, Jy = mul_point(d, x[2:], y[2:])
+    return (d[0], d[1], CV, CC), Jx, Jy
+
+def mul_box(x, y):
+    lb1, ub1 = x[0], x[1]
+    lb2, ub2 = y[0], y[1]
+    products = (lb1*lb2, lb1*ub2, ub1*lb2, ub1*ub2)
+    return (min(products), max(products), lb1, ub1, lb2, ub2) + products
+
+def mul_point(d, x, y):
+    min_value, max_value, lb1, ub1, lb2, ub2, ll, lu, ul, uu = d
+    cv1, cc1 = x
+    cv2, cc2 = y
+
+    cv_alpha = min(lb2*cv1, lb2*cc1) + min(lb1*cv2, lb1*cc2) - ll
+    cv_beta  = min(ub2*cv1, ub2*cc1) + min(ub1*cv2, ub1*cc2) - uu
+    cc_gamma = max(lb2*cv1, lb2*cc1) + max(ub1*cv2, ub1*cc2) - ul
+    cc_delta = max(ub2*cv1, ub2*cc1) + max(lb1*cv2, lb1*cc2) - lu
+
+    cv = max(min_value, max(cv_alpha, cv_beta))
+    cc = min(max_value, min(cc_gamma, cc_delta))
+
+    #the cv rows pick column 0 of a nonnegative multiplier, the cc rows column 1
+    if min_value > max(cv_alpha, cv_beta):
+        x_cv = y_cv = (0, 0)
+    elif cv_alpha >= cv_beta:
+        x_cv = (lb2, 0) if lb2 >= 0 else (0, lb2)
+        y_cv = (lb1, 0) if lb1 >= 0 else (0, lb1)
+    else:
+        x_cv = (ub2, 0) if ub2 >= 0 else (0, ub2)
+        y_cv = (ub1, 0) if ub1 >= 0 else (0, ub1)
+
+    if max_value < min(cc_gamma, cc_delta):
+        x_cc = y_cc = (0, 0)
+    elif cc_gamma <= cc_delta:
+        x_cc = (0, lb2) if lb2 >= 0 else (lb2, 0)
+        y_cc = (0, ub1) if ub1 >= 0 else (ub1, 0)
+    else:
+        x_cc = (0, ub2) if ub2 >= 0 else (ub2, 0)
+        y_cc = (0, lb1) if lb1 >= 0 else (lb1, 0)
+
+    return (cv, cc), x_cv + x_cc, y_cv + y_cc
+
+def pow_even(x, power):
+    '''
+    positive even integer power
+    '''
+
+    d = pow_even_box(x, power)
+    (CV, CC), J = pow_even_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def pow_even_box(x, power):
+    lb, ub = x[0], x[1]
+    xmin = mid(lb, ub, 0)
+    xmax = max(abs(lb), abs(ub))
+    slope = secant(lb**power, ub**power, lb, ub, lambda x: power*x**(power-1))
+    return (xmin**power, max(lb**power, ub**power), power, lb, xmin, xmax, slope, lb**power)
+
+def pow_even_point(d, x):
+    LB, UB, power, lb, xmin, xmax, slope, f_lb = d
+    cv, cc = x
+
+    cv_arg = mid(cv, cc, xmin)
+    cc_arg = mid(cv, cc, xmax)
+    CV = max(LB, cv_arg**power)
+    CC = min(UB, f_lb + slope*(cc_arg-lb))
+
+    if LB > cv_arg**power:
+        J_cv = (0, 0)
+    elif xmin > cc:
+        J_cv = (0, power*cc**(power-1))
+    elif xmin <= cv:
+        J_cv = (power*cv**(power-1), 0)
+    else:
+        J_cv = (0, 0)
+
+    if UB < cv**power + slope*(cc_arg-cv):
+        J_cc = (0, 0)
+    elif xmax >= cc:
+        J_cc = (0, slope)
+    elif xmax < cv:
+        J_cc = (slope, 0)
+    else:
+        J_cc = (0, 0)
+
+    return (CV, CC), J_cv + J_cc
+
+def inv(x):
+    '''
+    power -1, a negative domain is mirrored to the positive one and back
+    '''
+
+    d = inv_box(x)
+    (CV, CC), J = inv_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def inv_box(x):
+    lb, ub = x[0], x[1]
+    if lb*ub <= 0:
+        raise ValueError('1/x cannot contain domain 0')
+
+    if ub <= 0:
+        d = inv_box((-1*ub, -1*lb))
+        return (-1*d[1], -1*d[0], True) + d[3:]
+
+    LB = min(1/lb, 1/ub)
+    UB = max(1/lb, 1/ub)
+    slope = secant(1/lb, 1/ub, lb, ub, lambda x: -1/x**2)
+    return (LB, UB, False, LB, UB, lb, ub, slope, 1/lb)
+
+def inv_point(d, x):
+    if d[2]:
+        #negative domain: the rule of the positive domain on -x, negated
+        (CV, CC), J = _inv_positive(d[3:], (-1*x[1], -1*x[0]))
+        return (-1*CC, -1*CV), compose(NEGATE, compose(J, NEGATE))
+    return _inv_positive(d[3:], x)
+
+def _inv_positive(d, x):
+    LB, UB, lb, ub, slope, f_lb = d
+    cv, cc = x
+
+    xmin = ub
+    xmax = lb
+    cv_arg = mid(cv, cc, xmin)
+    cc_arg = mid(cv, cc, xmax)
+    cc_val = slope*(cc_arg-lb)+f_lb
+    CV = max(LB, 1/cv_arg)
+    CC = min(UB, cc_val)
+
+    if LB > 1/cv_arg:
+        J_cv = (0, 0)
+    elif xmin > cc:
+        J_cv = (0, -1/cc**2)
+    elif xmin <= cv:
+        J_cv = (-1/cv**2, 0)
+    else:
+        J_cv = (0, 0)
+
+    if UB < cc_val:
+        J_cc = (0, 0)
+    elif xmax >= cc:
+        J_cc = (0, slope)
+    elif xmax < cv:
+        J_cc = (slope, 0)
+    else:
+        J_cc = (0, 0)
+
+    return (CV, CC), J_cv + J_cc
+
+def pow_odd(x, power):
+    '''
+    positive odd integer power, envelopes of utility.odd_power_envelopes
+    '''
+
+    d = pow_odd_box(x, power)
+    (CV, CC), J = pow_odd_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def pow_odd_box(x, power):
+    lb, ub = x[0], x[1]
+    return (lb**power, ub**power, power, lb, ub) + odd_power_envelopes(lb, ub, power)
+
+def pow_odd_point(d, x):
+    LB, UB, power, lb, ub, t_cv, slope_cv, t_cc, slope_cc = d
+    cv, cc = x
+
+    cv_arg = mid(cv, cc, lb)
+    cc_arg = mid(cv, cc, ub)
+    cv_val = cv_arg**power if cv_arg > t_cv else LB + slope_cv*(cv_arg-lb)
+    cc_val = cc_arg**power if cc_arg < t_cc else UB + slope_cc*(cc_arg-ub)
+    CV = max(LB, cv_val)
+    CC = min(UB, cc_val)
+
+    if LB > cv_val:
+        J_cv = (0, 0)
+    elif lb > cc:
+        J_cv = (0, power*cc**(power-1) if cc > t_cv else slope_cv)
+    elif lb <= cv:
+        J_cv = (power*cv**(power-1) if cv > t_cv else slope_cv, 0)
+    else:
+        J_cv = (0, 0)
+
+    if UB < cc_val:
+        J_cc = (0, 0)
+    elif ub >= cc:
+        J_cc = (0, power*cc**(power-1) if cc < t_cc else slope_cc)
+    elif ub < cv:
+        J_cc = (power*cv**(power-1) if cv < t_cc else slope_cc, 0)
+    else:
+        J_cc = (0, 0)
+
+    return (CV, CC), J_cv + J_cc
+
+def pow_neg(x, power):
+    '''
+    negative integer power below -1: convex and decreasing for x > 0; for x < 0 convex and
+    increasing if the power is even, concave and decreasing if it is odd
+    '''
+
+    d = pow_neg_box(x, power)
+    (CV, CC), J = pow_neg_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def pow_neg_box(x, power):
+    lb, ub = x[0], x[1]
+    if lb*ub <= 0:
+        raise ValueError('1/x cannot contain domain 0')
+
+    f_lb = lb**power
+    f_ub = ub**power
+    slope = secant(f_lb, f_ub, lb, ub, lambda x: power*x**(power-1))
+    convex = lb > 0 or power % 2 == 0
+    increasing = ub < 0 and power % 2 == 0
+    xmin = lb if increasing else ub
+    xmax = ub if increasing else lb
+    return (min(f_lb, f_ub), max(f_lb, f_ub), power, lb, f_lb, slope, convex, xmin, xmax)
+
+def pow_neg_point(d, x):
+    LB, UB, power, lb, f_lb, slope, convex, xmin, xmax = d
+    cv, cc = x
+
+    cv_arg = mid(cv, cc, xmin)
+    cc_arg = mid(cv, cc, xmax)
+    if convex:
+        cv_val = cv_arg**power
+        cc_val = f_lb + slope*(cc_arg-lb)
+        sigma_uu, sigma_uo = power*cv**(power-1), power*cc**(power-1)
+        sigma_ou, sigma_oo = slope, slope
+    else:
+        cv_val = f_lb + slope*(cv_arg-lb)
+        cc_val = cc_arg**power
+        sigma_uu, sigma_uo = slope, slope
+        sigma_ou, sigma_oo = power*cv**(power-1), power*cc**(power-1)
+    CV = max(LB, cv_val)
+    CC = min(UB, cc_val)
+
+    if LB > cv_val:
+        J_cv = (0, 0)
+    elif xmin > cc:
+        J_cv = (0, sigma_uo)
+    elif xmin <= cv:
+        J_cv = (sigma_uu, 0)
+    else:
+        J_cv = (0, 0)
+
+    if UB < cc_val:
+        J_cc = (0, 0)
+    elif xmax >= cc:
+        J_cc = (0, sigma_oo)
+    elif xmax < cv:
+        J_cc = (sigma_ou, 0)
+    else:
+        J_cc = (0, 0)
+
+    return (CV, CC), J_cv + J_cc
+
+def integer_power(x, power):
+    '''
+    integer power other than 0, 1 and -1, dispatched to the even, odd and negative rules
+    '''
+
+    box, point = integer_power_rule(power)
+    d = box(x, power)
+    (CV, CC), J = point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def integer_power_rule(power):
+    '''
+    (box, point) phases of the integer power rule of power
+    '''
+
+    kind = power_kind(power)
+    if kind not in POWER_RULES:
+        raise ValueError('This power rule is not supported yet.')
+    return POWER_RULES[kind]
+
+def power_kind(power):
+    '''
+    rule of x**power: 'even' (positive even), 'inv' (-1), 'one' (1), 'odd' (odd above 2) or
+    'negative' (integer below -1). Every power operator dispatches on it; other exponents
+    (0, non-integers) raise ValueError.
+    '''
+
+    if power % 2 == 0 and power > 0:
+        return 'even'
+    elif power == -1:
+        return 'inv'
+    elif power == 1:
+        return 'one'
+    elif power % 2 == 1 and power > 2:
+        return 'odd'
+    elif power < -1 and power == int(power):
+        return 'negative'
+    else:
+        raise ValueError('This power rule is not supported yet.')
+
+def log(x):
+    '''
+    natural logarithm
+    '''
+
+    d = log_box(x)
+    (CV, CC), J = log_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def log_box(x):
+    lb, ub = x[0], x[1]
+    LB = math.log(lb)
+    UB = math.log(ub)
+    return (LB, UB, lb, ub, secant(LB, UB, lb, ub, _log_derivative))
+
+def log_point(d, x):
+    (CV, CC), J_cv, cc_val = _concave_point(d, x, math.log)
+    UB, ub = d[1], d[3]
+    cv, cc = x
+
+    if UB < cc_val:
+        J_cc = (0, 0)
+    elif ub >= cc:
+        J_cc = (0, 1/cc)
+    elif ub < cv:
+        J_cc = (1/cv, 0)
+    else:
+        J_cc = (0, 0)
+
+    return (CV, CC), J_cv + J_cc
+
+def sqrt(x):
+    '''
+    square root
+    '''
+
+    d = sqrt_box(x)
+    (CV, CC), J = sqrt_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def sqrt_box(x):
+    lb, ub = x[0], x[1]
+    LB = math.sqrt(lb)
+    UB = math.sqrt(ub)
+    return (LB, UB, lb, ub, secant(LB, UB, lb, ub, _sqrt_derivative))
+
+def sqrt_point(d, x):
+    (CV, CC), J_cv, cc_val = _concave_point(d, x, math.sqrt)
+    UB, ub = d[1], d[3]
+    cv, cc = x
+
+    if UB < cc_val:
+        J_cc = (0, 0)
+    elif ub >= cc:
+        J_cc = (0, cc**(-1/2)/2)
+    elif ub < cv:
+        J_cc = (cv**(-1/2)/2, 0)
+    else:
+        J_cc = (0, 0)
+
+    return (CV, CC), J_cv + J_cc
+
+def _concave_point(d, x, f):
+    '''
+    common part of log and sqrt: secant underestimator and its subgradient map, f at the concave argument
+    '''
+
+    LB, UB, lb, ub, slope = d
+    cv, cc = x
+
+    cv_arg = mid(cv, cc, lb)
+    cc_arg = mid(cv, cc, ub)
+    cv_val = slope*(cv_arg-lb)+LB
+    cc_val = f(cc_arg)
+    CV = max(LB, cv_val)
+    CC = min(UB, cc_val)
+
+    if LB > cv_val:
+        J_cv = (0, 0)
+    elif lb > cc:
+        J_cv = (0, slope)
+    elif lb <= cv:
+        J_cv = (slope, 0)
+    else:
+        J_cv = (0, 0)
+
+    return (CV, CC), J_cv, cc_val
+
+def exp(x):
+    '''
+    exponential
+    '''
+
+    d = exp_box(x)
+    (CV, CC), J = exp_point(d, x[2:])
+    return (d[0], d[1], CV, CC), J
+
+def exp_box(x):
+    lb, ub = x[0], x[1]
+    LB = math.exp(lb)
+    UB = math.exp(ub)
+    return (LB, UB, lb, ub, secant(LB, UB, lb, ub, math.exp))
+
+def exp_point(d, x):
+    LB, UB, lb, ub, slope = d
+    cv, cc = x
+
+    cv_val = math.exp(cv)
+    cc_val = slope*(cc-lb)+LB
+    CV = max(LB, cv_val)
+    CC = min(UB, cc_val)
+
+    if LB > cv_val:
+        J_cv = (0, 0)
+    elif lb > cc:
+        J_cv = (0, math.exp(cc))
+    elif lb <= cv:
+        J_cv = (cv_val, 0)
+    else:
+        J_cv = (0, 0)
+
+    if UB < cc_val:
+        J_cc = (0, 0)
+    elif ub >= cc:
+        J_cc = (0, slope)
+    elif ub < cv:
+        J_cc = (slope, 0)
+    else:
+        J_cc = (0, 0)
+
+    return (CV, CC), J_cv + J_cc
+
+#(box, point) phases of the integer powers, see integer_power_rule
+POWER_RULES = {
+    'even': (pow_even_box, pow_even_point),
+    'odd': (pow_odd_box, pow_odd_point),
+    'negative': (pow_neg_box, pow_neg_point),
+}
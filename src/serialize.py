@@ -0,0 +1,115 @@
+'''
+Compact, versioned binary format of recorded expressions (tape.py), for fast worker startup.
+
+A tape file holds a fixed header and three flat arrays, one entry per node:
+    header   64 bytes: magic b'MCPYTAPE', version (uint16), nvars (uint32), nodes (uint32),
+             output (int32), the Tape.digest() as 20 raw bytes, zero padding
+    ops      uint8   opcode, with INTEGER set if the constant is a python int (exponents of POW, unused 0)
+    args     int32   (nodes, 2) operand indices, -1 if unused
+    consts   float64 constants, integers stored exactly
+all little-endian, every array starting on an 8 byte boundary. load() memory-maps the file and
+builds the Tape straight from the mapped arrays, without tracing the function again, so a worker
+process started with the path of the file (e.g. parallel.BoxEvaluator) can compile and evaluate at once.
+The loaded tape is the same as the saved one: equal nodes, constants of the same type, equal digest.
+'''
+
+import mmap
+import numbers
+import struct
+import numpy as np
+from tape import Tape
+
+MAGIC = b'MCPYTAPE'
+VERSION = 1
+#flag in the opcode byte: the constant of the node is an int
+INTEGER = 0x80
+
+_HEADER = struct.Struct('<8sHxxIIi20s')
+_HEADER_SIZE = 64
+
+def dumps(tape):
+    '''
+    bytes of the tape in the binary format
+    '''
+
+    if tape.output is None:
+        raise ValueError('the tape has no output')
+    nodes = len(tape.ops)
+    ops = np.array(tape.ops, dtype=np.uint8).reshape(nodes)
+    integer = np.array([isinstance(c, numbers.Integral) for c in tape.consts], dtype=bool).reshape(nodes)
+    consts = np.array(tape.consts, dtype='<f8').reshape(nodes)
+    if np.any(np.abs(consts[integer]) > 2**53):
+        raise ValueError('integer constant too large for the binary format')
+    ops[integer] |= INTEGER
+    args = np.array(tape.args, dtype='<i4').reshape(nodes, 2)
+
+    header = _HEADER.pack(MAGIC, VERSION, tape.nvars, nodes, tape.output, bytes.fromhex(tape.digest()))
+    parts = [header.ljust(_HEADER_SIZE, b'\0'), ops.tobytes(), b'\0'*(-nodes % 8), args.tobytes(), consts.tobytes()]
+    return b''.join(parts)
+
+def save(tape, path):
+    '''
+    write the tape to the file path, returns the number of bytes written
+    '''
+
+    data = dumps(tape)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+def loads(data, verify=False):
+    '''
+    Tape of the bytes (or any buffer) data, see dumps.
+    verify  recompute the digest and raise ValueError if it differs from the stored one
+    '''
+
+    if len(data) < _HEADER_SIZE:
+        raise ValueError('not a tape file: too short')
+    magic, version, nvars, nodes, output, digest = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not a tape file')
+    if version != VERSION:
+        raise ValueError('unsupported tape file version %d (supported: %d)' % (version, VERSION))
+    offset = _HEADER_SIZE + nodes + (-nodes % 8)
+    if len(data) != offset + 16*nodes:
+        raise ValueError('truncated tape file')
+
+    ops = np.frombuffer(data, dtype=np.uint8, count=nodes, offset=_HEADER_SIZE)
+    args = np.frombuffer(data, dtype='<i4', count=2*nodes, offset=offset)
+    consts = np.frombuffer(data, dtype='<f8', count=nodes, offset=offset + 8*nodes)
+
+    tape = Tape(nvars)
+    integer = (ops & INTEGER).astype(bool)
+    tape.ops = (ops & ~np.uint8(INTEGER)).tolist()
+    tape.args = list(zip(args[0::2].tolist(), args[1::2].tolist()))
+    #python floats and ints in one pass, as recorded
+    values = np.empty(nodes, dtype=object)
+    values[~integer] = consts[~integer]
+    values[integer] = consts[integer].astype(np.int64)
+    tape.consts = values.tolist()
+    tape.output = output
+    if verify and tape.digest() != digest.hex():
+        raise ValueError('tape file digest mismatch')
+    return tape
+
+def load(path, verify=False):
+    '''
+    Tape of the file path written by save, read through a memory map
+    '''
+
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            raise ValueError('not a tape file: empty')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return loads(data, verify)
+
+def digest(path):
+    '''
+    the Tape.digest() stored in the file path, read from its header only
+    '''
+
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER_SIZE)
+    if len(header) < _HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        raise ValueError('not a tape file')
+    return _HEADER.unpack_from(header)[5].hex()
@@ -0,0 +1,342 @@
+'''
+Local relaxation evaluation service with micro-batching, on asyncio and the standard library only.
+
+A RelaxationServer holds registered expressions (traced once and compiled, compiler.py) and serves
+box/point evaluation requests from in-process callers (RelaxationServer.evaluate) and from other
+processes over a Unix socket or TCP on localhost (connect/Client). Requests for the same model that
+arrive within window seconds are coalesced into one vectorized evaluation of up to max_batch boxes.
+A batch that raises (a domain error or an overflow of one box) is evaluated again box by box, so only
+the offending requests fail and every request is answered. RelaxationServer.metrics() reports the
+request and batch counts, the throughput and the latency percentiles.
+
+The wire protocol is one JSON object per line. Requests carry an id, echoed in the response:
+    {"id": 1, "op": "evaluate", "model": "f", "IA": [[LB, UB], ...], "MC": [[cv, cc], ...], "subgradient": true}
+    -> {"id": 1, "IA": [LB, UB], "MC": [cv, cc], "SG": [[SG_cv, SG_cc], ...]}  or  {"id": 1, "error": "...", "type": "ValueError"}
+    {"id": 2, "op": "models"}   -> {"id": 2, "models": {"f": nvars, ...}}
+    {"id": 3, "op": "metrics"}  -> {"id": 3, "metrics": {...}}
+'''
+
+import asyncio
+import json
+import time
+from collections import deque
+import numpy as np
+from MC import MCPy, MCSGPy
+from tape import Tape, trace
+from compiler import compile_tape
+
+class Metrics:
+    '''
+    counters of a RelaxationServer
+    requests   evaluation requests answered, errors among them
+    batches    vectorized evaluations, fallbacks the batches evaluated again box by box
+    latencies  seconds from the arrival of a request to its result, the last 10000
+    '''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.fallbacks = 0
+        self.latencies = deque(maxlen=10000)
+
+    def snapshot(self):
+        '''
+        dict of the counters, mean batch size, throughput in requests/sec and latency percentiles in ms
+        '''
+
+        elapsed = time.perf_counter() - self.started
+        latencies = 1e3*np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'fallbacks': self.fallbacks,
+            'mean_batch': self.requests/self.batches if self.batches else 0.0,
+            'throughput': self.requests/elapsed if elapsed > 0 else 0.0,
+            'latency_p50_ms': float(np.percentile(latencies, 50)),
+            'latency_p95_ms': float(np.percentile(latencies, 95)),
+            'latency_p99_ms': float(np.percentile(latencies, 99)),
+            'latency_max_ms': float(latencies.max()),
+        }
+
+
+class RelaxationServer:
+    '''
+    RelaxationServer evaluates registered expressions in micro-batches.
+    Use it inside a running event loop: register models, then await evaluate() directly or start()
+    the socket service for clients, and close() it when done.
+    '''
+
+    def __init__(self, window=0.002, max_batch=1024):
+        '''
+        Initialization:
+        window     seconds a request waits for others to batch with
+        max_batch  a batch is evaluated at once when it reaches this many requests
+        '''
+
+        if window < 0:
+            raise ValueError('window must be nonnegative')
+        if max_batch < 1:
+            raise ValueError('max_batch must be positive')
+        self.window = window
+        self.max_batch = max_batch
+        self.models = {}
+        self.stats = Metrics()
+        self._pending = {}
+        self._timers = {}
+        self._server = None
+        self._connections = {}
+
+    def __repr__(self):
+        return 'RelaxationServer(models=%r, window=%r, max_batch=%d)' % (sorted(self.models), self.window, self.max_batch)
+
+    def register(self, name, fun, nvars=None):
+        '''
+        register fun, a Tape or a python function of nvars variables (traced once), under name
+        '''
+
+        if type(fun) != Tape:
+            if nvars is None:
+                raise ValueError('nvars is needed to trace a function')
+            fun = trace(fun, nvars)
+        self.models[name] = fun
+        for subgradient in (False, True):
+            compile_tape(fun, subgradient, vectorized=True)
+        return fun
+
+    def metrics(self):
+        return self.stats.snapshot()
+
+    async def evaluate(self, name, IA, MC, subgradient=False):
+        '''
+        relaxation of model name on the box IA at the point MC (one [LB, UB] and one [cv, cc] per variable),
+        as MCPy, or MCSGPy with the unit seeds if subgradient is set
+        '''
+
+        tape = self.models.get(name)
+        if tape is None:
+            raise KeyError('unknown model %r' % name)
+        IA = np.asarray(IA, dtype=float)
+        MC = np.asarray(MC, dtype=float)
+        if IA.shape != (tape.nvars, 2) or MC.shape != (tape.nvars, 2):
+            raise ValueError('IA and MC must have shape (%d, 2)' % tape.nvars)
+
+        future = asyncio.get_running_loop().create_future()
+        key = (name, bool(subgradient))
+        pending = self._pending.setdefault(key, [])
+        pending.append((IA, MC, future, time.perf_counter()))
+        if len(pending) >= self.max_batch:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+        return await future
+
+    def _flush(self, key):
+        '''
+        evaluate the pending requests of key in one batch
+        '''
+
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        entries = self._pending.pop(key, [])
+        if not entries:
+            return
+        name, subgradient = key
+        tape = self.models[name]
+        self.stats.batches += 1
+        try:
+            compiled = compile_tape(tape, subgradient, vectorized=True)
+            result = compiled(np.stack([entry[0] for entry in entries], axis=2),
+                              np.stack([entry[1] for entry in entries], axis=2))
+            results = [result.item(k) for k in range(len(entries))]
+        except Exception:
+            #one box is outside of the domain (ValueError) or overflows (OverflowError):
+            #every request gets its own result or error
+            self.stats.fallbacks += 1
+            results = [self._evaluate_one(tape, subgradient, IA, MC) for IA, MC, future, start in entries]
+
+        now = time.perf_counter()
+        for (IA, MC, future, start), result in zip(entries, results):
+            self.stats.requests += 1
+            self.stats.latencies.append(now - start)
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                self.stats.errors += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _evaluate_one(self, tape, subgradient, IA, MC):
+        '''
+        result of one box, or the exception it raises
+        '''
+
+        try:
+            return compile_tape(tape, subgradient)(IA, MC)
+        except Exception as error:
+            return error
+
+    async def start(self, host='127.0.0.1', port=0, path=None):
+        '''
+        serve clients on the Unix socket path, or on TCP host:port (port 0 picks a free port).
+        Returns the address to connect to: the path, or (host, port).
+        '''
+
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+            return path
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            handlers = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        for key in list(self._pending):
+            self._flush(key)
+
+    async def _handle(self, reader, writer):
+        '''
+        one client connection: every request is answered by its own task, so the requests of
+        one connection are batched together as well
+        '''
+
+        self._connections[writer] = asyncio.current_task()
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _respond(self, line, writer, lock):
+        request = {}
+        try:
+            request = json.loads(line)
+            op = request.get('op', 'evaluate')
+            if op == 'evaluate':
+                result = await self.evaluate(request['model'], request['IA'], request['MC'], request.get('subgradient', False))
+                response = {'IA': result.IA.tolist(), 'MC': result.MC.tolist()}
+                if type(result) == MCSGPy:
+                    response['SG'] = np.asarray(result.SG).tolist()
+            elif op == 'models':
+                response = {'models': {name: tape.nvars for name, tape in self.models.items()}}
+            elif op == 'metrics':
+                response = {'metrics': self.metrics()}
+            else:
+                raise ValueError('unknown op %r' % op)
+        except Exception as error:
+            message = error.args[0] if type(error) == KeyError and error.args else str(error)
+            response = {'error': message, 'type': type(error).__name__}
+        response['id'] = request.get('id') if type(request) == dict else None
+
+        async with lock:
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+
+
+class Client:
+    '''
+    Client of a RelaxationServer socket. Concurrent requests share the connection and are
+    matched to their responses by id. Create it with connect().
+    '''
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._listener = asyncio.ensure_future(self._listen())
+
+    async def _listen(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('connection closed'))
+            self._waiting.clear()
+
+    async def request(self, op, **fields):
+        '''
+        send one request and return the response dict, raising the error of an error response
+        '''
+
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        fields.update(id=self._next_id, op=op)
+        self.writer.write(json.dumps(fields).encode() + b'\n')
+        await self.writer.drain()
+        response = await future
+        if 'error' in response:
+            if response.get('type') == 'ValueError':
+                raise ValueError(response['error'])
+            if response.get('type') == 'KeyError':
+                raise KeyError(response['error'])
+            raise RuntimeError('%s: %s' % (response.get('type'), response['error']))
+        return response
+
+    async def evaluate(self, model, IA, MC, subgradient=False):
+        '''
+        RelaxationServer.evaluate over the connection, returns MCPy or MCSGPy
+        '''
+
+        response = await self.request('evaluate', model=model, IA=np.asarray(IA, dtype=float).tolist(),
+                                      MC=np.asarray(MC, dtype=float).tolist(), subgradient=bool(subgradient))
+        if 'SG' in response:
+            return MCSGPy(np.array(response['IA']), np.array(response['MC']), np.asmatrix(response['SG']))
+        return MCPy(np.array(response['IA']), np.array(response['MC']))
+
+    async def models(self):
+        return (await self.request('models'))['models']
+
+    async def metrics(self):
+        return (await self.request('metrics'))['metrics']
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._listener
+
+
+async def connect(address):
+    '''
+    Client connected to the address returned by RelaxationServer.start(): a Unix socket path or (host, port)
+    '''
+
+    if type(address) == str:
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    return Client(reader, writer)
@@ -0,0 +1,136 @@
+import numpy as np
+
+class SparseSG:
+    '''
+    SparseSG is a sparse n-by-m subgradient matrix (m = 2 for [SG_cv, SG_cc], m = 1 for one column),
+    stored as the sorted indices of the variables involved and their rows of values.
+    It supports the operations MCSGPy applies to SG (column slicing, scaling, addition, stacking),
+    so the cost of a rule scales with the number of variables a subexpression depends on rather than n.
+    '''
+
+    #let numpy scalars defer to __rmul__/__radd__ instead of building object arrays
+    __array_ufunc__ = None
+
+    def __init__(self, index, values, n):
+        '''
+        Initialization:
+        SparseSG.index
+        1-D sorted integer array of the k variables with a stored row.
+        SparseSG.values
+        2-D numpy k-by-m array, the rows of the matrix at index.
+        SparseSG.n
+        number of variables (rows of the dense matrix).
+        '''
+
+        self.index = np.asarray(index, dtype=np.intp)
+        self.values = np.asarray(values, dtype=float)
+        self.n = n
+
+    @classmethod
+    def unit(cls, k, n):
+        '''
+        subgradient of the input variable x_k: e_k in both columns
+        '''
+
+        return cls(np.array([k]), np.ones((1, 2)), n)
+
+    @classmethod
+    def zeros(cls, n, m=1):
+        '''
+        n-by-m zero matrix
+        '''
+
+        return cls(np.zeros(0, dtype=np.intp), np.zeros((0, m)), n)
+
+    @classmethod
+    def from_dense(cls, SG):
+        '''
+        convert a dense n-by-m matrix, keeping the nonzero rows
+        '''
+
+        SG = np.asarray(SG, dtype=float)
+        index = np.flatnonzero(np.any(SG != 0, axis=1))
+        return cls(index, SG[index], SG.shape[0])
+
+    @property
+    def shape(self):
+        return (self.n, self.values.shape[1])
+
+    @property
+    def nnz(self):
+        return len(self.index)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, key):
+        '''
+        column slicing SG[:,j] and SG[:, ::-1] as used by the rules in MC.py
+        '''
+
+        rows, cols = key
+        if rows != slice(None):
+            raise IndexError('SparseSG only supports slicing of columns')
+        if isinstance(cols, (int, np.integer)):
+            return SparseSG(self.index, self.values[:, cols:cols+1 or None], self.n)
+        return SparseSG(self.index, self.values[:, cols], self.n)
+
+    def __mul__(self, scalar):
+        if type(scalar) == SparseSG or np.ndim(scalar) != 0:
+            return NotImplemented
+        return SparseSG(self.index, self.values*scalar, self.n)
+
+    def __rmul__(self, scalar):
+        return self*scalar
+
+    def __neg__(self):
+        return self*(-1)
+
+    def __add__(self, SG2):
+        if type(SG2) != SparseSG:
+            return self.todense() + SG2
+        if len(self.index) == len(SG2.index) and np.array_equal(self.index, SG2.index):
+            return SparseSG(self.index, self.values + SG2.values, self.n)
+        index = np.union1d(self.index, SG2.index)
+        values = np.zeros((len(index), max(self.values.shape[1], SG2.values.shape[1])))
+        values[np.searchsorted(index, self.index)] += self.values
+        values[np.searchsorted(index, SG2.index)] += SG2.values
+        return SparseSG(index, values, self.n)
+
+    def __radd__(self, SG2):
+        return self + SG2
+
+    def __sub__(self, SG2):
+        return self + SG2*(-1)
+
+    def toarray(self):
+        '''
+        dense n-by-m numpy array
+        '''
+
+        dense = np.zeros(self.shape)
+        dense[self.index] = self.values
+        return dense
+
+    def todense(self):
+        '''
+        dense n-by-m numpy matrix, the representation used by MCSGPy.SG
+        '''
+
+        return np.asmatrix(self.toarray())
+
+    def __repr__(self):
+        return 'SparseSG(n=%d, index=%s, values=%s)' % (self.n, self.index.tolist(), self.values.tolist())
+
+def hstack(SG_cv, SG_cc):
+    '''
+    stack the two single-column SparseSG into one n-by-2 SparseSG
+    '''
+
+    if len(SG_cv.index) == len(SG_cc.index) and np.array_equal(SG_cv.index, SG_cc.index):
+        return SparseSG(SG_cv.index, np.column_stack([SG_cv.values, SG_cc.values]), SG_cv.n)
+    index = np.union1d(SG_cv.index, SG_cc.index)
+    values = np.zeros((len(index), 2))
+    values[np.searchsorted(index, SG_cv.index), 0] = SG_cv.values[:,0]
+    values[np.searchsorted(index, SG_cc.index), 1] = SG_cc.values[:,0]
+    return SparseSG(index, values, SG_cv.n)
@@ -0,0 +1,122 @@
+'''
+Streaming evaluation of the relaxations of a factorable function over very large point sets.
+
+stream(fun, box, points) evaluates the vectorized compiled tape (compiler.py) on fixed-size chunks
+of the points and yields one MCBatchPy block per chunk, so only chunk_size results are held at a time.
+evaluate_to_file writes the blocks into a memory-mapped .npy file instead, and grid(box, num)
+generates the points of a tensor grid chunk by chunk (e.g. for relaxation surfaces as in
+OneVariablePlot/TwoVariablesPlot), so the memory use does not grow with the number of points.
+'''
+
+import itertools
+import numpy as np
+from tape import Tape, trace
+from compiler import compile_tape
+
+class Grid:
+    '''
+    tensor grid of num[k] equally spaced points per variable over a box, in C order (the last variable
+    varies fastest). Grid[start:stop] computes the rows on demand, len(Grid) is the number of points.
+    '''
+
+    def __init__(self, box, num):
+        self.box = np.array(box, dtype=float)
+        self.num = tuple(int(k) for k in np.broadcast_to(num, (len(self.box),)))
+        self.axes = [np.linspace(b[0], b[1], k) for b, k in zip(self.box, self.num)]
+
+    def __len__(self):
+        return int(np.prod(self.num, dtype=np.int64))
+
+    def __repr__(self):
+        return 'Grid(num=%r, points=%d)' % (self.num, len(self))
+
+    def __getitem__(self, key):
+        '''
+        points of a slice of the grid as an array of shape (K, nvars)
+        '''
+
+        start, stop, step = key.indices(len(self))
+        index = np.unravel_index(np.arange(start, stop, step), self.num)
+        return np.column_stack([axis[i] for axis, i in zip(self.axes, index)])
+
+
+def grid(box, num):
+    '''
+    Grid of num points per variable (an int, or one per variable) over box
+    '''
+
+    return Grid(box, num)
+
+def stream(fun, box, points, chunk_size=65536, subgradient=False):
+    '''
+    generator of (start, MCBatchPy) blocks of the relaxations of fun on box at points[start:start+K].
+    fun is a python function of the variables (see tape.trace) or a Tape, box a sequence of [LB, UB]
+    per variable and points an array of shape (N, nvars), a Grid, or any iterable of points
+    (read chunk_size at a time). The points must lie in the box; every block holds at most
+    chunk_size results, with subgradients of shape (nvars, 2, K) if subgradient=True.
+    '''
+
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    box = np.array(box, dtype=float)
+    n = len(box)
+    tape = fun if type(fun) == Tape else trace(fun, n)
+    compiled = compile_tape(tape, subgradient, vectorized=True)
+
+    start = 0
+    for chunk in _chunks(points, chunk_size):
+        X = np.asarray(chunk, dtype=float).reshape(-1, n)
+        K = len(X)
+        if K == 0:
+            continue
+        IA = np.broadcast_to(box[:, :, None], (n, 2, K))
+        MC = np.broadcast_to(X.T[:, None, :], (n, 2, K))
+        yield start, compiled(IA, MC)
+        start += K
+
+def evaluate_to_file(fun, box, points, path, chunk_size=65536, subgradient=False, count=None):
+    '''
+    stream the relaxations of fun into the .npy file path, opened as a memory map of shape (N, 4) with
+    columns LB, UB, cv, cc, or (N, 4 + 2*nvars) with the convex and then the concave subgradients appended.
+    count is the number of points, needed if points has no len(). Returns the memory-mapped array.
+    '''
+
+    n = len(box)
+    if count is None:
+        if not hasattr(points, '__len__'):
+            raise ValueError('count is needed for points without len()')
+        count = len(points)
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=(count, 4 + 2*n if subgradient else 4))
+
+    written = 0
+    for start, result in stream(fun, box, points, chunk_size, subgradient):
+        stop = start + result.size
+        if stop > count:
+            raise ValueError('more than count = %d points' % count)
+        out[start:stop, 0:2] = result.IA.T
+        out[start:stop, 2:4] = result.MC.T
+        if subgradient:
+            out[start:stop, 4:4+n] = result.SG[:, 0].T
+            out[start:stop, 4+n:] = result.SG[:, 1].T
+        written = stop
+    if written != count:
+        raise ValueError('%d points for count = %d' % (written, count))
+    out.flush()
+    return out
+
+def _chunks(points, chunk_size):
+    '''
+    consecutive chunks of at most chunk_size points, sliced from arrays/sequences/grids and read
+    from other iterables
+    '''
+
+    if hasattr(points, '__len__') and hasattr(points, '__getitem__'):
+        for start in range(0, len(points), chunk_size):
+            yield points[start:start + chunk_size]
+    else:
+        iterator = iter(points)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,430 @@
+import hashlib
+import numpy as np
+import rules
+from MC import MCPy, MCSGPy, exp, log, sqrt
+
+#opcodes of the recorded operations
+VAR, ADD, ADDC, MULC, MUL, POW, INV, EXP, LOG, SQRT = range(10)
+
+OPNAMES = ['var', 'add', 'addc', 'mulc', 'mul', 'pow', 'inv', 'exp', 'log', 'sqrt']
+
+class Tape:
+    '''
+    Tape is a flat record of the operations of a factorable function built from MCPy/MCSGPy rules.
+    Node k is (ops[k], args[k], consts[k]):
+    ops[k]    opcode of the operation
+    args[k]   (i, j) indices of the operand nodes, -1 if unused; for VAR, i is the input variable index
+    consts[k] constant operand (offset of ADDC, multiplier of MULC, integer exponent of POW), 0 if unused
+    Recording happens once with trace(); evaluate() then replays the tape on new boxes
+    without going through operator overloading.
+    '''
+
+    def __init__(self, nvars):
+        '''
+        Initialization:
+        Tape.nvars
+        number of input variables.
+        Tape.output
+        index of the node holding the function value.
+        Tape.report
+        node counts of Tape.optimize(), None for a recorded tape.
+        '''
+
+        self.nvars = nvars
+        self.ops = []
+        self.args = []
+        self.consts = []
+        self.output = None
+        self.report = None
+
+    def __len__(self):
+        return len(self.ops)
+
+    def record(self, op, i=-1, j=-1, const=0):
+        '''
+        append a node and return its tracing variable
+        '''
+
+        self.ops.append(op)
+        self.args.append((i, j))
+        self.consts.append(const)
+        return TapeVar(self, len(self.ops)-1)
+
+    def digest(self):
+        '''
+        structural hash of the tape: equal for every recording of the same expression,
+        also across processes
+        '''
+
+        structure = (self.nvars, self.ops, self.args, self.consts, self.output)
+        return hashlib.sha1(repr(structure).encode()).hexdigest()
+
+    def optimize(self):
+        '''
+        return an equivalent tape with
+        - common subexpressions shared: identical nodes on the same operands are recorded once (hash-consing),
+          a product of a node with itself becomes the square rule, as MCPy does for identical objects
+        - constant folding: chains of constant offsets x+a+b and scalar multiplies a*(b*x) become one
+          operation, x+0 and 1*x are dropped
+        - nodes the output does not depend on removed
+        The new tape has a report dict with the node counts (before, after, removed, cse, folded, dead).
+        '''
+
+        new = Tape(self.nvars)
+        remap = [None]*len(self.ops)
+        table = {}
+        cse = folded = 0
+        for k, (op, (i, j), c) in enumerate(zip(self.ops, self.args, self.consts)):
+            if op != VAR:
+                i = remap[i]
+                j = remap[j] if j >= 0 else -1
+            if op in (ADD, MUL) and j < i:
+                i, j = j, i
+            if op == MUL and i == j:
+                op, j, c = POW, -1, 2
+            if op == ADDC and new.ops[i] == ADDC:
+                c = new.consts[i] + c
+                i = new.args[i][0]
+                folded += 1
+            elif op == MULC and new.ops[i] == MULC:
+                c = new.consts[i]*c
+                i = new.args[i][0]
+                folded += 1
+            if (op == ADDC and c == 0) or (op == MULC and c == 1):
+                remap[k] = i
+                folded += 1
+                continue
+
+            key = (op, i, j, c)
+            if key in table:
+                remap[k] = table[key]
+                cse += 1
+                continue
+            table[key] = remap[k] = new.record(op, i, j, c).index
+        new.output = remap[self.output]
+
+        result = new._prune()
+        result.report = {
+            'before': len(self),
+            'after': len(result),
+            'removed': len(self) - len(result),
+            'cse': cse,
+            'folded': folded,
+            'dead': len(new) - len(result),
+        }
+        return result
+
+    def _prune(self):
+        '''
+        copy of the tape without the nodes the output does not depend on
+        '''
+
+        needed = [False]*len(self.ops)
+        needed[self.output] = True
+        for k in range(self.output, -1, -1):
+            if needed[k] and self.ops[k] != VAR:
+                for a in self.args[k]:
+                    if a >= 0:
+                        needed[a] = True
+
+        new = Tape(self.nvars)
+        remap = [None]*len(self.ops)
+        for k, (op, (i, j), c) in enumerate(zip(self.ops, self.args, self.consts)):
+            if needed[k]:
+                if op != VAR:
+                    i = remap[i]
+                    j = remap[j] if j >= 0 else -1
+                remap[k] = new.record(op, i, j, c).index
+        new.output = remap[self.output]
+        return new
+
+    def seeds(self):
+        '''
+        unit subgradient seeds: variable k gets e_k in both columns, shape (nvars, nvars, 2)
+        '''
+
+        SG = np.zeros((self.nvars, self.nvars, 2))
+        for k in range(self.nvars):
+            SG[k, k] = 1
+        return SG
+
+    def evaluate(self, IA, MC, SG=None):
+        '''
+        replay the tape on plain floats.
+        IA is a sequence of [LB, UB] and MC a sequence of [cv, cc], one per input variable.
+        SG is None (no subgradients, returns MCPy) or an array of shape (nvars, n, 2)
+        with the n-by-2 subgradient matrix of every input (returns MCSGPy), e.g. Tape.seeds().
+        '''
+
+        values = [None]*len(self.ops)
+        grads = None if SG is None else [None]*len(self.ops)
+        for k, (op, (i, j), c) in enumerate(zip(self.ops, self.args, self.consts)):
+            if op == VAR:
+                values[k] = (float(IA[i][0]), float(IA[i][1]), float(MC[i][0]), float(MC[i][1]))
+                if grads is not None:
+                    grads[k] = (np.asarray(SG[i][:,0], dtype=float).ravel(),
+                                np.asarray(SG[i][:,1], dtype=float).ravel())
+                continue
+            elif op == MUL:
+                values[k], Jx, Jy = rules.mul(values[i], values[j])
+            elif op == ADD:
+                values[k], Jx, Jy = rules.add(values[i], values[j])
+            else:
+                values[k], Jx = UNARY[op](values[i], c)
+                if grads is not None:
+                    grads[k] = apply(Jx, grads[i])
+                continue
+            if grads is not None:
+                grads[k] = apply2(Jx, grads[i], Jy, grads[j])
+
+        LB, UB, cv, cc = values[self.output]
+        if grads is None:
+            return MCPy(np.array([LB, UB]), np.array([cv, cc]))
+        SG_cv, SG_cc = grads[self.output]
+        return MCSGPy(np.array([LB, UB]), np.array([cv, cc]), np.asmatrix(np.column_stack([SG_cv, SG_cc])))
+
+    def reverse(self, IA, MC, SG=None):
+        '''
+        replay the tape on plain floats and compute the subgradients by reverse mode (adjoints).
+        The forward pass only records the local subgradient map of every rule (the branch it took);
+        one backward sweep then gives the cv/cc subgradients, at O(ops) cost instead of O(n*ops).
+        SG is None for the unit seeds e_k of the inputs (n = nvars) or an array of shape (nvars, n, 2).
+        Returns an MCSGPy, with the same values as evaluate(IA, MC, SG).
+        '''
+
+        values = [None]*len(self.ops)
+        maps = [None]*len(self.ops)
+        for k, (op, (i, j), c) in enumerate(zip(self.ops, self.args, self.consts)):
+            if op == VAR:
+                values[k] = (float(IA[i][0]), float(IA[i][1]), float(MC[i][0]), float(MC[i][1]))
+            elif op == MUL:
+                values[k], Jx, Jy = rules.mul(values[i], values[j])
+                maps[k] = (Jx, Jy)
+            elif op == ADD:
+                values[k], Jx, Jy = rules.add(values[i], values[j])
+                maps[k] = (Jx, Jy)
+            else:
+                values[k], Jx = UNARY[op](values[i], c)
+                maps[k] = (Jx,)
+
+        SG_cv, SG_cc = self.sweep(maps, SG)
+        LB, UB, cv, cc = values[self.output]
+        return MCSGPy(np.array([LB, UB]), np.array([cv, cc]), np.asmatrix(np.column_stack([SG_cv, SG_cc])))
+
+    def sweep(self, maps, SG=None):
+        '''
+        backward sweep of reverse(): subgradients (SG_cv, SG_cc) of the output from the local maps
+        of every node, maps[k] = (Jx,) or (Jx, Jy) as recorded by a forward pass, None for VAR
+        '''
+
+        #adjoints[k] is the 2-by-2 map d[cv, cc](output)/d[cv, cc](node k)
+        adjoints = [None]*len(self.ops)
+        adjoints[self.output] = rules.IDENTITY
+        inputs = [rules.ZERO]*self.nvars
+        for k in range(self.output, -1, -1):
+            A = adjoints[k]
+            if A is None:
+                continue
+            i, j = self.args[k]
+            if self.ops[k] == VAR:
+                inputs[i] = accumulate(inputs[i], A)
+                continue
+            adjoints[i] = accumulate(adjoints[i], chain(A, maps[k][0]))
+            if len(maps[k]) == 2:
+                adjoints[j] = accumulate(adjoints[j], chain(A, maps[k][1]))
+
+        if SG is None:
+            SG_cv = np.array([A[0] + A[1] for A in inputs], dtype=float)
+            SG_cc = np.array([A[2] + A[3] for A in inputs], dtype=float)
+        else:
+            SG = np.asarray(SG, dtype=float)
+            A = np.array(inputs, dtype=float)
+            SG_cv = A[:,0] @ SG[:,:,0] + A[:,1] @ SG[:,:,1]
+            SG_cc = A[:,2] @ SG[:,:,0] + A[:,3] @ SG[:,:,1]
+        return SG_cv, SG_cc
+
+    def __call__(self, *args):
+        '''
+        replay the tape through operator overloading on any relaxation objects,
+        e.g. MCPy, MCSGPy or the batched MCBatchPy variables of batch.variables()
+        '''
+
+        values = [None]*len(self.ops)
+        for k, (op, (i, j), c) in enumerate(zip(self.ops, self.args, self.consts)):
+            if op == VAR:
+                values[k] = args[i]
+            elif op == ADD:
+                values[k] = values[i] + values[j]
+            elif op == ADDC:
+                values[k] = values[i] + c
+            elif op == MULC:
+                values[k] = values[i]*c
+            elif op == MUL:
+                values[k] = values[i]*values[j]
+            elif op == POW:
+                values[k] = values[i]**c
+            elif op == INV:
+                values[k] = values[i]**(-1)
+            elif op == EXP:
+                values[k] = exp(values[i])
+            elif op == LOG:
+                values[k] = log(values[i])
+            elif op == SQRT:
+                values[k] = sqrt(values[i])
+        return values[self.output]
+
+    def __repr__(self):
+        lines = []
+        for k, (op, (i, j), c) in enumerate(zip(self.ops, self.args, self.consts)):
+            operands = ', '.join('v%d' % a for a in (i, j) if a >= 0) if op != VAR else 'x%d' % i
+            const = ', %r' % c if op in (ADDC, MULC, POW) else ''
+            lines.append('v%d = %s(%s%s)' % (k, OPNAMES[op], operands, const))
+        lines.append('return v%s' % self.output)
+        return '\n'.join(lines)
+
+
+class TapeVar:
+    '''
+    tracing variable: the operators follow MCPy exactly but record nodes on the tape instead of computing
+    '''
+
+    def __init__(self, tape, index):
+        self.tape = tape
+        self.index = index
+
+    def __add__(self, TapeVar2):
+        if type(TapeVar2) == TapeVar:
+            return self.tape.record(ADD, self.index, TapeVar2.index)
+        else:
+            return self.tape.record(ADDC, self.index, const=float(TapeVar2))
+
+    def __radd__(self, TapeVar2):
+        return self + TapeVar2
+
+    def __pos__(self):
+        return self
+
+    def __neg__(self):
+        return self*(-1)
+
+    def __sub__(self, TapeVar2):
+        if type(TapeVar2) == TapeVar:
+            return self + TapeVar2*(-1)
+        else:
+            return self.tape.record(ADDC, self.index, const=-float(TapeVar2))
+
+    def __rsub__(self, TapeVar2):
+        return self*(-1) + TapeVar2
+
+    def __pow__(self, power):
+        kind = rules.power_kind(power)
+        if kind == 'inv':
+            return self.tape.record(INV, self.index)
+        elif kind == 'one':
+            return self
+        else:
+            return self.tape.record(POW, self.index, const=power)
+
+    def __mul__(self, TapeVar2):
+        if type(TapeVar2) == TapeVar:
+            if self.index == TapeVar2.index:
+                return self**2
+            return self.tape.record(MUL, self.index, TapeVar2.index)
+        else:
+            return self.tape.record(MULC, self.index, const=float(TapeVar2))
+
+    def __rmul__(self, TapeVar2):
+        return self*TapeVar2
+
+    def __truediv__(self, TapeVar2):
+        return self*TapeVar2**(-1)
+
+    def __rtruediv__(self, TapeVar2):
+        return self**(-1)*TapeVar2
+
+    def exp(self):
+        return self.tape.record(EXP, self.index)
+
+    def log(self):
+        return self.tape.record(LOG, self.index)
+
+    def sqrt(self):
+        return self.tape.record(SQRT, self.index)
+
+
+def trace(fun, nvars, optimize=False):
+    '''
+    record fun(x_1, ..., x_nvars) on a new tape.
+    fun is written as for MCPy/MCSGPy variables, using exp, log, sqrt from MC.
+    With optimize=True the tape is passed through Tape.optimize().
+    '''
+
+    tape = Tape(nvars)
+    variables = [tape.record(VAR, k) for k in range(nvars)]
+    result = fun(*variables)
+    if type(result) != TapeVar or result.tape is not tape:
+        raise ValueError('The traced function must return an expression of its arguments.')
+    tape.output = result.index
+    return tape.optimize() if optimize else tape
+
+def apply(J, SG):
+    '''
+    subgradients of a node from the local map J of a unary rule and the operand subgradients SG = (SG_cv, SG_cc)
+    '''
+
+    a, b, c, d = J
+    return combine(a, SG[0], b, SG[1]), combine(c, SG[0], d, SG[1])
+
+def apply2(Jx, SGx, Jy, SGy):
+    '''
+    subgradients of a binary node, the operand contributions are summed
+    '''
+
+    x_cv, x_cc = apply(Jx, SGx)
+    y_cv, y_cc = apply(Jy, SGy)
+    return x_cv + y_cv, x_cc + y_cc
+
+def combine(a, u, b, v):
+    '''
+    a*u + b*v skipping zero coefficients, so that the selected branch is reproduced exactly
+    '''
+
+    if b == 0:
+        return a*u
+    if a == 0:
+        return b*v
+    return a*u + b*v
+
+def chain(A, J):
+    '''
+    adjoint A*J of the operand of a rule with local map J, skipping the zero entries of A as combine
+    does in forward mode: a sigma the output does not depend on (e.g. the infinite slope of sqrt
+    at 0) is not propagated as inf*0 = nan
+    '''
+
+    a, b, c, d = A
+    p, q, r, s = J
+    return (dot(a, p, b, r), dot(a, q, b, s), dot(c, p, d, r), dot(c, q, d, s))
+
+def dot(a, u, b, v):
+    #a*u + b*v, zero coefficients contribute 0
+    return (a*u if a != 0 else 0.0) + (b*v if b != 0 else 0.0)
+
+def accumulate(A, B):
+    '''
+    sum of two 2-by-2 subgradient maps, None counts as zero
+    '''
+
+    if A is None:
+        return B
+    return (A[0]+B[0], A[1]+B[1], A[2]+B[2], A[3]+B[3])
+
+UNARY = {
+    ADDC: rules.addc,
+    MULC: rules.mulc,
+    POW: rules.integer_power,
+    INV: lambda x, c: rules.inv(x),
+    EXP: lambda x, c: rules.exp(x),
+    LOG: lambda x, c: rules.log(x),
+    SQRT: lambda x, c: rules.sqrt(x),
+}
@@ -1,4 +1,5 @@
 import numpy as np
+from sparse import SparseSG, hstack
 
 def eq_mul(IA1, IA2, MC1, MC2, SG1, SG2):
 
@@ -14,63 +15,202 @@ def eq_mul(IA1, IA2, MC1, MC2, SG1, SG2):
     delta1 = max(IA2[1]*MC1[0], IA2[1]*MC1[1])
     delta2 = max(IA1[0]*MC2[0], IA1[0]*MC2[1])
 
-    cv = max(min_value, max(alpha1+alpha2-IA1[0]*IA2[0], beta1+beta2-IA1[1]*IA2[1]))
-    cc = min(max_value, min(gamma1+gamma2-IA1[1]*IA2[0], delta1+delta2-IA1[0]*IA2[1]))
+    cv_alpha = alpha1+alpha2-IA1[0]*IA2[0]
+    cv_beta  = beta1+beta2-IA1[1]*IA2[1]
+    cc_gamma = gamma1+gamma2-IA1[1]*IA2[0]
+    cc_delta = delta1+delta2-IA1[0]*IA2[1]
 
-    if IA2[0] >= 0:
-        sg_alpha1 = IA2[0]*SG1[:,0]
-    else:
-        sg_alpha1 = IA2[0]*SG1[:,1]
+    cv = max(min_value, max(cv_alpha, cv_beta))
+    cc = min(max_value, min(cc_gamma, cc_delta))
 
-    if IA1[0] >= 0:
-        sg_alpha2 = IA1[0]*SG2[:,0]
+    #only the two scaled subgradients of the branch taken are formed
+    if min_value > max(cv_alpha, cv_beta):
+        SG_cv = sg_zeros(SG1)
+    elif cv_alpha >= cv_beta:
+        SG_cv = scaled_column(IA2[0], SG1, 0) + scaled_column(IA1[0], SG2, 0)
     else:
-        sg_alpha2 = IA1[0]*SG2[:,1]
+        SG_cv = scaled_column(IA2[1], SG1, 0) + scaled_column(IA1[1], SG2, 0)
 
-    if IA2[1] >= 0:
-        sg_beta1 = IA2[1]*SG1[:,0]
+    if max_value < min(cc_gamma, cc_delta):
+        SG_cc = sg_zeros(SG1)
+    elif cc_gamma <= cc_delta:
+        SG_cc = scaled_column(IA2[0], SG1, 1) + scaled_column(IA1[1], SG2, 1)
     else:
-        sg_beta1 = IA2[1]*SG1[:,1]
+        SG_cc = scaled_column(IA2[1], SG1, 1) + scaled_column(IA1[0], SG2, 1)
 
-    if IA1[1] >= 0:
-        sg_beta2 = IA1[1]*SG2[:,0]
-    else:
-        sg_beta2 = IA1[1]*SG2[:,1]
+    return min_value, max_value, cv, cc, SG_cv, SG_cc
 
-    if IA2[0] >= 0:
-        sg_gamma1 = IA2[0]*SG1[:,1]
-    else:
-        sg_gamma1 = IA2[0]*SG1[:,0]
+def scaled_column(c, SG, k):
+    '''
+    c*SG[:,k] for a nonnegative multiplier c, else c*SG[:,1-k] (the bounds swap)
+    '''
 
-    if IA1[1] >= 0:
-        sg_gamma2 = IA1[1]*SG2[:,1]
-    else:
-        sg_gamma2 = IA1[1]*SG2[:,0]
+    if c >= 0:
+        return c*SG[:,k]
+    return c*SG[:,1-k]
 
-    if IA2[1] >= 0:
-        sg_delta1 = IA2[1]*SG1[:,1]
-    else:
-        sg_delta1 = IA2[1]*SG1[:,0]
+def sg_zeros(SG):
+    '''
+    zero subgradient column with the representation (dense or SparseSG) and length of SG
+    '''
 
-    if IA1[0] >= 0:
-        sg_delta2 = IA1[0]*SG2[:,1]
-    else:
-        sg_delta2 = IA1[0]*SG2[:,0]
+    if type(SG) == SparseSG:
+        return SparseSG.zeros(SG.n)
+    return np.zeros((len(SG[:,0]),1))
+
+def sg_hstack(SG_cv, SG_cc):
+    '''
+    stack the subgradient columns of the convex/concave relaxations into SG = [SG_cv, SG_cc]
+    '''
+
+    if type(SG_cv) == SparseSG and type(SG_cc) == SparseSG:
+        return hstack(SG_cv, SG_cc)
+    if type(SG_cv) == SparseSG:
+        SG_cv = SG_cv.toarray()
+    if type(SG_cc) == SparseSG:
+        SG_cc = SG_cc.toarray()
+    return np.asmatrix(np.column_stack([SG_cv, SG_cc]))
+
+def vmin(*values):
+    '''
+    elementwise min(...) with the same tie-breaking as the python builtin
+    (the first of several equal entries is kept)
+    '''
+
+    result = values[0]
+    for value in values[1:]:
+        result = np.where(value < result, value, result)
+    return result
+
+def vmax(*values):
+    '''
+    elementwise max(...) with the same tie-breaking as the python builtin
+    '''
+
+    result = values[0]
+    for value in values[1:]:
+        result = np.where(value > result, value, result)
+    return result
+
+def mid(a, b ,c):
+    return max(a, min(b,c))
+
+def vmid(a, b, c):
+    '''
+    elementwise mid(a, b, c) = max(a, min(b, c))
+    '''
+
+    return vmax(a, vmin(b, c))
+
+def eq_mul_batch(IA1, IA2, MC1, MC2, SG1=None, SG2=None):
+    '''
+    vectorized eq_mul for N bilinear products at once, bit-identical to eq_mul entry by entry.
+    IA1/IA2/MC1/MC2 are 2-by-N arrays [LB, UB]/[cv, cc], SG1/SG2 are None or n-by-2-by-N arrays.
+    Any trailing shape broadcasts in place of N, e.g. 2-by-m-by-k for the entries of a matrix product.
+    Returns the same tuple as eq_mul with every entry an array over the N products
+    (SG_cv/SG_cc are n-by-N, or None if no subgradients are given).
+    '''
+
+    min_value = vmin(IA1[0]*IA2[0], IA1[0]*IA2[1], IA1[1]*IA2[0], IA1[1]*IA2[1])
+    max_value = vmax(IA1[0]*IA2[0], IA1[0]*IA2[1], IA1[1]*IA2[0], IA1[1]*IA2[1])
+
+    alpha1 = vmin(IA2[0]*MC1[0], IA2[0]*MC1[1])
+    alpha2 = vmin(IA1[0]*MC2[0], IA1[0]*MC2[1])
+    beta1  = vmin(IA2[1]*MC1[0], IA2[1]*MC1[1])
+    beta2  = vmin(IA1[1]*MC2[0], IA1[1]*MC2[1])
+    gamma1 = vmax(IA2[0]*MC1[0], IA2[0]*MC1[1])
+    gamma2 = vmax(IA1[1]*MC2[0], IA1[1]*MC2[1])
+    delta1 = vmax(IA2[1]*MC1[0], IA2[1]*MC1[1])
+    delta2 = vmax(IA1[0]*MC2[0], IA1[0]*MC2[1])
 
-    n = len(SG1[:,0])
-    if min_value > max(alpha1+alpha2-IA1[0]*IA2[0], beta1+beta2-IA1[1]*IA2[1]):
-        SG_cv = np.zeros((n,))            
-    elif alpha1+alpha2-IA1[0]*IA2[0] >= beta1+beta2-IA1[1]*IA2[1]:
-        SG_cv = sg_alpha1 + sg_alpha2
+    cv_alpha = alpha1+alpha2-IA1[0]*IA2[0]
+    cv_beta  = beta1+beta2-IA1[1]*IA2[1]
+    cc_gamma = gamma1+gamma2-IA1[1]*IA2[0]
+    cc_delta = delta1+delta2-IA1[0]*IA2[1]
+
+    cv = vmax(min_value, vmax(cv_alpha, cv_beta))
+    cc = vmin(max_value, vmin(cc_gamma, cc_delta))
+
+    if SG1 is None or SG2 is None:
+        return min_value, max_value, cv, cc, None, None
+
+    #every branch of eq_mul is c1*SG1[:,k1] + c2*SG2[:,k2]: the masks select the bound multipliers
+    #c1/c2 of the branch taken and their sign the columns k1/k2, so only one product per operand is formed
+    alpha = cv_alpha >= cv_beta
+    c1 = np.where(alpha, IA2[0], IA2[1])
+    c2 = np.where(alpha, IA1[0], IA1[1])
+    SG_cv = c1*np.where(c1 >= 0, SG1[:,0], SG1[:,1]) + c2*np.where(c2 >= 0, SG2[:,0], SG2[:,1])
+    SG_cv = np.where(min_value > vmax(cv_alpha, cv_beta), 0.0, SG_cv)
+
+    gamma = cc_gamma <= cc_delta
+    c1 = np.where(gamma, IA2[0], IA2[1])
+    c2 = np.where(gamma, IA1[1], IA1[0])
+    SG_cc = c1*np.where(c1 >= 0, SG1[:,1], SG1[:,0]) + c2*np.where(c2 >= 0, SG2[:,1], SG2[:,0])
+    SG_cc = np.where(max_value < vmin(cc_gamma, cc_delta), 0.0, SG_cc)
+
+    return min_value, max_value, cv, cc, SG_cv, SG_cc
+
+_tangent_ratios = {}
+
+def tangent_ratio(power):
+    '''
+    root rho in (0, 1) of (p-1)*rho**p + p*rho**(p-1) = 1 for an odd power p > 2:
+    on a domain with LB < 0 the tangent to x**p through (LB, LB**p) touches at x = -rho*LB,
+    e.g. rho = 1/2 for p = 3. Newton iterations from rho = 1, cached per power.
+    '''
+
+    if power not in _tangent_ratios:
+        rho = 1.0
+        for _ in range(100):
+            step = ((power-1)*rho**power + power*rho**(power-1) - 1)/(power*(power-1)*rho**(power-2)*(rho+1))
+            rho -= step
+            if abs(step) <= 1e-15*rho:
+                break
+        _tangent_ratios[power] = rho
+    return _tangent_ratios[power]
+
+def odd_power_envelopes(LB, UB, power):
+    '''
+    envelopes of x**power on [LB, UB] for an odd power > 2, returns (t_cv, slope_cv, t_cc, slope_cc):
+    the convex envelope is LB**p + slope_cv*(x-LB) for x <= t_cv and x**p beyond,
+    the concave envelope is UB**p + slope_cc*(x-UB) for x >= t_cc and x**p below.
+    A sign-changing domain takes the tangents at -rho*LB and -rho*UB (tangent_ratio), or the secant
+    if the tangent point falls outside the domain; the secant of a degenerate domain LB == UB is the derivative.
+    '''
+
+    rho = tangent_ratio(power)
+
+    if LB >= 0:
+        t_cv = LB
     else:
-        SG_cv = sg_beta1 + sg_beta2
+        t_cv = min(-rho*LB, UB)
+    if LB < 0 and -rho*LB >= UB:
+        slope_cv = (UB**power - LB**power)/(UB - LB) if UB != LB else power*LB**(power-1)
+    else:
+        slope_cv = power*t_cv**(power-1)
 
-    if max_value < min(gamma1+gamma2-IA1[1]*IA2[0], delta1+delta2-IA1[0]*IA2[1]):
-        SG_cc = np.zeros((n,))
-    elif gamma1+gamma2-IA1[1]*IA2[0] <= delta1+delta2-IA1[0]*IA2[1]:
-        SG_cc = sg_gamma1 + sg_gamma2
+    if UB <= 0:
+        t_cc = UB
     else:
-        SG_cc = sg_delta1 + sg_delta2
-        
-    return min_value, max_value, cv, cc, SG_cv, SG_cc
+        t_cc = max(-rho*UB, LB)
+    if UB > 0 and -rho*UB <= LB:
+        slope_cc = (UB**power - LB**power)/(UB - LB) if UB != LB else power*LB**(power-1)
+    else:
+        slope_cc = power*t_cc**(power-1)
+
+    return t_cv, slope_cv, t_cc, slope_cc
+
+def odd_power_envelopes_batch(LB, UB, power):
+    '''
+    odd_power_envelopes on arrays of domains
+    '''
+
+    rho = tangent_ratio(power)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(UB == LB, power*LB**(power-1), (UB**power - LB**power)/(UB - LB))
 
+    t_cv = np.where(LB >= 0, LB, vmin(-rho*LB, UB))
+    slope_cv = np.where((LB < 0) & (-rho*LB >= UB), slope, power*t_cv**(power-1))
+    t_cc = np.where(UB <= 0, UB, vmax(-rho*UB, LB))
+    slope_cc = np.where((UB > 0) & (-rho*UB <= LB), slope, power*t_cc**(power-1))
+    return t_cv, slope_cv, t_cc, slope_cc
@@ -0,0 +1,170 @@
+'''
+Evaluation of a recorded expression (tape.py) with the subgradients in a preallocated workspace.
+
+Tape.evaluate allocates new subgradient arrays at every node (a*SG[:,0] + b*SG[:,1] per column).
+A Workspace allocates them once: every node that reaches the output gets a (2, n) slot of one
+buffer, slots are reused as soon as the last reader of a node has run (so the buffer holds the
+largest number of simultaneously live nodes, not all nodes), and the rules write the subgradient
+of the branch they took into the slot in place. The values and subgradients are the same as
+Tape.evaluate, bit for bit; only the returned result is a new array.
+'''
+
+import numpy as np
+import rules
+from MC import MCSGPy
+from tape import VAR, ADD, MUL, UNARY, combine
+
+class Workspace:
+    '''
+    Workspace holds the subgradient buffer of one tape for n subgradient entries.
+    Workspace.slots is the number of (2, n) slots, Workspace.nbytes the size of the buffer.
+    '''
+
+    def __init__(self, tape, n=None):
+        '''
+        Initialization:
+        tape  the recorded expression (tape.trace)
+        n     length of the subgradients, tape.nvars (unit seeds) by default
+        '''
+
+        self.tape = tape
+        self.n = tape.nvars if n is None else n
+        ops, args = tape.ops, tape.args
+
+        #nodes the output depends on, the others need no subgradient
+        live = [False]*len(ops)
+        live[tape.output] = True
+        for k in range(tape.output, -1, -1):
+            if live[k] and ops[k] != VAR:
+                for operand in args[k]:
+                    if operand >= 0:
+                        live[operand] = True
+
+        last = [-1]*len(ops)
+        for k in range(len(ops)):
+            if ops[k] != VAR:
+                for operand in args[k]:
+                    if operand >= 0:
+                        last[operand] = k
+        last[tape.output] = len(ops)
+
+        #the variables need no slot: their subgradients are the seeds. A slot is taken before
+        #the operands are released, so a result never overwrites its operands.
+        slot = [None]*len(ops)
+        free = []
+        self.slots = 0
+        for k in range(len(ops)):
+            if not live[k] or ops[k] == VAR:
+                continue
+            if free:
+                slot[k] = free.pop()
+            else:
+                slot[k] = self.slots
+                self.slots += 1
+            for operand in set(args[k]):
+                if operand >= 0 and ops[operand] != VAR and last[operand] == k:
+                    free.append(slot[operand])
+
+        self.buffer = np.zeros((self.slots, 2, self.n))
+        #rows 0 and 1 take the second operand of a binary rule, row 2 the b*SG[:,1] terms
+        self.scratch = np.zeros((3, self.n))
+        self.nbytes = self.buffer.nbytes + self.scratch.nbytes
+
+        #operands are the rows of their slot, or the input index of a variable
+        def operand(i):
+            return args[i][0] if ops[i] == VAR else self.buffer[slot[i]]
+
+        self.schedule = []
+        for k, (op, (i, j), c) in enumerate(zip(ops, args, tape.consts)):
+            if op == VAR or slot[k] is None:
+                self.schedule.append((k, op, i, j, c, None, None, None))
+            else:
+                self.schedule.append((k, op, i, j, c, self.buffer[slot[k]], operand(i), None if j < 0 else operand(j)))
+        self.output = operand(tape.output)
+
+    def __repr__(self):
+        return 'Workspace(nodes=%d, slots=%d, n=%d, nbytes=%d)' % (len(self.tape.ops), self.slots, self.n, self.nbytes)
+
+    def evaluate(self, IA, MC, SG=None):
+        '''
+        Tape.evaluate(IA, MC, SG) in the workspace, returns an MCSGPy.
+        IA is a sequence of [LB, UB] and MC a sequence of [cv, cc], one per input variable.
+        SG is None for the unit seeds e_k (n = nvars) or an array of shape (nvars, n, 2).
+        '''
+
+        if SG is None:
+            if self.n != self.tape.nvars:
+                raise ValueError('unit seeds need n = nvars')
+            seeds = None
+        else:
+            SG = np.asarray(SG, dtype=float)
+            seeds = [(SG[i][:,0], SG[i][:,1]) for i in range(self.tape.nvars)]
+        scratch = self.scratch
+        values = [None]*len(self.tape.ops)
+        for k, op, i, j, c, rows, x, y in self.schedule:
+            if op == VAR:
+                values[k] = (float(IA[i][0]), float(IA[i][1]), float(MC[i][0]), float(MC[i][1]))
+                continue
+            elif op == MUL:
+                values[k], Jx, Jy = rules.mul(values[i], values[j])
+            elif op == ADD:
+                values[k], Jx, Jy = rules.add(values[i], values[j])
+            else:
+                values[k], Jx = UNARY[op](values[i], c)
+                if rows is not None:
+                    apply_into(rows, Jx, x, seeds, scratch[2])
+                continue
+            if rows is not None:
+                apply_into(rows, Jx, x, seeds, scratch[2])
+                apply_into(scratch[:2], Jy, y, seeds, scratch[2])
+                np.add(rows, scratch[:2], out=rows)
+
+        LB, UB, cv, cc = values[self.tape.output]
+        if type(self.output) == int:
+            #the output is a variable
+            if seeds is None:
+                SG_out = np.zeros((self.n, 2))
+                SG_out[self.output] = 1
+            else:
+                SG_out = np.column_stack(seeds[self.output])
+        else:
+            SG_out = self.output.T.copy()
+        return MCSGPy(np.array([LB, UB]), np.array([cv, cc]), np.asmatrix(SG_out))
+
+
+def workspace(tape, n=None):
+    '''
+    Workspace of tape for subgradients of length n (tape.nvars by default)
+    '''
+
+    return Workspace(tape, n)
+
+def apply_into(out, J, SG, seeds, tmp):
+    '''
+    tape.apply in place: out[0] = a*SG[0] + b*SG[1], out[1] = c*SG[0] + d*SG[1], skipping zero
+    coefficients as tape.combine does. SG is a pair of rows, or the index of a variable whose
+    subgradients are seeds[SG] (the unit seed e_SG if seeds is None); tmp is a free row of length n.
+    '''
+
+    a, b, c, d = J
+    if type(SG) == int:
+        if seeds is None:
+            #a*e_i + b*e_i entry by entry, with the zeros signed as the array products would be
+            out[0].fill(combine(a, 0.0, b, 0.0))
+            out[1].fill(combine(c, 0.0, d, 0.0))
+            out[0, SG] = combine(a, 1.0, b, 1.0)
+            out[1, SG] = combine(c, 1.0, d, 1.0)
+            return
+        SG = seeds[SG]
+    combine_into(out[0], a, SG[0], b, SG[1], tmp)
+    combine_into(out[1], c, SG[0], d, SG[1], tmp)
+
+def combine_into(out, a, u, b, v, tmp):
+    if b == 0:
+        np.multiply(a, u, out=out)
+    elif a == 0:
+        np.multiply(b, v, out=out)
+    else:
+        np.multiply(a, u, out=out)
+        np.multiply(b, v, out=tmp)
+        np.add(out, tmp, out=out)
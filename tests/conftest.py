@@ -0,0 +1,6 @@
+# the tests import the modules of src/ the way the benchmarks do
+# run from the repository root: python -m pytest tests
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,43 @@
+# expressions and random boxes shared by the tests
+
+import numpy as np
+from MC import MCSGPy, exp, log, sqrt
+
+#f(x, y) on x in [0.5, 4], y in [-2, 3]; written with exp, log, sqrt from MC so that they
+#trace on a tape, run on every relaxation type and give the plain value on floats
+EXPRESSIONS = {
+    'bilinear': lambda x, y: x*y + 2*x - y,
+    'even': lambda x, y: exp(x)*y**2,
+    'concave': lambda x, y: log(x) + sqrt(x)*y,
+    'odd': lambda x, y: x**3 - y**3 + x*y,
+    'negative': lambda x, y: x**(-1) + x**(-2) + 3*x**(-3),
+    'shifted': lambda x, y: 0.5*(x + y)**2 - exp(y),
+    'quotient': lambda x, y: y/x - 4*x**5,
+}
+
+def boxes(count, seed=0, point=False):
+    '''
+    count random boxes: LB, UB of shape (2, count), relaxation points cv <= cc in the box
+    '''
+
+    rng = np.random.default_rng(seed)
+    LB = np.array([rng.uniform(0.5, 2, count), rng.uniform(-2, 1, count)])
+    UB = LB if point else LB + rng.uniform(0.1, 2, (2, count))
+    a, b = rng.uniform(LB, UB), rng.uniform(LB, UB)
+    return LB, UB, np.minimum(a, b), np.maximum(a, b)
+
+def variable(LB, UB, cv, cc, k, n=2):
+    '''
+    MCSGPy input x_k with the unit subgradient e_k
+    '''
+
+    SG = np.zeros((n, 2))
+    SG[k] = 1
+    return MCSGPy(np.array([LB, UB]), np.array([cv, cc]), np.asmatrix(SG))
+
+def reference(fun, LB, UB, cv, cc):
+    '''
+    fun on MCSGPy variables, the result every other path is checked against
+    '''
+
+    return fun(*[variable(LB[k], UB[k], cv[k], cc[k], k) for k in range(len(LB))])
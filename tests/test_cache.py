@@ -0,0 +1,63 @@
+# keys of the relaxation cache
+
+import numpy as np
+import pytest
+import mcarray
+from batch import variables
+from cache import RelaxationCache
+from expressions import EXPRESSIONS
+
+def test_batched_arguments():
+    '''
+    MCBatchPy arguments are cached, a different box or subgradient is a miss
+    '''
+
+    fun = EXPRESSIONS['even']
+    cache = RelaxationCache()
+    LB, UB = np.array([[1.0, 2.0], [-1.0, 0.0]]), np.array([[2.0, 3.0], [1.0, 2.0]])
+    first = cache(fun, *variables(LB, UB))
+    again = cache(fun, *variables(LB, UB))
+    assert cache.hits == 1
+    assert np.array_equal(first.MC, again.MC) and np.array_equal(first.SG, again.SG)
+
+    cache(fun, *variables(LB, UB + 1))
+    cache(fun, *variables(LB, UB, subgradient=False))
+    assert cache.hits == 1 and cache.misses == 3
+
+def test_unsupported_argument():
+    with pytest.raises(TypeError):
+        RelaxationCache()(EXPRESSIONS['bilinear'], object(), 1.0)
+
+def test_results_are_copies():
+    '''
+    changing a returned batch or array result does not change the stored entry
+    '''
+
+    cache = RelaxationCache()
+    LB, UB = np.array([[1.0, 2.0], [-1.0, 0.0]]), np.array([[2.0, 3.0], [1.0, 2.0]])
+    first = cache(EXPRESSIONS['even'], *variables(LB, UB))
+    expected = first.MC.copy(), first.SG.copy()
+    first.MC[:] = 0
+    first.SG[:] = 0
+    again = cache(EXPRESSIONS['even'], *variables(LB, UB))
+    assert cache.hits == 1
+    assert np.array_equal(again.MC, expected[0]) and np.array_equal(again.SG, expected[1])
+
+    x = mcarray.variables([1.0, -1.0], [2.0, 1.0])
+    double = lambda x: x*2.0
+    first = cache(double, x)
+    first.IA[:] = 0
+    assert np.array_equal(cache(double, x).IA, [[2.0, -2.0], [4.0, 2.0]])
+    assert cache.hits == 2
+
+def test_nan_arguments():
+    '''
+    an argument with a nan value is evaluated without entering the table
+    '''
+
+    cache = RelaxationCache()
+    LB, UB = np.array([[1.0, np.nan], [-1.0, 0.0]]), np.array([[2.0, 3.0], [1.0, 2.0]])
+    for _ in range(3):
+        cache(EXPRESSIONS['bilinear'], *variables(LB, UB))
+        cache(lambda x: x, np.nan)
+    assert len(cache) == 0 and cache.hits == 0 and cache.misses == 6
@@ -0,0 +1,37 @@
+# convergence orders of the relaxations on nested boxes
+
+import numpy as np
+from MC import log, sqrt
+from convergence import convergence_order, vertices
+
+def test_vertices():
+    '''
+    all 2**n vertices for small n, the corners and the face midpoints above MAX_VERTICES
+    '''
+
+    assert {tuple(v) for v in vertices(3)} == {(a, b, c) for a in (0, 1) for b in (0, 1) for c in (0, 1)}
+    many = vertices(12)
+    assert many.shape == (26, 12)
+    assert ((many == 0) | (many == 0.5) | (many == 1)).all()
+
+def test_monotone_range():
+    '''
+    the sampled range of a function monotone in every variable is exact, so the interval bounds
+    of an affine or a monotone function are at distance 0 of it
+    '''
+
+    for fun, center in ((lambda x: x*1.0, [0.3]), (lambda x: log(x**3)*sqrt(x), [1.5]),
+                        (lambda x, y: x + 2*y, [0.0, 1.0])):
+        result = convergence_order(fun, center, count=6, samples=16, processes=1)
+        assert np.allclose(result.measures['interval'], 0, atol=1e-12)
+        assert np.allclose(result.measures['hausdorff'], 0, atol=1e-12)
+
+def test_orders():
+    '''
+    the relaxations of a nonconvex function converge pointwise with order 2, its intervals with order 1
+    '''
+
+    result = convergence_order(lambda x, y: x*y + x**2 - y, [0.5, 0.5], count=8, samples=64, processes=1)
+    assert abs(result.orders['pointwise'] - 2) < 0.1
+    assert abs(result.orders['gap'] - 2) < 0.1
+    assert abs(result.orders['interval'] - 1) < 0.1
@@ -0,0 +1,95 @@
+# every evaluation path against the operator overloading of MCSGPy on random boxes
+
+import numpy as np
+import pytest
+import interval
+from MC import MCSGPy
+from batch import variables
+from lite import MCLitePy
+from sparse import SparseSG
+from tape import trace, chain
+from compiler import compile_tape
+from workspace import workspace
+from incremental import prepare
+from expressions import EXPRESSIONS, boxes, reference
+
+COUNT = 20
+
+def same(result, expected, SG=None):
+    '''
+    IA, MC and (optionally) the subgradients of result equal those of expected
+    '''
+
+    assert np.allclose(result.IA, expected.IA, rtol=1e-12, atol=1e-12)
+    assert np.allclose(result.MC, expected.MC, rtol=1e-12, atol=1e-12)
+    if SG is not None:
+        assert np.allclose(np.asarray(SG), np.asarray(expected.SG), rtol=1e-10, atol=1e-12)
+
+def cases(point):
+    LB, UB, cv, cc = boxes(COUNT, seed=len(EXPRESSIONS), point=point)
+    for n in range(COUNT):
+        yield LB[:, n], UB[:, n], cv[:, n], cc[:, n]
+
+@pytest.mark.parametrize('point', [False, True], ids=['box', 'point'])
+@pytest.mark.parametrize('name', EXPRESSIONS)
+def test_scalar_paths(name, point):
+    '''
+    Tape.evaluate, Tape.reverse, the compiled tape, the workspace, the prepared tape,
+    sparse subgradients, MCLitePy and interval.evaluate give the MCSGPy result
+    '''
+
+    fun = EXPRESSIONS[name]
+    tape = trace(fun, 2)
+    compiled = compile_tape(tape, subgradient=True)
+    space = workspace(tape)
+    for LB, UB, cv, cc in cases(point):
+        expected = reference(fun, LB, UB, cv, cc)
+        IA, MC = np.column_stack([LB, UB]), np.column_stack([cv, cc])
+
+        same(tape.evaluate(IA, MC), expected)
+        result = tape.evaluate(IA, MC, tape.seeds())
+        same(result, expected, result.SG)
+        result = compiled(IA, MC)
+        same(result, expected, result.SG)
+        result = space.evaluate(IA, MC)
+        same(result, expected, result.SG)
+
+        prepared = prepare(tape, IA)
+        result = prepared.evaluate(MC, tape.seeds())
+        same(result, expected, result.SG)
+        result = tape.reverse(IA, MC)
+        same(result, expected, result.SG)
+        result = prepared.reverse(MC)
+        same(result, expected, result.SG)
+
+        result = fun(*[MCSGPy(IA[k], MC[k], SparseSG.unit(k, 2)) for k in range(2)])
+        same(result, expected, result.SG.toarray())
+        same(fun(*[MCLitePy(IA[k], MC[k]) for k in range(2)]), expected)
+        assert np.allclose(interval.evaluate(tape, IA), expected.IA, rtol=1e-12, atol=1e-12)
+
+@pytest.mark.parametrize('point', [False, True], ids=['box', 'point'])
+@pytest.mark.parametrize('name', EXPRESSIONS)
+def test_batched_paths(name, point):
+    '''
+    MCBatchPy and the vectorized compiled tape give the MCSGPy result of every box
+    '''
+
+    fun = EXPRESSIONS[name]
+    LB, UB, cv, cc = boxes(COUNT, seed=len(EXPRESSIONS), point=point)
+    batch = fun(*variables(LB, UB, cv, cc))
+    vectorized = compile_tape(trace(fun, 2), subgradient=True, vectorized=True)(
+        np.stack([LB, UB], axis=1), np.stack([cv, cc], axis=1))
+    for n in range(COUNT):
+        expected = reference(fun, LB[:, n], UB[:, n], cv[:, n], cc[:, n])
+        for result in (batch, vectorized):
+            assert np.allclose(result.IA[:, n], expected.IA, rtol=1e-12, atol=1e-12)
+            assert np.allclose(result.MC[:, n], expected.MC, rtol=1e-12, atol=1e-12)
+            assert np.allclose(result.SG[:, :, n], np.asarray(expected.SG), rtol=1e-10, atol=1e-12)
+
+def test_zero_adjoints():
+    '''
+    the backward sweep does not propagate the sigma of a column the output does not depend on,
+    e.g. nan*0 of an infinite or undefined slope
+    '''
+
+    assert chain((1, 0, 0, 0), (2.0, 0.0, np.nan, np.inf)) == (2.0, 0.0, 0.0, 0.0)
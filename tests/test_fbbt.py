@@ -0,0 +1,42 @@
+# soundness of the contracted boxes
+
+import numpy as np
+import pytest
+from tape import trace
+from fbbt import contract
+from expressions import EXPRESSIONS
+
+@pytest.mark.parametrize('name', EXPRESSIONS)
+def test_feasible_points_kept(name):
+    '''
+    every point of the box that satisfies lower <= f <= upper is in the contracted box
+    '''
+
+    fun = EXPRESSIONS[name]
+    tape = trace(fun, 2)
+    rng = np.random.default_rng(4)
+    box = [[0.5, 4.0], [-2.0, 3.0]]
+    points = rng.uniform([0.5, -2.0], [4.0, 3.0], (2000, 2))
+    values = np.array([fun(*x) for x in points])
+    for lower, upper in [(-1.0, 1.0), (0.0, np.inf), (-np.inf, np.median(values))]:
+        result = contract(tape, box, lower, upper)
+        feasible = points[(values >= lower) & (values <= upper)]
+        if result is None:
+            assert len(feasible) == 0
+            continue
+        for (LB, UB), column in zip(result, feasible.T):
+            assert np.all((LB <= column) & (column <= UB))
+
+@pytest.mark.parametrize('fun, box, lower, upper, expected', [
+    (lambda x: x**2, [-1e200, 1e200], 0, 4, [-2.0, 2.0]),
+    (lambda x: x**3, [1, 1e200], -1e300, 1e300, [1.0, 1e100]),
+    (lambda x: x**3, [-1e200, -1], -1e300, 1e300, [-1e100, -1.0]),
+])
+def test_huge_bounds(fun, box, lower, upper, expected):
+    '''
+    powers of huge finite bounds overflow to inf instead of raising OverflowError
+    '''
+
+    result = contract(trace(fun, 1), [box], lower, upper)
+    assert np.allclose(result[0], expected, rtol=1e-12)
+    assert result[0][0] <= expected[0] and expected[1] <= result[0][1]
@@ -0,0 +1,50 @@
+# lower bounds and progress of the relaxation minimizer
+
+import numpy as np
+import pytest
+from MC import exp
+from minimize import minimize_relaxation
+
+def fun(x, y):
+    return x*y + x**2 - exp(y)
+
+BOX = [[-1, 2], [-2, 1]]
+
+def sampled_minimum(count=100):
+    x, y = np.meshgrid(np.linspace(*BOX[0], count), np.linspace(*BOX[1], count))
+    return (x*y + x**2 - np.exp(y)).min()
+
+SETTINGS = [
+    ('subgradient', 'polyak', 0.5),
+    ('subgradient', 'constant', 0.02),
+    ('subgradient', 'diminishing', 0.5),
+    ('kelley', 'polyak', 0.5),
+]
+
+@pytest.mark.parametrize('method, step, step_size', SETTINGS)
+def test_bound_and_progress(method, step, step_size):
+    '''
+    the lower bound is below the sampled minimum of fun, and the relaxation at the point found
+    is below its value at the start (the box midpoint) and close to the relaxation minimum
+    '''
+
+    if method == 'kelley':
+        pytest.importorskip('scipy')
+    start = minimize_relaxation(fun, BOX, max_iter=1)
+    result = minimize_relaxation(fun, BOX, method=method, step=step, step_size=step_size, max_iter=500)
+    assert result.lower <= result.value
+    assert result.lower <= sampled_minimum()
+    assert result.value < start.value - 0.1
+    #minimum of the relaxation, from the cutting-plane method
+    assert result.value < -3.86 + 0.05
+
+def test_polyak_target():
+    '''
+    the polyak steps approach the relaxation minimum on an unconstrained convex function,
+    where the interval bound is far below it
+    '''
+
+    result = minimize_relaxation(lambda x, y: (x - 0.3)**2 + (y + 0.2)**2, [[-1, 1], [-1, 1]], x0=[0.9, 0.9],
+                                 max_iter=200)
+    assert result.value < 1e-3
+    assert np.allclose(result.x, [0.3, -0.2], atol=0.05)
@@ -0,0 +1,80 @@
+# the integer power rules on every evaluation path
+
+import numpy as np
+import pytest
+import rules
+import interval
+from MC import MCPy, MCSGPy
+from batch import MCBatchPy
+from lite import MCLitePy
+from mcarray import variables
+from tape import trace, POW
+from compiler import compile_tape
+from workspace import workspace
+from incremental import prepare
+
+POINTS = [-3.0, -1.0, -0.5, 0.0, 0.5, 1.0, 2.0]
+
+def variable(z):
+    return MCSGPy(np.array([z, z]), np.array([z, z]), np.asmatrix([[1.0, 1.0]]))
+
+@pytest.mark.parametrize('z', POINTS)
+@pytest.mark.parametrize('power', [3, 5])
+def test_odd_power_point_box(z, power):
+    '''
+    on a point box x**p is the product of p copies of x: value z**p, subgradient p*z**(p-1)
+    '''
+
+    product = variable(z)
+    for _ in range(power - 1):
+        product = product*variable(z)
+    expected = np.asarray(product.SG).ravel()
+    assert np.allclose(expected, power*z**(power-1))
+
+    result = variable(z)**power
+    assert np.allclose(result.IA, product.IA) and np.allclose(result.MC, product.MC)
+    assert np.allclose(np.asarray(result.SG).ravel(), expected)
+
+    tape = trace(lambda x: x**power, 1)
+    IA = np.array([[z, z]])
+    compiled = compile_tape(tape, subgradient=True)(IA, IA)
+    assert np.allclose(np.asarray(compiled.SG).ravel(), expected)
+    assert np.allclose(np.asarray(tape.evaluate(IA, IA, np.ones((1, 1, 2))).SG).ravel(), expected)
+    assert np.allclose(np.asarray(workspace(tape).evaluate(IA, IA).SG).ravel(), expected)
+
+    vectorized = compile_tape(tape, subgradient=True, vectorized=True)(np.full((1, 2, 3), z), np.full((1, 2, 3), z))
+    assert np.allclose(vectorized.SG[0], expected[:, None])
+    batch = MCBatchPy(np.full((2, 3), z), np.full((2, 3), z), np.ones((1, 2, 3)))**power
+    assert np.allclose(batch.SG[0], expected[:, None])
+
+@pytest.mark.parametrize('power', [-1.5, -2.5, 2.5])
+def test_non_integer_power(power):
+    '''
+    every path rejects an exponent that is not an integer
+    '''
+
+    IA, MC = np.array([0.5, 2.0]), np.array([1.0, 1.0])
+    objects = [MCPy(IA, MC), MCSGPy(IA, MC, np.asmatrix([[1.0, 1.0]])), MCLitePy(IA, MC),
+               MCBatchPy(IA[:, None], MC[:, None], np.ones((1, 2, 1))), variables([0.5], [2.0])]
+    for x in objects:
+        with pytest.raises(ValueError):
+            x**power
+    with pytest.raises(ValueError):
+        trace(lambda x: x**power, 1)
+    with pytest.raises(ValueError):
+        rules.integer_power_rule(power)
+    with pytest.raises(ValueError):
+        interval.ipow(0.5, 2.0, power)
+
+    #a tape recorded elsewhere (e.g. deserialized) with the exponent patched in
+    tape = trace(lambda x: x**3, 1)
+    tape.consts[tape.ops.index(POW)] = power
+    IA, MC = np.array([[0.5, 2.0]]), np.array([[1.0, 1.0]])
+    with pytest.raises(ValueError):
+        tape.evaluate(IA, MC)
+    with pytest.raises(ValueError):
+        compile_tape(tape, subgradient=True)
+    with pytest.raises(ValueError):
+        compile_tape(tape, subgradient=True, vectorized=True)
+    with pytest.raises(ValueError):
+        prepare(tape, IA)
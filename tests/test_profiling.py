@@ -0,0 +1,112 @@
+# branch counters of profiling.profile against the subgradient maps of rules.py
+
+import math
+import numpy as np
+import pytest
+import profiling
+import rules
+from MC import MCSGPy, exp, log, sqrt
+
+COUNT = 60
+
+def variable(LB, UB, cv, cc):
+    return MCSGPy(np.array([LB, UB]), np.array([cv, cc]), np.asmatrix([[1.0, 1.0]]))
+
+def branches(fun, x):
+    '''
+    branch labels of the single rule fun(x) evaluates
+    '''
+
+    with profiling.profile() as stats:
+        fun(x)
+    #x**(-1) of a negative box also counts the negations, which have no relaxation branches
+    (rule,) = [rule for rule in stats.rules.values() if any(label.startswith('cv:') for label in rule.branches)]
+    assert rule.calls == 1
+    return sorted(rule.branches)
+
+def consistent(label, J, sigma):
+    '''
+    label of one relaxation against its subgradient map J = (a, b): sigma_uu/sigma_ou multiply column 0,
+    sigma_uo/sigma_oo column 1 by sigma, zero and bound give no subgradient
+    '''
+
+    kind = label.split(':')[1]
+    if kind in ('zero', 'bound'):
+        return J == (0, 0)
+    column = 0 if kind in ('sigma_uu', 'sigma_ou') else 1
+    return J[1 - column] == 0 and J[column] == pytest.approx(sigma(column), rel=1e-12)
+
+#exp, log, sqrt are looked up at call time: profile() patches the module namespaces, not this dict
+RULES = {
+    'exp': (lambda x: exp(x), rules.exp, (-2, 2)),
+    'log': (lambda x: log(x), rules.log, (0.1, 4)),
+    'sqrt': (lambda x: sqrt(x), rules.sqrt, (0.1, 4)),
+    'square': (lambda x: x**2, lambda x: rules.integer_power(x, 2), (-2, 2)),
+    'cube': (lambda x: x**3, lambda x: rules.integer_power(x, 3), (-2, 2)),
+    'inv': (lambda x: x**(-1), rules.inv, (0.2, 3)),
+    'inv negative': (lambda x: x**(-1), rules.inv, (-3, -0.2)),
+    'negative even': (lambda x: x**(-2), lambda x: rules.integer_power(x, -2), (-3, -0.2)),
+    'negative odd': (lambda x: x**(-3), lambda x: rules.integer_power(x, -3), (-3, -0.2)),
+}
+
+@pytest.mark.parametrize('name', RULES)
+def test_labels_follow_rules(name):
+    '''
+    on random boxes and relaxation points, inside and outside of the box, the branch labels
+    agree with the subgradient map the rule takes
+    '''
+
+    fun, rule, (low, high) = RULES[name]
+    rng = np.random.default_rng(0)
+    seen = set()
+    for _ in range(COUNT):
+        LB, UB = np.sort(rng.uniform(low, high, 2))
+        cv, cc = np.sort(rng.uniform(LB - 0.2*(UB - LB), UB + 0.2*(UB - LB), 2)) if rng.random() < 0.2 else \
+            np.sort(rng.uniform(LB, UB, 2))
+        if name in ('log', 'sqrt', 'inv', 'negative even', 'negative odd', 'inv negative') and cv*cc <= 0:
+            continue
+        x = variable(LB, UB, cv, cc)
+        labels = branches(fun, x)
+        _, J = rule((LB, UB, cv, cc))
+        SG = fun(x).SG
+        #sigma of the label is the subgradient of the result
+        cv_label, = [label for label in labels if label.startswith('cv:')]
+        cc_label, = [label for label in labels if label.startswith('cc:')]
+        assert consistent(cv_label, J[:2], lambda k: SG[0, 0])
+        assert consistent(cc_label, J[2:], lambda k: SG[0, 1])
+        seen.update(labels)
+    assert any('bound' in label or 'zero' in label for label in seen)
+
+def test_known_branches():
+    '''
+    the bound-active case, the flat middle part and the linear parts of the odd power envelopes
+    '''
+
+    assert branches(lambda x: exp(x), variable(0, 1, -1, 2)) == ['cc:bound', 'cv:bound']
+    assert branches(lambda x: x**2, variable(-2, 1, -1, 0.5)) == ['cc:sigma_oo', 'cv:zero']
+    #sign-changing box: tangent points t_cv = 1, t_cc = -0.5 of odd_power_envelopes
+    assert branches(lambda x: x**3, variable(-2, 1, -1, 0.5)) == ['cc:sigma_oo:linear', 'cv:sigma_uu:linear']
+    assert branches(lambda x: x**3, variable(-2, 1, -1, -0.8)) == ['cc:sigma_oo', 'cv:sigma_uu:linear']
+    #positive box: the concave envelope is the secant
+    assert branches(lambda x: x**3, variable(1, 2, 1.2, 1.5)) == ['cc:sigma_oo:linear', 'cv:sigma_uu']
+    #negative domain of 1/x: the rule mirrors it, the labels are those of x
+    assert branches(lambda x: x**(-1), variable(-2, -1, -1.8, -1.2)) == ['cc:sigma_ou', 'cv:sigma_uo']
+
+def test_counters():
+    x = variable(-2, 1, -1, 0.5)
+    with profiling.profile() as stats:
+        for _ in range(3):
+            x**3
+        x**2
+        x*x
+        x*2.0
+    assert stats.rules['MCSGPy.__pow__(odd)'].calls == 3
+    assert stats.rules['MCSGPy.__pow__(odd)'].branches == {'cv:sigma_uu:linear': 3, 'cc:sigma_oo:linear': 3}
+    #x*x is the square x**2
+    assert stats.rules['MCSGPy.__pow__(even)'].branches == {'cv:zero': 2, 'cc:sigma_oo': 2}
+    assert stats.rules['MCSGPy.__mul__'].branches == {'square': 1, 'scalar': 1}
+    assert math.isfinite(stats.rules['MCSGPy.__mul__'].time)
+
+def test_pow_branch():
+    assert [profiling._pow_branch(p) for p in (2, -1, 1, 5, -4, 0, 0.5)] == \
+        ['even', 'inv', 'one', 'odd', 'negative', 'unsupported', 'unsupported']
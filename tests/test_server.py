@@ -0,0 +1,110 @@
+# micro-batching, per-box errors and the socket client of the relaxation server
+
+import asyncio
+import sys
+import numpy as np
+import pytest
+from MC import log
+from compiler import compile_tape
+from server import RelaxationServer, connect
+from expressions import EXPRESSIONS, boxes
+
+TIMEOUT = 5
+
+def run(coroutine):
+    #a server bug that leaves a future pending fails the test instead of hanging it
+    return asyncio.run(asyncio.wait_for(coroutine, TIMEOUT))
+
+def requests(count):
+    LB, UB, cv, cc = boxes(count, seed=4)
+    return [(np.column_stack([LB[:, n], UB[:, n]]), np.column_stack([cv[:, n], cc[:, n]])) for n in range(count)]
+
+def test_batching():
+    '''
+    concurrent requests within the window are one vectorized evaluation with the scalar results
+    '''
+
+    async def main():
+        server = RelaxationServer(window=0.05)
+        tape = server.register('f', EXPRESSIONS['even'], 2)
+        cases = requests(20)
+        results = await asyncio.gather(*[server.evaluate('f', IA, MC, subgradient=True) for IA, MC in cases])
+        await server.close()
+        return tape, cases, results, server.metrics()
+
+    tape, cases, results, metrics = run(main())
+    assert metrics['requests'] == 20 and metrics['batches'] == 1 and metrics['errors'] == 0
+    compiled = compile_tape(tape, subgradient=True)
+    for (IA, MC), result in zip(cases, results):
+        expected = compiled(IA, MC)
+        assert np.allclose(result.IA, expected.IA) and np.allclose(result.MC, expected.MC)
+        assert np.allclose(np.asarray(result.SG), np.asarray(expected.SG))
+
+def test_max_batch():
+    async def main():
+        server = RelaxationServer(window=1.0, max_batch=4)
+        server.register('f', EXPRESSIONS['bilinear'], 2)
+        await asyncio.gather(*[server.evaluate('f', IA, MC) for IA, MC in requests(10)])
+        await server.close()
+        return server.metrics()
+
+    #two full batches at once, the last two requests at close()
+    metrics = run(main())
+    assert metrics['requests'] == 10 and metrics['batches'] == 3
+
+def test_errors_are_per_box():
+    '''
+    a domain error and an overflow in one batch fail their own requests only, and every request is answered
+    '''
+
+    async def main():
+        server = RelaxationServer(window=0.05)
+        server.register('h', lambda x: log(x) + x**3, 1)
+        cases = [[[-1, 1]], [[1, 1e200]], [[1, 2]]]
+        results = await asyncio.gather(*[server.evaluate('h', box, box) for box in cases], return_exceptions=True)
+        await server.close()
+        return results, server.metrics()
+
+    (domain, overflow, result), metrics = run(main())
+    assert type(domain) == ValueError
+    assert type(overflow) == OverflowError
+    assert np.allclose(result.IA, [1, np.log(2) + 8])
+    assert metrics['errors'] == 2 and metrics['fallbacks'] == 1
+
+@pytest.mark.parametrize('unix', [False, True], ids=['tcp', 'unix'])
+def test_client(unix, tmp_path):
+    '''
+    the socket client gives the in-process results and raises the errors of the server
+    '''
+
+    if unix and sys.platform == 'win32':
+        pytest.skip('no Unix sockets')
+
+    async def main():
+        server = RelaxationServer(window=0.01)
+        server.register('f', EXPRESSIONS['concave'], 2)
+        server.register('h', lambda x: log(x) + x**3, 1)
+        address = await server.start(path=str(tmp_path/'server.sock') if unix else None)
+        client = await connect(address)
+        cases = requests(8)
+        remote = await asyncio.gather(*[client.evaluate('f', IA, MC, subgradient=True) for IA, MC in cases])
+        local = [await server.evaluate('f', IA, MC, subgradient=True) for IA, MC in cases]
+        models = await client.models()
+        #one batch: the overflow is raised by the box by box evaluation after the domain error
+        domain, overflow = await asyncio.gather(*[client.evaluate('h', box, box) for box in ([[-1, 1]], [[1, 1e200]])],
+                                                return_exceptions=True)
+        assert type(domain) == ValueError
+        assert type(overflow) == RuntimeError and 'OverflowError' in str(overflow)
+        with pytest.raises(KeyError):
+            await client.evaluate('g', [[0, 1]], [[0, 1]])
+        metrics = await client.metrics()
+        await client.close()
+        await server.close()
+        return remote, local, models, metrics
+
+    remote, local, models, metrics = run(main())
+    assert models == {'f': 2, 'h': 1}
+    for result, expected in zip(remote, local):
+        assert np.allclose(result.IA, expected.IA) and np.allclose(result.MC, expected.MC)
+        assert np.allclose(np.asarray(result.SG), np.asarray(expected.SG))
+    assert metrics['errors'] == 2
@@ -0,0 +1,63 @@
+# the relaxations enclose the function: cv <= f <= cc and the affine estimators of the subgradients
+
+import numpy as np
+import pytest
+from expressions import EXPRESSIONS, boxes, reference
+
+COUNT = 20
+SAMPLES = 64
+
+def tolerance(values):
+    return 1e-9*(1 + np.abs(values))
+
+def samples(LB, UB, rng):
+    '''
+    the corners of the box and SAMPLES random points in it, one point per row
+    '''
+
+    corners = np.array([[LB[0], LB[1]], [LB[0], UB[1]], [UB[0], LB[1]], [UB[0], UB[1]]])
+    return np.vstack([corners, rng.uniform(LB, UB, (SAMPLES, 2))])
+
+@pytest.mark.parametrize('name', EXPRESSIONS)
+def test_envelopes(name):
+    '''
+    relaxed at a point x0 of the box (cv = cc = x0): LB <= cv(x0) <= f(x0) <= cc(x0) <= UB,
+    cv(x0) + s_cv.(x - x0) <= f(x) <= cc(x0) + s_cc.(x - x0) for every x in the box
+    '''
+
+    fun = EXPRESSIONS[name]
+    rng = np.random.default_rng(1)
+    LB, UB, x0, _ = boxes(COUNT, seed=2)
+    for n in range(COUNT):
+        result = reference(fun, LB[:, n], UB[:, n], x0[:, n], x0[:, n])
+        (lower, upper), (cv, cc) = result.IA, result.MC
+        f0 = fun(*x0[:, n])
+        assert lower - tolerance(lower) <= cv <= f0 + tolerance(f0)
+        assert f0 - tolerance(f0) <= cc <= upper + tolerance(upper)
+
+        SG = np.asarray(result.SG)
+        for x in samples(LB[:, n], UB[:, n], rng):
+            f = fun(*x)
+            assert lower - tolerance(lower) <= f <= upper + tolerance(upper)
+            assert cv + SG[:, 0] @ (x - x0[:, n]) <= f + tolerance(f)
+            assert cc + SG[:, 1] @ (x - x0[:, n]) >= f - tolerance(f)
+
+@pytest.mark.parametrize('name', EXPRESSIONS)
+def test_point_box(name):
+    '''
+    on a point box the bounds and the relaxations are the value of the function,
+    and both subgradients its gradient
+    '''
+
+    fun = EXPRESSIONS[name]
+    LB, _, _, _ = boxes(COUNT, seed=3, point=True)
+    for n in range(COUNT):
+        x = LB[:, n]
+        result = reference(fun, x, x, x, x)
+        f = fun(*x)
+        assert np.allclose(result.IA, f, rtol=1e-12, atol=1e-12)
+        assert np.allclose(result.MC, f, rtol=1e-12, atol=1e-12)
+
+        h = 1e-6
+        gradient = [(fun(*(x + h*e)) - fun(*(x - h*e)))/(2*h) for e in np.eye(2)]
+        assert np.allclose(np.asarray(result.SG), np.column_stack([gradient, gradient]), rtol=1e-6, atol=1e-6)